@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Load the topic routing table before the first request arrives
+from dispatcher.routing import routing_table  # noqa: E402
+
+routing_table.warm()
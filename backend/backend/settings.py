@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
+from celery.schedules import crontab
 import sys
 
 load_dotenv()
@@ -113,13 +114,21 @@ WSGI_APPLICATION = "backend.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#
+# Aliases of the read replicas of the default database
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ["dispatcher.routers.ReplicaRouter"]
 if "test" in sys.argv:
     # Check if the 'test' command is being run
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": ":memory:",
-        }
+        },
+        # A second database standing in for a replica in the router tests
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        },
     }
 else:
     DATABASES = {
@@ -132,6 +141,16 @@ else:
             "PORT": os.getenv("POSTGRES_PORT", 5432),
         }
     }
+    # Comma separated hosts of the read replicas, replicated from the primary
+    for index, host in enumerate(os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")):
+        if host.strip():
+            alias = f"replica_{index}"
+            DATABASES[alias] = {
+                **DATABASES["default"],
+                "HOST": host.strip(),
+                "TEST": {"MIRROR": "default"},
+            }
+            DATABASE_REPLICAS.append(alias)
 
 
 # Password validation
@@ -177,8 +196,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Email settings
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_USE_TLS = True
-EMAIL_HOST = "smtp.gmail.com"
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True") == "True"
+EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
@@ -190,9 +209,54 @@ REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = os.getenv("REDIS_PORT", 6379)
 DEFAULT_REDIS_DB = 0
 
+CACHE_REDIS_DB = 1
+
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{DEFAULT_REDIS_DB}"
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
+# Deliveries go to one queue per notification method, see dispatcher.queues
+CELERY_TASK_ROUTES = ("dispatcher.queues.route_task",)
+# Priority lanes within each queue, served strictly in priority order. Workers
+# reserve one task at a time so urgent tasks do not wait behind prefetched ones.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": [0, 3, 6],
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+# Seconds between two runs of the poller releasing the scheduled deliveries
+SCHEDULE_POLL_INTERVAL = float(os.getenv("SCHEDULE_POLL_INTERVAL", 1.0))
+CELERY_BEAT_SCHEDULE = {
+    "rotate-delivery-log": {
+        "task": "dispatcher.tasks.maintenance.rotate_delivery_log",
+        "schedule": crontab(hour=0, minute=5),
+    },
+    "release-scheduled": {
+        "task": "dispatcher.tasks.scheduling.release_scheduled",
+        "schedule": SCHEDULE_POLL_INTERVAL,
+        # A run that could not start before the next one is not needed
+        "options": {"expires": SCHEDULE_POLL_INTERVAL},
+    },
+}
+
+
+# Cache settings
+if "test" in sys.argv:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/{CACHE_REDIS_DB}",
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            },
+        }
+    }
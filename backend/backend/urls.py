@@ -18,8 +18,10 @@ from django.contrib import admin
 from django.urls import path
 from django.urls.conf import include
 from dispatcher.urls import dispatcher_urlpatterns
+from dispatcher.views import metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/dispatcher/", include(dispatcher_urlpatterns)),
+    path("metrics", metrics),
 ]
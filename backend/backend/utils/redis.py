@@ -0,0 +1,18 @@
+from django_redis import get_redis_connection
+
+
+def get_redis(alias: str = "default"):
+    """
+    Returns the raw Redis client behind a django-redis cache.
+
+    Args:
+        alias (str): The cache alias.
+
+    Returns:
+        The Redis client, or None if the cache is not backed by Redis, e.g. the
+        local memory cache used by the tests.
+    """
+    try:
+        return get_redis_connection(alias)
+    except NotImplementedError:
+        return None
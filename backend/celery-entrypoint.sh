@@ -0,0 +1,5 @@
+#!/bin/bash
+# The processes of a Celery worker share their metrics through files in this directory
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+exec "$@"
@@ -1,6 +1,13 @@
 from django.contrib import admin
-from dispatcher.models import Topic, Notification
+from dispatcher.models import (
+    Topic,
+    Notification,
+    NotificationDelivery,
+    MessageTemplate,
+)
 
 
 admin.site.register(Topic)
 admin.site.register(Notification)
+admin.site.register(NotificationDelivery)
+admin.site.register(MessageTemplate)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DispatcherConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dispatcher'
+
+    def ready(self):
+        import dispatcher.signals  # noqa: F401
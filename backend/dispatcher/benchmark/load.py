@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Returns a percentile of some values, by the nearest-rank method.
+
+    Args:
+        values (List[float]): The values.
+        p (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, or NaN if there are no values.
+    """
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float]) -> Dict[str, Any]:
+    """
+    Summarizes latencies given in seconds.
+
+    Args:
+        latencies (List[float]): The latencies.
+
+    Returns:
+        Dict[str, Any]: The count and the mean, p50, p95, p99 and max in
+            milliseconds.
+    """
+    summary = {"count": len(latencies), "mean": None}
+    if latencies:
+        summary["mean"] = round(sum(latencies) / len(latencies) * 1000, 3)
+    for name, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)):
+        value = percentile(latencies, p)
+        summary[name] = None if math.isnan(value) else round(value * 1000, 2)
+    return summary
+
+
+class LoadGenerator:
+    """
+    Open-loop load generator sending requests at a fixed rate.
+
+    Request n is due at start + n / rate whatever happened to the previous ones,
+    and its latency is measured from when it was due rather than from when it
+    was actually sent. A stalled server then shows up in the latencies instead
+    of silently lowering the rate (coordinated omission).
+    """
+
+    def __init__(
+        self,
+        send: Callable[[int], None],
+        rate: float,
+        duration: float,
+        concurrency: int = 64,
+    ) -> None:
+        """
+        Initializes the generator.
+
+        Args:
+            send (Callable[[int], None]): Sends the request of a sequence number,
+                raising if it failed.
+            rate (float): Requests per second.
+            duration (float): Seconds to send requests for.
+            concurrency (int): Maximum number of requests in flight.
+        """
+        self.send = send
+        self.rate = rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.scheduled: Dict[int, float] = {}
+        self.latencies: List[float] = []
+        self.sent: List[int] = []
+        self.errors: int = 0
+        self.elapsed: float = 0.0
+        self._lock = threading.Lock()
+
+    def run(self) -> "LoadGenerator":
+        """
+        Sends every request and waits for them to complete.
+
+        Returns:
+            LoadGenerator: The generator, holding the results.
+        """
+        total = int(self.rate * self.duration)
+        start = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="load"
+        ) as executor:
+            for seq in range(total):
+                due = start + seq / self.rate
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.scheduled[seq] = due
+                executor.submit(self._call, seq, due)
+        self.elapsed = time.monotonic() - start
+        return self
+
+    def _call(self, seq: int, due: float) -> None:
+        try:
+            self.send(seq)
+        except Exception as e:
+            logger.error(f"Request {seq} failed: {e}")
+            with self._lock:
+                self.errors += 1
+            return
+        latency = time.monotonic() - due
+        with self._lock:
+            self.latencies.append(latency)
+            self.sent.append(seq)
@@ -0,0 +1,246 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import re
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+MARKER = re.compile(r"bench-(?P<run>\w+):(?P<seq>\d+)")
+
+
+def marker(run_id: str, seq: int) -> str:
+    """
+    Returns the text tagging a benchmark message, so the stubs can tell which
+    request a delivery belongs to.
+
+    Args:
+        run_id (str): The ID of the benchmark run.
+        seq (int): The sequence number of the request.
+
+    Returns:
+        str: The marker.
+    """
+    return f"bench-{run_id}:{seq}"
+
+
+class Recorder:
+    """
+    Thread-safe record of the benchmark messages the stub providers received.
+    """
+
+    def __init__(self) -> None:
+        self._received: Dict[str, List[Tuple[int, str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, text: str) -> None:
+        """
+        Records every benchmark message found in a delivered text, with the
+        monotonic time it arrived at.
+
+        Args:
+            provider (str): The name of the stub that received the text.
+            text (str): The delivered text.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for match in MARKER.finditer(text):
+                self._received.setdefault(match["run"], []).append(
+                    (int(match["seq"]), provider, now)
+                )
+
+    def received(self, run_id: str) -> List[Tuple[int, str, float]]:
+        """
+        Returns the messages of a run received so far.
+
+        Args:
+            run_id (str): The ID of the benchmark run.
+
+        Returns:
+            List[Tuple[int, str, float]]: The sequence number, provider and
+                receive time of each message.
+        """
+        with self._lock:
+            return list(self._received.get(run_id, []))
+
+
+class StubServer:
+    """
+    Local server of one stub provider, serving on a background thread.
+    """
+
+    name: str = ""
+
+    def __init__(
+        self, recorder: Recorder, latency: float = 0.0, host: str = "127.0.0.1"
+    ) -> None:
+        """
+        Initializes the server on a free port, without serving yet.
+
+        Args:
+            recorder (Recorder): Where received messages are recorded.
+            latency (float): Seconds the stub waits before answering a message.
+            host (str): The interface to listen on.
+        """
+        self.recorder = recorder
+        self.latency = latency
+        self.server = self.make_server(host)
+        self._thread: Optional[threading.Thread] = None
+
+    def make_server(self, host: str) -> socketserver.BaseServer:
+        raise NotImplementedError
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server.server_address[0]}:{self.port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name=f"stub-{self.name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+class _ProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stub: "HTTPStub" = None
+    path_pattern: re.Pattern = None
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode()
+        if not self.path_pattern.fullmatch(self.path):
+            self._reply(404, {"ok": False, "error": "unknown_method"})
+            return
+
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            fields = json.loads(body or "{}")
+        else:
+            fields = {key: values[0] for key, values in parse_qs(body).items()}
+        if self.stub.latency:
+            time.sleep(self.stub.latency)
+        self.stub.recorder.record(self.stub.name, str(fields.get("text", "")))
+        self._reply(200, {"ok": True})
+
+    def _reply(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        # Keep the benchmark output readable
+        pass
+
+
+class HTTPStub(StubServer):
+    path_pattern: str = ""
+
+    def make_server(self, host: str) -> ThreadingHTTPServer:
+        handler = type(
+            "Handler",
+            (_ProviderHandler,),
+            {"stub": self, "path_pattern": re.compile(self.path_pattern)},
+        )
+        server = ThreadingHTTPServer((host, 0), handler)
+        server.daemon_threads = True
+        return server
+
+
+class TelegramStub(HTTPStub):
+    """
+    Stub of the Telegram Bot API sendMessage method. Point TelegramService at
+    f"{stub.url}/bot".
+    """
+
+    name = "telegram"
+    path_pattern = r"/bot[^/]+/sendMessage"
+
+
+class SlackStub(HTTPStub):
+    """
+    Stub of the Slack Web API chat.postMessage method. Point SlackService at
+    f"{stub.url}/api/".
+    """
+
+    name = "slack"
+    path_pattern = r"/api/chat\.postMessage"
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    stub: "SMTPSink" = None
+
+    def handle(self) -> None:
+        self._reply("220 localhost SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self._reply("250-localhost", "250 8BITMIME")
+            elif command in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                text = self._read_data()
+                if self.stub.latency:
+                    time.sleep(self.stub.latency)
+                self.stub.recorder.record(self.stub.name, text)
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _read_data(self) -> str:
+        lines = []
+        for line in iter(self.rfile.readline, b""):
+            if line in (b".\r\n", b".\n"):
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines).decode(errors="replace")
+
+    def _reply(self, *lines: str) -> None:
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+
+
+class SMTPSink(StubServer):
+    """
+    SMTP server accepting every email without delivering it, without TLS or
+    authentication.
+    """
+
+    name = "email"
+
+    def make_server(self, host: str) -> socketserver.ThreadingTCPServer:
+        handler = type("Handler", (_SMTPHandler,), {"stub": self})
+        server = socketserver.ThreadingTCPServer((host, 0), handler)
+        server.daemon_threads = True
+        return server
@@ -0,0 +1,246 @@
+from backend.utils.redis import get_redis
+from django.core.cache import cache
+from dispatcher.retries import RetryAfterError, retry_policy
+from dispatcher.settings import (
+    CIRCUIT_BREAKER_KEY_PREFIX,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_FAILURE_WINDOW,
+    CIRCUIT_BREAKER_OPEN_TIME,
+)
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Guards the index of tripped circuits when it is not kept in Redis
+_index_lock = threading.Lock()
+
+
+class CircuitOpenError(RetryAfterError):
+    """
+    Raised instead of sending a message to a provider whose circuit is open.
+    """
+
+
+class Circuit:
+    """
+    Circuit breaker of one provider and destination.
+
+    The state lives in the shared cache (Redis), so a circuit tripped by one
+    worker stops every worker from calling the dead endpoint:
+
+    - closed: messages are sent. Transient failures are counted, and too many of
+      them within the failure window open the circuit.
+    - open: messages are rejected without any network I/O until the open time
+      has passed.
+    - half-open: a single probe message is sent. Its success closes the circuit
+      and its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        destination: Optional[str],
+        key_prefix: str = CIRCUIT_BREAKER_KEY_PREFIX,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        failure_window: int = CIRCUIT_BREAKER_FAILURE_WINDOW,
+        open_time: int = CIRCUIT_BREAKER_OPEN_TIME,
+    ) -> None:
+        """
+        Initializes the circuit.
+
+        Args:
+            method (str): The notification method.
+            destination (Optional[str]): The destination, e.g. a Slack channel.
+                None means the circuit covers the whole provider.
+            key_prefix (str): Prefix of the cache keys of the circuit.
+            failure_threshold (int): Failures within the window that open the
+                circuit.
+            failure_window (int): Seconds failures are counted over.
+            open_time (int): Seconds the circuit stays open before a probe.
+        """
+        self.method = method
+        self.destination = destination
+        self.index_key = f"{key_prefix}:index"
+        self.key_prefix = f"{key_prefix}:{method}:{destination or '*'}"
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.open_time = open_time
+        self.state = CLOSED
+
+    def before_send(self) -> None:
+        """
+        Checks that a message can be sent through the circuit.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open and already
+                probing.
+        """
+        values = cache.get_many([self._key("open"), self._key("tripped")])
+        opened_until = values.get(self._key("open"))
+        if opened_until is not None:
+            self.state = OPEN
+            raise CircuitOpenError(
+                f"Circuit of {self} is open",
+                retry_after=max(0.0, opened_until - time.time()),
+            )
+        if self._key("tripped") not in values:
+            self.state = CLOSED
+            return
+
+        self.state = HALF_OPEN
+        if not cache.add(self._key("probe"), 1, timeout=self.open_time):
+            raise CircuitOpenError(
+                f"Circuit of {self} is half-open", retry_after=self.open_time
+            )
+
+    def record_success(self) -> None:
+        """
+        Records a message sent through the circuit, closing it after a probe.
+        """
+        if self.state != CLOSED:
+            cache.delete_many(
+                [self._key(name) for name in ("tripped", "probe", "failures")]
+            )
+            self.state = CLOSED
+            logger.info(f"Circuit of {self} closed")
+
+    def record_failure(self, exc: Exception) -> None:
+        """
+        Records a message that failed, opening the circuit if the provider looks
+        down. Errors caused by the message itself or by the provider rate limit
+        are ignored.
+
+        Args:
+            exc (Exception): The error sending the message failed with.
+        """
+        if retry_policy.retry_after(exc) is not None or retry_policy.is_permanent(exc):
+            # A rate limited provider is up, it asked for a wait instead
+            return
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+
+        cache.add(self._key("failures"), 0, timeout=self.failure_window)
+        try:
+            failures = cache.incr(self._key("failures"))
+        except ValueError:
+            # The window expired between add() and incr()
+            return
+        if failures >= self.failure_threshold:
+            self._open()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the state of the circuit, as seen by every worker.
+
+        Returns:
+            Dict[str, Any]: The method, destination, state, number of times the
+                circuit tripped and recent failures.
+        """
+        keys = [self._key(name) for name in ("open", "tripped", "trips", "failures")]
+        values = cache.get_many(keys)
+        if keys[0] in values:
+            state = OPEN
+        elif keys[1] in values:
+            state = HALF_OPEN
+        else:
+            state = CLOSED
+        return {
+            "method": self.method,
+            "destination": self.destination,
+            "state": state,
+            "trips": values.get(keys[2], 0),
+            "failures": values.get(keys[3], 0),
+        }
+
+    def _open(self) -> None:
+        cache.set(
+            self._key("open"), time.time() + self.open_time, timeout=self.open_time
+        )
+        cache.set(self._key("tripped"), 1, timeout=None)
+        cache.delete_many([self._key("probe"), self._key("failures")])
+        cache.add(self._key("trips"), 0, timeout=None)
+        cache.incr(self._key("trips"))
+        self._remember()
+        self.state = OPEN
+        logger.warning(f"Circuit of {self} opened for {self.open_time}s")
+
+    def _remember(self) -> None:
+        # Add the circuit to the index so its state can be listed. Redis adds it
+        # atomically, otherwise concurrent trips could drop each other's entries.
+        redis = get_redis()
+        if redis is not None:
+            redis.sadd(self.index_key, json.dumps([self.method, self.destination]))
+            return
+        entry = (self.method, self.destination)
+        with _index_lock:
+            index = cache.get(self.index_key, set())
+            if entry not in index:
+                cache.set(self.index_key, index | {entry}, None)
+
+    def _key(self, name: str) -> str:
+        return f"{self.key_prefix}:{name}"
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.destination or '*'}"
+
+
+class CircuitBreaker:
+    """
+    Registry of the circuits of every provider and destination.
+    """
+
+    def __init__(self, key_prefix: str = CIRCUIT_BREAKER_KEY_PREFIX) -> None:
+        """
+        Initializes the registry.
+
+        Args:
+            key_prefix (str): Prefix of the cache keys of every circuit.
+        """
+        self.key_prefix = key_prefix
+
+    def circuit(self, method: str, destination: Optional[str]) -> Circuit:
+        """
+        Returns the circuit of a provider and destination.
+
+        Args:
+            method (str): The notification method.
+            destination (Optional[str]): The destination, or None for the whole
+                provider.
+
+        Returns:
+            Circuit: The circuit.
+        """
+        return Circuit(method, destination, key_prefix=self.key_prefix)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """
+        Returns the state of every circuit that ever tripped.
+
+        Returns:
+            List[Dict[str, Any]]: The status of each circuit.
+        """
+        return [
+            self.circuit(method, destination).status()
+            for method, destination in sorted(
+                self._index(), key=lambda e: (e[0], e[1] or "")
+            )
+        ]
+
+    def _index(self) -> Set[Tuple[str, Optional[str]]]:
+        key = f"{self.key_prefix}:index"
+        redis = get_redis()
+        if redis is None:
+            return cache.get(key, set())
+        return {tuple(json.loads(member)) for member in redis.smembers(key)}
+
+
+circuit_breaker = CircuitBreaker()
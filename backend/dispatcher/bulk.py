@@ -0,0 +1,344 @@
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework import renderers, serializers
+from dispatcher.models import Notification, Topic
+from dispatcher.routing import routing_table
+from dispatcher.serializers import TopicRecordSerializer
+from dispatcher.services.validators import validator_registry
+from dispatcher.settings import (
+    BULK_IMPORT_BATCH_SIZE,
+    BULK_IMPORT_MAX_ERRORS,
+    BULK_EXPORT_CHUNK_SIZE,
+)
+import dataclasses
+import json
+import logging
+import orjson
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# Topic fields written as they are in the records
+TOPIC_FIELDS = (
+    "description",
+    "chatbot_token",
+    "digest_window",
+    "digest_max_messages",
+    "quiet_hours_start",
+    "quiet_hours_end",
+)
+
+NotificationKey = Tuple[str, str]
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Lets clients ask for the NDJSON export, which the view streams itself.
+    """
+
+    media_type = NDJSON_CONTENT_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+def notification_key(method: str, config: Any) -> NotificationKey:
+    # Notifications are told apart by their content, their primary keys are
+    # not the same in another database
+    return method, json.dumps(config, sort_keys=True, default=str)
+
+
+@dataclasses.dataclass
+class ImportReport:
+    """
+    Outcome of a topic import.
+    """
+
+    created: int = 0
+    updated: int = 0
+    invalid: int = 0
+    # Errors of the first BULK_IMPORT_MAX_ERRORS invalid lines
+    errors: List[Dict[str, Any]] = dataclasses.field(default_factory=list)
+
+    def error(self, line: int, errors: Any) -> None:
+        """
+        Records an invalid line.
+
+        Args:
+            line (int): The line number, starting at 1.
+            errors (Any): The errors of each field of the line.
+        """
+        self.invalid += 1
+        if len(self.errors) < BULK_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+class TopicImporter:
+    """
+    Creates or updates topics from NDJSON lines, a batch at a time.
+
+    Each line is a TopicRecordSerializer record that replaces the topic of the
+    same name. The notification configs of a batch are validated once per
+    distinct config, and the batch is written with bulk inserts and updates in
+    a single transaction. Invalid lines are reported and skipped.
+    """
+
+    def __init__(self, batch_size: int = BULK_IMPORT_BATCH_SIZE) -> None:
+        """
+        Initializes the importer.
+
+        Args:
+            batch_size (int): Number of valid lines written per transaction.
+        """
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self._record = TopicRecordSerializer()
+        # Notifications written by earlier batches, reused by later records
+        # with the same content
+        self._notifications: Dict[NotificationKey, int] = {}
+
+    def run(self, lines: Iterable[Union[bytes, str]]) -> ImportReport:
+        """
+        Imports the lines as they are read.
+
+        Args:
+            lines (Iterable[Union[bytes, str]]): The NDJSON lines.
+
+        Returns:
+            ImportReport: The number of topics created and updated, and the
+                invalid lines.
+        """
+        batch = []
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            record = self._parse(number, line)
+            if record is not None:
+                batch.append((number, record))
+            if len(batch) >= self.batch_size:
+                self._import(batch)
+                batch = []
+        if batch:
+            self._import(batch)
+        return self.report
+
+    def _parse(self, number: int, line: Union[bytes, str]) -> Optional[Dict]:
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            self.report.error(number, {"non_field_errors": [f"Invalid JSON: {e}"]})
+            return None
+        try:
+            return self._record.run_validation(data)
+        except serializers.ValidationError as e:
+            self.report.error(number, e.detail)
+            return None
+
+    def _import(self, batch: List[Tuple[int, Dict]]) -> None:
+        # Later lines replace earlier ones of the same topic
+        records = {
+            record["name"]: (number, record)
+            for number, record in self._validate_configs(batch)
+        }
+        if not records:
+            return
+        try:
+            with transaction.atomic():
+                created, updated, notifications = self._write(list(records.values()))
+                transaction.on_commit(routing_table.invalidate)
+        except DatabaseError as e:
+            logger.error(f"Error importing {len(records)} topics: {e}")
+            for number, _ in records.values():
+                self.report.error(number, {"non_field_errors": [str(e)]})
+            return
+        self._notifications.update(notifications)
+        self.report.created += created
+        self.report.updated += updated
+
+    def _validate_configs(
+        self, batch: List[Tuple[int, Dict]]
+    ) -> List[Tuple[int, Dict]]:
+        checked: Dict[NotificationKey, Optional[str]] = {}
+
+        def check(notification: Dict) -> Optional[str]:
+            key = notification_key(notification["method"], notification["config"])
+            if key not in checked:
+                checked[key] = _config_error(
+                    notification["method"], notification["config"]
+                )
+            return checked[key]
+
+        valid = []
+        for number, record in batch:
+            errors = {}
+            if record.get("notification") is not None:
+                error = check(record["notification"])
+                if error:
+                    errors["notification"] = [error]
+            additional = {
+                index: [error]
+                for index, error in enumerate(
+                    map(check, record.get("additional_notifications", []))
+                )
+                if error
+            }
+            if additional:
+                errors["additional_notifications"] = additional
+            if errors:
+                self.report.error(number, errors)
+            else:
+                valid.append((number, record))
+        return valid
+
+    def _write(
+        self, records: List[Tuple[int, Dict]]
+    ) -> Tuple[int, int, Dict[NotificationKey, int]]:
+        existing = {
+            topic.name: topic
+            for topic in Topic.objects.filter(
+                name__in=[record["name"] for _, record in records]
+            )
+            .select_related("notification")
+            .prefetch_related("additional_notifications")
+        }
+        # The current notifications of the topics are kept if they do not change
+        notifications: Dict[NotificationKey, int] = {}
+        for topic in existing.values():
+            for notification in topic.targets:
+                key = notification_key(notification.method, notification.config)
+                notifications.setdefault(key, notification.pk)
+
+        def pk_of(notification: Dict) -> int:
+            key = notification_key(notification["method"], notification["config"])
+            return notifications.get(key) or self._notifications[key]
+
+        new = {}
+        for _, record in records:
+            for notification in _notifications_of(record):
+                key = notification_key(notification["method"], notification["config"])
+                if key not in notifications and key not in self._notifications:
+                    new.setdefault(key, Notification(**notification))
+        Notification.objects.bulk_create(new.values(), batch_size=self.batch_size)
+        notifications.update((key, row.pk) for key, row in new.items())
+
+        now = timezone.now()
+        rows, created, updated = [], [], []
+        for _, record in records:
+            topic = existing.get(record["name"])
+            if topic is None:
+                topic = Topic(name=record["name"])
+                created.append(topic)
+            else:
+                # bulk_update does not set auto_now fields
+                topic.updated_at = now
+                updated.append(topic)
+            for field in TOPIC_FIELDS:
+                setattr(topic, field, record.get(field))
+            notification = record.get("notification")
+            topic.notification_id = pk_of(notification) if notification else None
+            rows.append((topic, record))
+        Topic.objects.bulk_create(created, batch_size=self.batch_size)
+        Topic.objects.bulk_update(
+            updated,
+            ["notification", "updated_at", *TOPIC_FIELDS],
+            batch_size=self.batch_size,
+        )
+
+        Link = Topic.additional_notifications.through
+        Link.objects.filter(topic__in=updated).delete()
+        links = []
+        for topic, record in rows:
+            pks = dict.fromkeys(
+                pk_of(notification)
+                for notification in record.get("additional_notifications", [])
+            )
+            links.extend(Link(topic_id=topic.pk, notification_id=pk) for pk in pks)
+        Link.objects.bulk_create(links, batch_size=self.batch_size)
+        return len(created), len(updated), notifications
+
+
+def import_topics(
+    lines: Iterable[Union[bytes, str]], batch_size: int = BULK_IMPORT_BATCH_SIZE
+) -> ImportReport:
+    """
+    Creates or updates topics from NDJSON lines. See TopicImporter.
+
+    Args:
+        lines (Iterable[Union[bytes, str]]): The NDJSON lines.
+        batch_size (int): Number of valid lines written per transaction.
+
+    Returns:
+        ImportReport: The outcome of the import.
+    """
+    return TopicImporter(batch_size).run(lines)
+
+
+def export_topics(chunk_size: int = BULK_EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields every topic as an NDJSON line that import_topics accepts.
+
+    Topics are read through a server-side cursor on PostgreSQL, chunk_size rows
+    and their additional notifications at a time, so the memory used does not
+    depend on the number of topics.
+
+    Args:
+        chunk_size (int): Number of topics read from the database at a time.
+
+    Yields:
+        bytes: A topic record, ending with a newline.
+    """
+    topics = (
+        Topic.objects.select_related("notification")
+        .prefetch_related("additional_notifications")
+        .order_by("pk")
+    )
+    for topic in topics.iterator(chunk_size=chunk_size):
+        yield orjson.dumps(topic_record(topic)) + b"\n"
+
+
+def topic_record(topic: Topic) -> Dict[str, Any]:
+    """
+    Returns the TopicRecordSerializer record of a topic.
+
+    Args:
+        topic (Topic): The topic, with its notifications loaded.
+
+    Returns:
+        Dict[str, Any]: The record.
+    """
+    notification = topic.notification
+    return {
+        "name": topic.name,
+        "notification": (_notification_record(notification) if notification else None),
+        "additional_notifications": [
+            _notification_record(notification)
+            for notification in topic.additional_notifications.all()
+        ],
+        **{field: getattr(topic, field) for field in TOPIC_FIELDS},
+    }
+
+
+def _notification_record(notification: Notification) -> Dict[str, Any]:
+    return {"method": notification.method, "config": notification.config}
+
+
+def _notifications_of(record: Dict) -> List[Dict]:
+    main = [record["notification"]] if record.get("notification") else []
+    return main + record.get("additional_notifications", [])
+
+
+def _config_error(method: str, config: Any) -> Optional[str]:
+    # Notification.validate, once per distinct config of a batch
+    service = Notification.service_for(method)
+    try:
+        valid = validator_registry.validate(service.validator_class, config)
+    except Exception as e:
+        return str(e)
+    return None if valid else "Invalid notification data"
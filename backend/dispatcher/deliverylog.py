@@ -0,0 +1,123 @@
+from django.db import close_old_connections
+from dispatcher.models import NotificationDelivery
+from dispatcher.settings import (
+    DELIVERY_LOG_BUFFER_SIZE,
+    DELIVERY_LOG_FLUSH_INTERVAL,
+)
+import logging
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryLog:
+    """
+    In-process buffer of delivery log rows, written with a single bulk_create
+    once it holds enough rows or its oldest row is old enough.
+
+    Sending a message never waits for an insert of its own. A background thread,
+    started in each worker process, flushes rows that would otherwise wait for
+    the next delivery.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DELIVERY_LOG_BUFFER_SIZE,
+        flush_interval: float = DELIVERY_LOG_FLUSH_INTERVAL,
+    ) -> None:
+        """
+        Initializes an empty buffer.
+
+        Args:
+            max_size (int): Number of buffered rows that triggers a flush.
+            flush_interval (float): Seconds a row may wait in the buffer.
+        """
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._rows: List[NotificationDelivery] = []
+        self._oldest: float = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        topic_id: int,
+        method: str,
+        status: str,
+        attempt: int = 1,
+        latency: Optional[float] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """
+        Buffers the log row of a delivery attempt.
+
+        Args:
+            topic_id (int): The ID of the Topic instance.
+            method (str): The notification method.
+            status (str): The NotificationDelivery status of the attempt.
+            attempt (int): The attempt number, starting at 1.
+            latency (Optional[float]): Seconds the provider took, if it was called.
+            error (Optional[Exception]): The error the attempt failed with.
+        """
+        row = NotificationDelivery(
+            topic_id=topic_id,
+            method=method,
+            status=status,
+            attempt=attempt,
+            latency_ms=round(latency * 1000) if latency is not None else None,
+            error=str(error) if error is not None else "",
+        )
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_size
+            expired = time.monotonic() - self._oldest >= self.flush_interval
+        if full or expired:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes every buffered row. Rows that cannot be written are dropped, so a
+        database outage never blocks deliveries.
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return
+        try:
+            NotificationDelivery.objects.bulk_create(rows, batch_size=self.max_size)
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} delivery log rows: {e}")
+
+    def start(self) -> None:
+        """
+        Starts the thread that flushes the buffer every flush interval.
+        """
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="delivery-log", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stops the flush thread and writes the remaining rows.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+            # The thread keeps its own database connection
+            close_old_connections()
+
+
+delivery_log = DeliveryLog()
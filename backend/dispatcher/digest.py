@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from dispatcher.routing import TopicRoute
+from dispatcher.settings import (
+    DIGEST_KEY_PREFIX,
+    DIGEST_MESSAGE_TTL,
+    DIGEST_LOCK_TIMEOUT,
+)
+from typing import List, Optional, Tuple
+
+
+class DigestBuffer:
+    """
+    Per-topic buffer of messages waiting to be delivered as a single digest.
+
+    Messages are stored in the shared cache (Redis) under an increasing sequence
+    number, so any web process can append to a digest and any worker can flush it.
+    """
+
+    def __init__(self, key_prefix: str = DIGEST_KEY_PREFIX) -> None:
+        """
+        Initializes the buffer.
+
+        Args:
+            key_prefix (str): Prefix of every cache key used by the buffer.
+        """
+        self.key_prefix = key_prefix
+
+    def add(self, route: TopicRoute, message: str) -> Optional[int]:
+        """
+        Appends a message to the digest of a topic.
+
+        Args:
+            route (TopicRoute): The route of the topic, with digest mode enabled.
+            message (str): The message to buffer.
+
+        Returns:
+            Optional[int]: The countdown in seconds to schedule a flush with, or
+                None if a flush is already scheduled for this digest.
+        """
+        pk = route.pk
+        cache.add(self._key(pk, "seq"), 0, timeout=None)
+        seq = cache.incr(self._key(pk, "seq"))
+        cache.set(self._key(pk, seq), message, timeout=DIGEST_MESSAGE_TTL)
+
+        flushed = cache.get(self._key(pk, "flushed"), 0)
+        if route.digest_max_messages and seq - flushed == route.digest_max_messages:
+            return 0
+        # The first message after a flush opens the window and schedules its flush
+        if cache.add(self._key(pk, "window"), seq, timeout=route.digest_window):
+            return route.digest_window
+        return None
+
+    def drain(self, pk: int, skip_missing: bool = False) -> Tuple[List[str], bool]:
+        """
+        Takes every buffered message of a topic, in arrival order.
+
+        Args:
+            pk (int): The topic pk.
+            skip_missing (bool): Drop messages that are still missing instead of
+                waiting for them, e.g. because they expired.
+
+        Returns:
+            Tuple[List[str], bool]: The messages, and whether some messages were
+                still being written and must be drained again shortly.
+        """
+        lock = self._key(pk, "lock")
+        if not cache.add(lock, 1, timeout=DIGEST_LOCK_TIMEOUT):
+            # Another worker is flushing this digest
+            return [], False
+        try:
+            # Close the window first so later messages open and schedule a new one
+            cache.delete(self._key(pk, "window"))
+            seq = cache.get(self._key(pk, "seq"), 0)
+            flushed = cache.get(self._key(pk, "flushed"), 0)
+            keys = [self._key(pk, n) for n in range(flushed + 1, seq + 1)]
+            found = cache.get_many(keys)
+
+            messages = []
+            drained = 0
+            for key in keys:
+                if key in found:
+                    messages.append(found[key])
+                elif not skip_missing:
+                    break
+                drained += 1
+            cache.set(self._key(pk, "flushed"), flushed + drained, timeout=None)
+            cache.delete_many(keys[:drained])
+            return messages, drained < len(keys)
+        finally:
+            cache.delete(lock)
+
+    def _key(self, pk: int, suffix) -> str:
+        return f"{self.key_prefix}:{pk}:{suffix}"
+
+
+digest_buffer = DigestBuffer()
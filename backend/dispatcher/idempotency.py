@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from dispatcher.settings import (
+    IDEMPOTENCY_KEY_PREFIX,
+    IDEMPOTENCY_KEY_TTL,
+    IDEMPOTENCY_CONTENT_KEYS,
+    IDEMPOTENCY_CONTENT_KEY_TTL,
+    IDEMPOTENCY_IN_PROGRESS_TTL,
+)
+import hashlib
+from typing import Optional, Tuple
+
+IN_PROGRESS = "in-progress"
+
+
+class IdempotencyStore:
+    """
+    Remembers the responses of resolve requests so retried webhooks replay the
+    original response instead of delivering the message again.
+
+    A request is claimed with an atomic add (SET NX with a TTL in Redis), so of
+    several concurrent duplicates only one is processed. The claim expires
+    after in_progress_ttl, in case the process handling it dies, and only the
+    stored response is kept for the full TTL of the key.
+    """
+
+    def __init__(
+        self,
+        key_prefix: str = IDEMPOTENCY_KEY_PREFIX,
+        ttl: int = IDEMPOTENCY_KEY_TTL,
+        content_keys: bool = IDEMPOTENCY_CONTENT_KEYS,
+        content_ttl: int = IDEMPOTENCY_CONTENT_KEY_TTL,
+        in_progress_ttl: int = IDEMPOTENCY_IN_PROGRESS_TTL,
+    ) -> None:
+        """
+        Initializes the store.
+
+        Args:
+            key_prefix (str): Prefix of the cache keys of the store.
+            ttl (int): Seconds a response is remembered for a client key.
+            content_keys (bool): Derive a key from the message content when the
+                request has no Idempotency-Key header.
+            content_ttl (int): Seconds a response is remembered for a key derived
+                from the content.
+            in_progress_ttl (int): Seconds a request stays claimed while it is
+                processed, so the key of a crashed request is freed.
+        """
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+        self.content_keys = content_keys
+        self.content_ttl = content_ttl
+        self.in_progress_ttl = in_progress_ttl
+
+    def key(
+        self, header: Optional[str], topic_id: str, message: str
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Returns the key of a request and how long it is remembered.
+
+        Args:
+            header (Optional[str]): The Idempotency-Key header of the request.
+            topic_id (str): The topic name of the message.
+            message (str): The message.
+
+        Returns:
+            Optional[Tuple[str, int]]: The cache key and its TTL, or None if the
+                request is not deduplicated.
+        """
+        if header:
+            digest = hashlib.sha256(header.encode()).hexdigest()
+            return f"{self.key_prefix}:key:{digest}", self.ttl
+        if self.content_keys:
+            content = f"{topic_id}\0{message}".encode()
+            digest = hashlib.sha256(content).hexdigest()
+            return f"{self.key_prefix}:content:{digest}", self.content_ttl
+        return None
+
+    def claim(self, key: Optional[Tuple[str, int]]) -> Optional[Response]:
+        """
+        Claims a request so that it is processed only once.
+
+        Args:
+            key (Optional[Tuple[str, int]]): The key of the request.
+
+        Returns:
+            Optional[Response]: None if the request must be processed, otherwise
+                the response to answer the duplicate with.
+        """
+        if key is None:
+            return None
+        cache_key, ttl = key
+        timeout = min(ttl, self.in_progress_ttl)
+        if cache.add(cache_key, IN_PROGRESS, timeout=timeout):
+            return None
+
+        stored = cache.get(cache_key)
+        if stored is None and cache.add(cache_key, IN_PROGRESS, timeout=timeout):
+            # Released or expired since the first add
+            return None
+        if stored is None or stored == IN_PROGRESS:
+            return self._in_progress()
+        data, status_code = stored
+        response = Response(data, status=status_code)
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    def complete(self, key: Optional[Tuple[str, int]], response: Response) -> None:
+        """
+        Stores the response of a processed request, to replay it to duplicates.
+
+        Args:
+            key (Optional[Tuple[str, int]]): The key of the request.
+            response (Response): The response of the request.
+        """
+        if key is not None:
+            cache_key, ttl = key
+            cache.set(cache_key, (response.data, response.status_code), timeout=ttl)
+
+    def release(self, key: Optional[Tuple[str, int]]) -> None:
+        """
+        Forgets a request that failed, so a retry of it is processed.
+
+        Args:
+            key (Optional[Tuple[str, int]]): The key of the request.
+        """
+        if key is not None:
+            cache.delete(key[0])
+
+    def _in_progress(self) -> Response:
+        return Response(
+            {"message": "A request with this idempotency key is in progress"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+
+idempotency_store = IdempotencyStore()
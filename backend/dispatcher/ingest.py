@@ -0,0 +1,112 @@
+from rest_framework import fields, serializers
+from dispatcher.settings import PRIORITY_LANES, PRIORITY_NORMAL
+from datetime import datetime
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+SURROGATES = re.compile("[\ud800-\udfff]")
+
+# The messages of the DRF fields, translated like the serializer ones
+MESSAGES = {
+    **fields.Field.default_error_messages,
+    **fields.CharField.default_error_messages,
+    **fields.ChoiceField.default_error_messages,
+    "invalid_data": serializers.Serializer.default_error_messages["invalid"],
+    "null_characters": fields.ProhibitNullCharactersValidator.message,
+    "surrogate_characters": fields.ProhibitSurrogateCharactersValidator.message,
+}
+
+# Date parsing has too many formats and timezone rules to mirror, the optional
+# send_at field is left to DRF
+SEND_AT = fields.DateTimeField(required=False)
+
+
+class IngestError(Exception):
+    """
+    Raised for a chat message that does not validate, with the errors of each
+    field in the format of ChatMessageSerializer.errors.
+    """
+
+    def __init__(self, errors: Dict[str, List[str]]) -> None:
+        super().__init__(errors)
+        self.errors = errors
+
+
+def parse_chat_message(data: Any) -> Tuple[str, str, str, Optional[datetime]]:
+    """
+    Validates a decoded chat message like ChatMessageSerializer does, without
+    the field machinery of DRF.
+
+    Args:
+        data (Any): The decoded JSON body.
+
+    Returns:
+        Tuple[str, str, str, Optional[datetime]]: The topic name, the message,
+            its priority and when to send it, if later.
+
+    Raises:
+        IngestError: If the message is not valid.
+    """
+    if data is None:
+        raise IngestError({"non_field_errors": ["No data provided"]})
+    if not isinstance(data, dict):
+        error = _message("invalid_data", datatype=type(data).__name__)
+        raise IngestError({"non_field_errors": [error]})
+
+    errors = {}
+    values = []
+    for field in ("topic_id", "description"):
+        try:
+            values.append(_char_field(data, field))
+        except ValueError as e:
+            errors[field] = [str(e)]
+    try:
+        priority = _priority_field(data)
+    except ValueError as e:
+        errors["priority"] = [str(e)]
+    send_at = None
+    if "send_at" in data:
+        try:
+            send_at = SEND_AT.run_validation(data["send_at"])
+        except serializers.ValidationError as e:
+            errors["send_at"] = [str(error) for error in e.detail]
+    if errors:
+        raise IngestError(errors)
+    topic_id, description = values
+    return topic_id, description, priority, send_at
+
+
+def _char_field(data: Dict[str, Any], field: str) -> str:
+    # serializers.CharField() with its default arguments
+    if field not in data:
+        raise ValueError(_message("required"))
+    value = data[field]
+    if value is None:
+        raise ValueError(_message("null"))
+    if value == "" or str(value).strip() == "":
+        raise ValueError(_message("blank"))
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(_message("invalid"))
+    value = str(value).strip()
+    if "\x00" in value:
+        raise ValueError(_message("null_characters"))
+    surrogate = SURROGATES.search(value)
+    if surrogate is not None:
+        raise ValueError(_message("surrogate_characters", code_point=ord(surrogate[0])))
+    return value
+
+
+def _priority_field(data: Dict[str, Any]) -> str:
+    # serializers.ChoiceField(choices=list(PRIORITY_LANES), default=PRIORITY_NORMAL)
+    if "priority" not in data:
+        return PRIORITY_NORMAL
+    value = data["priority"]
+    if value is None:
+        raise ValueError(_message("null"))
+    if str(value) not in PRIORITY_LANES:
+        raise ValueError(_message("invalid_choice", input=value))
+    return str(value)
+
+
+def _message(code: str, **kwargs: Any) -> str:
+    return str(MESSAGES[code]).format(**kwargs)
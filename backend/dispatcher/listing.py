@@ -0,0 +1,45 @@
+from django.db.models import Count, Max
+from dispatcher.settings import API_PAGE_SIZE, API_MAX_PAGE_SIZE
+from rest_framework.pagination import CursorPagination
+import hashlib
+from typing import Callable, Type
+
+
+class CreatedCursorPagination(CursorPagination):
+    """
+    Cursor pagination in creation order, stable while rows are being added.
+    """
+
+    ordering = ("created_at", "pk")
+    page_size = API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = API_MAX_PAGE_SIZE
+
+
+def list_etag(*models: Type) -> Callable[..., str]:
+    """
+    Returns the etag_func of django.views.decorators.http.condition for a list
+    of TimestampedModel rows.
+
+    The ETag is derived from the latest updated_at and the number of rows of
+    each model the list is built from, the count catching deletions, and from
+    the page requested. It costs one aggregate query per model, so an unchanged
+    list is answered with a 304 without loading or serializing any row.
+
+    Args:
+        *models (Type): The TimestampedModel classes the list shows.
+
+    Returns:
+        Callable[..., str]: The function computing the ETag of a request.
+    """
+
+    def etag(request, *args, **kwargs) -> str:
+        parts = [request.get_full_path()]
+        for model in models:
+            state = model.objects.aggregate(
+                updated_at=Max("updated_at"), count=Count("pk")
+            )
+            parts.append(f"{model._meta.label}:{state['updated_at']}:{state['count']}")
+        return hashlib.md5("|".join(parts).encode(), usedforsecurity=False).hexdigest()
+
+    return etag
@@ -0,0 +1,303 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from celery import current_app
+from dispatcher.benchmark.load import LoadGenerator, summarize
+from dispatcher.benchmark.stubs import (
+    Recorder,
+    SlackStub,
+    SMTPSink,
+    TelegramStub,
+    marker,
+)
+from dispatcher.models import Notification, Topic
+from dispatcher.ratelimit import rate_limiter
+from dispatcher.routing import routing_table
+from dispatcher.services.slack import SlackService
+from dispatcher.services.telegram import TelegramService
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+import json
+import os
+import requests
+import threading
+import time
+import uuid
+
+ENDPOINTS = {
+    "sync": "/api/dispatcher/resolve/",
+    "async": "/api/dispatcher/resolve/async/",
+    "lean": "/api/dispatcher/ingest/",
+}
+
+CONFIGS = {
+    Notification.TELEGRAM: {"chat_id": "benchmark"},
+    Notification.SLACK: {"channel": "#benchmark"},
+    Notification.EMAIL: {"recipient_list": ["benchmark@example.com"]},
+}
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def cpu_timed(app, samples):
+    """
+    Wraps a WSGI app to record the CPU time its thread spends on each request,
+    which leaves out the load generator and the stubs sharing the process.
+    """
+
+    def timed_app(environ, start_response):
+        started = time.thread_time()
+        try:
+            return app(environ, start_response)
+        finally:
+            samples.append(time.thread_time() - started)
+
+    return timed_app
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives /resolve/ at a fixed rate against local stub providers and "
+        "reports ingest latency, end-to-end delivery latency and throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=float, default=50, help="Requests/s.")
+        parser.add_argument(
+            "--duration", type=float, default=10, help="Seconds to send for."
+        )
+        parser.add_argument(
+            "--methods",
+            default=",".join(CONFIGS),
+            help="Comma separated notification methods of the benchmark topic.",
+        )
+        parser.add_argument(
+            "--provider-latency",
+            type=float,
+            default=0.05,
+            help="Seconds the stub providers take to answer.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=64, help="Requests in flight."
+        )
+        parser.add_argument(
+            "--eager",
+            action="store_true",
+            help="Deliver inside the request instead of through the broker.",
+        )
+        parser.add_argument(
+            "--no-rate-limits",
+            action="store_true",
+            help="Disable the provider rate limits of this process.",
+        )
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running API. By default it is served in-process.",
+        )
+        parser.add_argument(
+            "--endpoint",
+            choices=sorted(ENDPOINTS),
+            default="sync",
+            help="Resolve view to drive. Compare them under the server profiles "
+            "with --url.",
+        )
+        parser.add_argument(
+            "--drain-timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait for deliveries after the last request.",
+        )
+        parser.add_argument("--json", action="store_true", help="Output JSON.")
+
+    def handle(self, *args, **options):
+        methods = [method.strip() for method in options["methods"].split(",")]
+        unknown = set(methods) - set(CONFIGS)
+        if unknown:
+            raise CommandError(f"Unknown methods: {', '.join(sorted(unknown))}")
+
+        recorder = Recorder()
+        latency = options["provider_latency"]
+        stubs = [
+            TelegramStub(recorder, latency).start(),
+            SlackStub(recorder, latency).start(),
+            SMTPSink(recorder, latency).start(),
+        ]
+        telegram, slack, smtp = stubs
+        environment = {
+            "TELEGRAM_API_URL": f"{telegram.url}/bot",
+            "SLACK_API_URL": f"{slack.url}/api/",
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": str(smtp.port),
+            "EMAIL_USE_TLS": "False",
+        }
+        os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+        os.environ.setdefault("SLACK_API_TOKEN", "benchmark")
+        if not options["eager"]:
+            self.stderr.write(
+                "Deliveries go through the broker. Start the workers with:\n"
+                + "".join(f"  {key}={value}\n" for key, value in environment.items())
+            )
+        # Process state changed for the run, restored afterwards
+        saved = (
+            TelegramService.BASE_URL,
+            SlackService.BASE_URL,
+            current_app.conf.task_always_eager,
+            rate_limiter.limits,
+        )
+        TelegramService.BASE_URL = environment["TELEGRAM_API_URL"]
+        SlackService.BASE_URL = environment["SLACK_API_URL"]
+        current_app.conf.task_always_eager = options["eager"]
+        if options["no_rate_limits"]:
+            rate_limiter.limits = {}
+
+        email_settings = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=smtp.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        )
+        run_id = uuid.uuid4().hex[:8]
+        notifications = [
+            Notification.objects.create(method=method, config=CONFIGS[method])
+            for method in methods
+        ]
+        topic = Topic.objects.create(
+            name=f"benchmark-{run_id}",
+            description="Benchmark topic",
+            notification=notifications[0],
+        )
+        topic.additional_notifications.set(notifications[1:])
+        server = None
+        cpu = []
+        try:
+            with email_settings:
+                url = options["url"]
+                if not url:
+                    routing_table.warm()
+                    server = make_server(
+                        "127.0.0.1",
+                        0,
+                        cpu_timed(get_wsgi_application(), cpu),
+                        server_class=ThreadingWSGIServer,
+                        handler_class=QuietWSGIRequestHandler,
+                    )
+                    threading.Thread(target=server.serve_forever, daemon=True).start()
+                    url = f"http://127.0.0.1:{server.server_port}"
+                report = self.run(
+                    url, topic.name, run_id, len(methods), recorder, cpu, options
+                )
+        finally:
+            if server is not None:
+                server.shutdown()
+            for stub in stubs:
+                stub.stop()
+            (
+                TelegramService.BASE_URL,
+                SlackService.BASE_URL,
+                current_app.conf.task_always_eager,
+                rate_limiter.limits,
+            ) = saved
+            topic.delete()
+            Notification.objects.filter(
+                pk__in=[notification.pk for notification in notifications]
+            ).delete()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report)
+
+    def run(self, url, topic_name, run_id, targets, recorder, cpu, options):
+        endpoint = url.rstrip("/") + ENDPOINTS[options["endpoint"]]
+        local = threading.local()
+
+        def send(seq):
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            response = local.session.post(
+                endpoint,
+                json={"topic_id": topic_name, "description": marker(run_id, seq)},
+                timeout=30,
+            )
+            response.raise_for_status()
+
+        load = LoadGenerator(
+            send, options["rate"], options["duration"], options["concurrency"]
+        ).run()
+
+        expected = len(load.sent) * targets
+        deadline = time.monotonic() + options["drain_timeout"]
+        received = recorder.received(run_id)
+        while len(received) < expected and time.monotonic() < deadline:
+            time.sleep(0.1)
+            received = recorder.received(run_id)
+
+        first = min(load.scheduled.values(), default=0.0)
+        last = max((at for _, _, at in received), default=first)
+        delivery = [at - load.scheduled[seq] for seq, _, at in received]
+        by_provider = {}
+        for seq, provider, at in received:
+            by_provider.setdefault(provider, []).append(at - load.scheduled[seq])
+        return {
+            "endpoint": options["endpoint"],
+            "rate": options["rate"],
+            "duration": options["duration"],
+            "provider_latency_ms": options["provider_latency"] * 1000,
+            "requests": len(load.scheduled),
+            "errors": load.errors,
+            "ingest_per_second": round(len(load.sent) / load.elapsed, 2),
+            "ingest_latency_ms": summarize(load.latencies),
+            # Only measured when the API is served in-process
+            "server_cpu_ms": summarize(cpu) if cpu else None,
+            "expected_deliveries": expected,
+            "deliveries": len(received),
+            "messages_per_second": (
+                round(len(received) / (last - first), 2) if last > first else 0.0
+            ),
+            "delivery_latency_ms": summarize(delivery),
+            "providers": {
+                provider: summarize(latencies)
+                for provider, latencies in sorted(by_provider.items())
+            },
+        }
+
+    def write_report(self, report):
+        self.stdout.write(
+            f"{report['requests']} {report['endpoint']} requests at "
+            f"{report['rate']}/s for "
+            f"{report['duration']}s, {report['errors']} errors, "
+            f"{report['ingest_per_second']} accepted/s"
+        )
+        self.stdout.write(
+            f"{report['deliveries']}/{report['expected_deliveries']} deliveries, "
+            f"{report['messages_per_second']} messages/s"
+        )
+        if report["server_cpu_ms"]:
+            self.stdout.write(
+                f"{report['server_cpu_ms']['mean']} ms of server CPU per request"
+            )
+        rows = [
+            ("ingest", report["ingest_latency_ms"]),
+            ("delivery", report["delivery_latency_ms"]),
+            *report["providers"].items(),
+        ]
+        if report["server_cpu_ms"]:
+            rows.append(("server cpu", report["server_cpu_ms"]))
+        self.stdout.write(
+            f"{'latency (ms)':<14}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+        )
+        for name, summary in rows:
+            values = "".join(
+                f"{summary[p] if summary[p] is not None else '-':>10}"
+                for p in ("p50", "p95", "p99", "max")
+            )
+            self.stdout.write(f"{name:<14}{values}")
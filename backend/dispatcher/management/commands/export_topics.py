@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from dispatcher.bulk import export_topics
+from dispatcher.settings import BULK_EXPORT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Writes every topic and its notifications as NDJSON, one topic per line."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", "-o", help="File to write. By default the standard output."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BULK_EXPORT_CHUNK_SIZE,
+            help="Topics read from the database at a time.",
+        )
+
+    def handle(self, *args, **options):
+        lines = export_topics(options["chunk_size"])
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line.decode(), ending="")
+            return
+        exported = 0
+        with open(options["output"], "wb") as f:
+            for line in lines:
+                f.write(line)
+                exported += 1
+        self.stderr.write(f"{exported} topics written to {options['output']}")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from dispatcher.bulk import import_topics
+from dispatcher.settings import BULK_IMPORT_BATCH_SIZE
+import sys
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates or updates topics from an NDJSON file, one topic per line, "
+        "such as the output of export_topics."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, - for the standard input.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BULK_IMPORT_BATCH_SIZE,
+            help="Lines written per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if path == "-":
+            report = import_topics(sys.stdin.buffer, options["batch_size"])
+        else:
+            try:
+                with open(path, "rb") as f:
+                    report = import_topics(f, options["batch_size"])
+            except OSError as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+
+        self.stdout.write(
+            f"{report.created} created, {report.updated} updated, "
+            f"{report.invalid} invalid"
+        )
+        for error in report.errors:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        if report.invalid:
+            raise CommandError(f"{report.invalid} lines were not imported")
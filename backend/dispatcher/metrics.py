@@ -0,0 +1,204 @@
+from dispatcher.settings import METRICS_ENABLED, METRICS_LATENCY_BUCKETS
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from contextlib import nullcontext
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# The metrics of this module. When PROMETHEUS_MULTIPROC_DIR is set before
+# prometheus_client is imported, as the entrypoints do for Gunicorn and Celery,
+# every process of a server writes its samples to files in that directory and
+# scrape_registry adds up the files of all of them.
+registry = CollectorRegistry()
+
+
+def multiprocess_mode() -> bool:
+    """
+    Returns True if the samples of this process are shared through files.
+    """
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class DisabledMetric:
+    """
+    Stands in for a counter or histogram when METRICS_ENABLED is False, so
+    recording a sample costs nothing and writes no multiprocess file.
+    """
+
+    def labels(self, *args: Any, **kwargs: Any) -> "DisabledMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def observe(self, amount: float) -> None:
+        pass
+
+    def time(self) -> nullcontext:
+        return nullcontext()
+
+
+def counter(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    enabled: bool = METRICS_ENABLED,
+) -> Union[Counter, DisabledMetric]:
+    """
+    Returns a counter of the registry, or a no-op one if metrics are disabled.
+    """
+    if not enabled:
+        return DisabledMetric()
+    return Counter(name, documentation, labelnames, registry=registry)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    enabled: bool = METRICS_ENABLED,
+) -> Union[Histogram, DisabledMetric]:
+    """
+    Returns a latency histogram of the registry, or a no-op one if metrics are
+    disabled.
+    """
+    if not enabled:
+        return DisabledMetric()
+    return Histogram(
+        name,
+        documentation,
+        labelnames,
+        buckets=METRICS_LATENCY_BUCKETS,
+        registry=registry,
+    )
+
+
+class QueueCollector(Collector):
+    """
+    Gauges of the delivery queues, read from the broker on every scrape.
+    """
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        depth = GaugeMetricFamily(
+            "dispatcher_queue_depth",
+            "Tasks waiting in each delivery queue.",
+            labels=["queue"],
+        )
+        latency = GaugeMetricFamily(
+            "dispatcher_queue_latency_seconds",
+            "Moving average of the time tasks wait in each delivery queue.",
+            labels=["queue"],
+        )
+        try:
+            status = _queue_status()
+        except Exception as e:
+            logger.error(f"Error collecting the queue metrics: {e}")
+            status = []
+        for queue in status:
+            if queue["depth"] is not None:
+                depth.add_metric([queue["queue"]], queue["depth"])
+            if queue["latency"] is not None:
+                latency.add_metric([queue["queue"]], queue["latency"])
+        yield depth
+        yield latency
+
+
+def scrape_registry() -> CollectorRegistry:
+    """
+    Returns the registry to expose: the samples of every process of the server
+    in multiprocess mode, otherwise those of this process.
+    """
+    if not multiprocess_mode():
+        return registry
+    scraped = CollectorRegistry()
+    multiprocess.MultiProcessCollector(scraped)
+    scraped.register(queue_collector)
+    return scraped
+
+
+def render() -> bytes:
+    """
+    Renders every metric in the Prometheus text exposition format.
+
+    Returns:
+        bytes: The metrics.
+    """
+    return generate_latest(scrape_registry())
+
+
+def serve(port: int, host: str = "0.0.0.0") -> None:
+    """
+    Serves the metrics over HTTP from a background thread, for processes
+    without the API, e.g. the main process of a Celery worker.
+
+    Args:
+        port (int): The port to listen on.
+        host (str): The interface to listen on.
+    """
+    start_http_server(port, addr=host, registry=scrape_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drops the live samples of a server process that exited.
+
+    Args:
+        pid (int): The process ID.
+    """
+    if multiprocess_mode():
+        multiprocess.mark_process_dead(pid)
+
+
+def _queue_status() -> List[Dict[str, Any]]:
+    # Imported here, the queues module loads the models
+    from celery import current_app
+    from dispatcher.queues import queue_stats
+
+    return queue_stats.status(current_app)
+
+
+queue_collector = QueueCollector()
+registry.register(queue_collector)
+
+resolve_requests = counter(
+    "dispatcher_resolve_requests",
+    "Resolve requests by endpoint and response status.",
+    ["endpoint", "status"],
+)
+topic_lookup_seconds = histogram(
+    "dispatcher_topic_lookup_seconds",
+    "Time to look up the route of a topic.",
+)
+enqueue_seconds = histogram(
+    "dispatcher_enqueue_seconds",
+    "Time to enqueue the deliveries of a request.",
+)
+send_seconds = histogram(
+    "dispatcher_send_seconds",
+    "Time a provider took to send a message, failed or not.",
+    ["method"],
+)
+deliveries = counter(
+    "dispatcher_deliveries",
+    "Delivery attempts by outcome. The retrying status counts retries.",
+    ["method", "status"],
+)
+failures = counter(
+    "dispatcher_failures",
+    "Failed delivery attempts by error class.",
+    ["method", "error"],
+)
@@ -4,12 +4,13 @@ from django.db import migrations
 def migrate_data(apps, schema_editor):
     Topic = apps.get_model("dispatcher", "Topic")
     Notification = apps.get_model("dispatcher", "Notification")
+    db_alias = schema_editor.connection.alias
 
     # Create Demo Sales Topic and Notification
-    sales = Topic.objects.create(
+    sales = Topic.objects.using(db_alias).create(
         name="Demo sales", description="This is a demo sales service"
     )
-    sales_notification = Notification.objects.create(
+    sales_notification = Notification.objects.using(db_alias).create(
         method="Email",
         config={"recipient_list": ["test@test.test", "test2@test.test"]},
     )
@@ -17,10 +18,10 @@ def migrate_data(apps, schema_editor):
     sales.save()
 
     # Create Demo Pricing Topic and Notification
-    pricing = Topic.objects.create(
+    pricing = Topic.objects.using(db_alias).create(
         name="Demo pricing", description="This is a demo pricing service"
     )
-    pricing_notification = Notification.objects.create(
+    pricing_notification = Notification.objects.using(db_alias).create(
         method="Slack",
         config={"channel": "#pricing"},
     )
@@ -28,10 +29,10 @@ def migrate_data(apps, schema_editor):
     pricing.save()
 
     # Create Demo HR Topic and Notification
-    human_resources = Topic.objects.create(
+    human_resources = Topic.objects.using(db_alias).create(
         name="Demo HR", description="This is a demo HR service"
     )
-    hr_notification = Notification.objects.create(
+    hr_notification = Notification.objects.using(db_alias).create(
         method="Telegram",
         config={"chat_id": "123456789"},
     )
@@ -41,8 +42,11 @@ def migrate_data(apps, schema_editor):
 
 def reverse_data(apps, schema_editor):
     Topic = apps.get_model("dispatcher", "Topic")
+    db_alias = schema_editor.connection.alias
 
-    topics = Topic.objects.filter(name__in=["Demo sales", "Demo pricing", "Demo HR"])
+    topics = Topic.objects.using(db_alias).filter(
+        name__in=["Demo sales", "Demo pricing", "Demo HR"]
+    )
     for topic in topics:
         if topic.notification:
             topic.notification.delete()
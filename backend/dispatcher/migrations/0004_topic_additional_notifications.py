@@ -0,0 +1,21 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dispatcher", "0003_topic_chatbot_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="topic",
+            name="additional_notifications",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="additional_topics",
+                to="dispatcher.notification",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dispatcher", "0004_topic_additional_notifications"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="topic",
+            name="digest_max_messages",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="topic",
+            name="digest_window",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def partition_delivery_log(apps, schema_editor):
+    """
+    Turns the delivery log into a table partitioned by day on created_at.
+
+    Only on PostgreSQL, 12 or later like Django itself. The daily partitions
+    are created after every migrate, and by the rotate_delivery_log task; until
+    then rows go to the default one.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("dispatcher", "NotificationDelivery")
+    table = model._meta.db_table
+    schema_editor.execute(f'ALTER TABLE "{table}" RENAME TO "{table}_old"')
+    schema_editor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{table}_old" INCLUDING DEFAULTS '
+        "INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)"
+    )
+    # Dropping the old table drops its identity sequence, freeing the name
+    schema_editor.execute(f'DROP TABLE "{table}_old"')
+    # What identity columns of partitioned tables support depends on the
+    # PostgreSQL version, so the id comes from a sequence owned by the column
+    schema_editor.execute(f'CREATE SEQUENCE "{table}_id_seq" AS bigint')
+    schema_editor.execute(
+        f'ALTER TABLE "{table}" ALTER COLUMN id '
+        f"SET DEFAULT nextval('\"{table}_id_seq\"')"
+    )
+    schema_editor.execute(f'ALTER SEQUENCE "{table}_id_seq" OWNED BY "{table}".id')
+    # The partition key must be part of the primary key
+    schema_editor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, created_at)')
+    for sql in schema_editor._model_indexes_sql(model):
+        schema_editor.execute(sql)
+    schema_editor.execute(
+        f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT'
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dispatcher", "0005_topic_digest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("Email", "Email"),
+                            ("Slack", "Slack"),
+                            ("Telegram", "Telegram"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("sent", "Sent"),
+                            ("retrying", "Retrying"),
+                            ("failed", "Failed"),
+                            ("deferred", "Deferred"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("attempt", models.PositiveSmallIntegerField(default=1)),
+                ("latency_ms", models.PositiveIntegerField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "topic",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="deliveries",
+                        to="dispatcher.topic",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["topic", "created_at"],
+                        name="dispatcher__topic_i_6c380c_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(partition_delivery_log, migrations.RunPython.noop),
+    ]
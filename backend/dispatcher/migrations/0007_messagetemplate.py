@@ -0,0 +1,57 @@
+# Generated by Django 4.2.1 on 2026-10-18 13:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dispatcher", "0006_notificationdelivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "method",
+                    models.CharField(
+                        choices=[
+                            ("Email", "Email"),
+                            ("Slack", "Slack"),
+                            ("Telegram", "Telegram"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                ("subject", models.TextField(blank=True, default="")),
+                ("body", models.TextField()),
+                ("version", models.PositiveIntegerField(default=1, editable=False)),
+                (
+                    "topic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="templates",
+                        to="dispatcher.topic",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="messagetemplate",
+            constraint=models.UniqueConstraint(
+                fields=("topic", "method"), name="unique_topic_method_template"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.1 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dispatcher", "0007_messagetemplate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="topic",
+            name="quiet_hours_end",
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="topic",
+            name="quiet_hours_start",
+            field=models.TimeField(blank=True, null=True),
+        ),
+    ]
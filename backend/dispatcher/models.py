@@ -1,8 +1,12 @@
 from django.db import models
+from django.template import TemplateSyntaxError
+from django.utils import timezone
 from backend.utils.django.models.mixins import TimestampedModel
 from dispatcher.services.telegram import TelegramService
 from dispatcher.services.slack import SlackService
 from dispatcher.services.email import EmailService
+from dispatcher.services.validators import validator_registry
+from dispatcher.templating import CompiledTemplate
 
 
 class Notification(TimestampedModel):
@@ -28,8 +32,9 @@ class Notification(TimestampedModel):
         return self.method
 
     def validate(self, instance):
+        # compiled validator, without building the service and its clients
         service = instance.get_service()
-        if not service().validate(**instance.config):
+        if not validator_registry.validate(service.validator_class, instance.config):
             raise ValueError("Invalid notification data")
 
     def save(self, *args, **kwargs):
@@ -37,11 +42,15 @@ class Notification(TimestampedModel):
         super().save(*args, **kwargs)
 
     def get_service(self):
-        if self.method == Notification.TELEGRAM:
+        return Notification.service_for(self.method)
+
+    @staticmethod
+    def service_for(method: str):
+        if method == Notification.TELEGRAM:
             return TelegramService
-        elif self.method == Notification.SLACK:
+        elif method == Notification.SLACK:
             return SlackService
-        elif self.method == Notification.EMAIL:
+        elif method == Notification.EMAIL:
             return EmailService
         else:
             raise NotImplementedError
@@ -56,13 +65,131 @@ class Topic(TimestampedModel):
         related_name="topic",
         null=True,
     )
+    # extra notification targets, each one delivered and retried independently
+    additional_notifications = models.ManyToManyField(
+        Notification,
+        related_name="additional_topics",
+        blank=True,
+    )
     # reference to the chatbot token on a secure storage
     chatbot_token = models.CharField(max_length=255, null=True)
+    # opt-in digest mode: messages are buffered and delivered together at most
+    # digest_window seconds after the first one, or once digest_max_messages arrive
+    digest_window = models.PositiveIntegerField(null=True, blank=True)
+    digest_max_messages = models.PositiveIntegerField(null=True, blank=True)
+    # messages arriving between these local times are held until the end of
+    # them, unless they are high priority
+    quiet_hours_start = models.TimeField(null=True, blank=True)
+    quiet_hours_end = models.TimeField(null=True, blank=True)
+
+    def validate(self):
+        if self.digest_max_messages and not self.digest_window:
+            raise ValueError("A digest needs a digest_window to cap its messages")
+
+    def save(self, *args, **kwargs):
+        self.validate()
+        super().save(*args, **kwargs)
 
     @property
     def secure_storage_token(self):
         # mock the retrieval of the chatbot token
         return self.chatbot_token
 
+    @property
+    def targets(self):
+        # main notification first, then the additional ones without duplicates
+        targets = [self.notification] if self.notification else []
+        for notification in self.additional_notifications.all():
+            if notification.pk not in {target.pk for target in targets}:
+                targets.append(notification)
+        return targets
+
     def __str__(self):
         return f"{self.name} - {self.notification}"
+
+
+class MessageTemplate(TimestampedModel):
+    """
+    How a topic's messages are written for one notification method.
+
+    Body and subject are Django templates rendered with the message and the
+    topic fields, e.g. "<b>{{ topic.name }}</b>: {{ message }}" for Telegram.
+    The subject is only used by email.
+    """
+
+    topic = models.ForeignKey(
+        Topic,
+        on_delete=models.CASCADE,
+        related_name="templates",
+    )
+    method = models.CharField(max_length=255, choices=Notification.METHOD_CHOICES)
+    subject = models.TextField(blank=True, default="")
+    body = models.TextField()
+    # bumped on every change, compiled templates are cached by it
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["topic", "method"], name="unique_topic_method_template"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.topic_id} - {self.method}"
+
+    def validate(self):
+        if self.subject and self.method != Notification.EMAIL:
+            raise ValueError("Only email templates have a subject")
+        try:
+            CompiledTemplate(self.body, self.subject)
+        except TemplateSyntaxError as e:
+            raise ValueError(f"Invalid template: {e}")
+
+    def save(self, *args, **kwargs):
+        self.validate()
+        if self.pk is not None:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+
+class NotificationDelivery(models.Model):
+    """
+    Log of every attempt to deliver a message to a notification target.
+
+    On PostgreSQL the table is partitioned by day on created_at, so old rows are
+    removed by dropping whole partitions. See dispatcher.partitions.
+    """
+
+    SENT = "sent"
+    RETRYING = "retrying"
+    FAILED = "failed"
+    DEFERRED = "deferred"
+
+    STATUS_CHOICES = [
+        (SENT, "Sent"),
+        (RETRYING, "Retrying"),
+        (FAILED, "Failed"),
+        (DEFERRED, "Deferred"),
+    ]
+
+    # no database constraint, so logs outlive their topic and the partitioned
+    # table needs no foreign key
+    topic = models.ForeignKey(
+        Topic,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="deliveries",
+    )
+    method = models.CharField(max_length=255, choices=Notification.METHOD_CHOICES)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES)
+    attempt = models.PositiveSmallIntegerField(default=1)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["topic", "created_at"])]
+
+    def __str__(self):
+        return f"{self.topic_id} - {self.method} - {self.status}"
@@ -0,0 +1,137 @@
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    connection,
+    connections,
+    transaction,
+)
+from django.utils import timezone
+from dispatcher.models import NotificationDelivery
+from dispatcher.settings import (
+    DELIVERY_LOG_PARTITIONS_AHEAD,
+    DELIVERY_LOG_RETENTION_DAYS,
+)
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+TABLE = NotificationDelivery._meta.db_table
+
+
+def is_partitioned(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """
+    Tells whether the delivery log is a partitioned PostgreSQL table.
+
+    Args:
+        using (str): The database alias.
+
+    Returns:
+        bool: True if old rows are removed by dropping partitions.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_name(day: date) -> str:
+    return f"{TABLE}_p{day:%Y%m%d}"
+
+
+def ensure_partitions(
+    days_ahead: int = DELIVERY_LOG_PARTITIONS_AHEAD,
+    today: Optional[date] = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> List[str]:
+    """
+    Creates the daily partitions of the delivery log from today up to some days
+    ahead, so rows never land in the default partition.
+
+    Args:
+        days_ahead (int): Number of days after today to create partitions for.
+        today (Optional[date]): The current UTC day.
+        using (str): The database alias.
+
+    Returns:
+        List[str]: The names of the partitions created.
+    """
+    if not is_partitioned(using):
+        return []
+
+    connection = connections[using]
+    today = today or timezone.now().date()
+    existing = set(_partitions(using))
+    created = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = partition_name(day)
+        if name in existing:
+            continue
+        try:
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" '
+                    "FOR VALUES FROM (%s) TO (%s)",
+                    [_day_start(day), _day_start(day + timedelta(days=1))],
+                )
+            created.append(name)
+        except DatabaseError as e:
+            # The default partition already holds rows of that day
+            logger.error(f"Could not create partition {name}: {e}")
+    return created
+
+
+def purge_delivery_log(
+    retention_days: int = DELIVERY_LOG_RETENTION_DAYS, today: Optional[date] = None
+) -> None:
+    """
+    Removes the delivery log rows older than the retention period.
+
+    On PostgreSQL whole daily partitions are dropped, which is instant and
+    leaves no dead tuples behind. Elsewhere the rows are deleted.
+
+    Args:
+        retention_days (int): Number of days rows are kept for.
+        today (Optional[date]): The current UTC day.
+    """
+    today = today or timezone.now().date()
+    cutoff = today - timedelta(days=retention_days)
+    if not is_partitioned():
+        NotificationDelivery.objects.filter(created_at__lt=_day_start(cutoff)).delete()
+        return
+
+    for name in _partitions():
+        if name < partition_name(cutoff):
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE "{name}"')
+            logger.info(f"Dropped delivery log partition {name}")
+    # Only rows written before their day's partition existed are in here
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM "{TABLE}_default" WHERE created_at < %s', [_day_start(cutoff)]
+        )
+
+
+def _partitions(using: str = DEFAULT_DB_ALIAS) -> List[str]:
+    # Daily partitions only, the default partition is never dropped
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND c.relname LIKE %s ORDER BY c.relname",
+            [TABLE, f"{TABLE}_p%"],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
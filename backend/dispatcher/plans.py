@@ -0,0 +1,179 @@
+from dispatcher.models import Topic
+from dispatcher.routing import RouteTarget, TopicRoute, routing_table
+from dispatcher.settings import DELIVERY_PLAN_SCHEMA_VERSION
+from dispatcher.templating import TemplateSource
+import dataclasses
+from typing import Any, Dict, List, Optional
+
+
+@dataclasses.dataclass(frozen=True)
+class DeliveryPlan:
+    """
+    Self-contained description of how to deliver a topic's messages to one of its
+    notification targets.
+
+    Plans are built on the web side and travel in the task message, so workers
+    only query the database when the routing version a plan was built at is no
+    longer current.
+    """
+
+    topic: int
+    notification: int
+    method: str
+    config: Dict[str, Any]
+    config_version: Optional[int] = None
+    template: Optional[TemplateSource] = None
+    # topic fields the template is rendered with, only carried with a template
+    context: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def for_target(
+        cls,
+        route: TopicRoute,
+        target: RouteTarget,
+        config_version: Optional[int] = None,
+    ) -> "DeliveryPlan":
+        """
+        Builds the plan for one notification target of a topic.
+
+        Args:
+            route (TopicRoute): The topic route.
+            target (RouteTarget): The notification target.
+            config_version (Optional[int]): The routing version the target was
+                loaded at.
+
+        Returns:
+            DeliveryPlan: The plan for the target.
+        """
+        context = None
+        if target.template is not None:
+            context = {"name": route.name, "description": route.description}
+        return cls(
+            topic=route.pk,
+            notification=target.notification,
+            method=target.method,
+            config=target.config,
+            config_version=config_version,
+            template=target.template,
+            context=context,
+        )
+
+    @classmethod
+    def for_route(cls, route: TopicRoute) -> List["DeliveryPlan"]:
+        """
+        Builds the plans for every notification target of a routing table entry.
+
+        Args:
+            route (TopicRoute): The topic route.
+
+        Returns:
+            List[DeliveryPlan]: One plan per target, empty if the topic has no
+                notification method.
+        """
+        return [
+            cls.for_target(route, target, route.version) for target in route.targets
+        ]
+
+    @classmethod
+    def from_topic(
+        cls, topic: Topic, notification: Optional[int] = None
+    ) -> Optional["DeliveryPlan"]:
+        """
+        Builds the plan for a topic with its notifications and templates
+        already loaded.
+
+        Args:
+            topic (Topic): The topic instance.
+            notification (Optional[int]): The pk of the target notification.
+                Defaults to the main notification of the topic.
+
+        Returns:
+            Optional[DeliveryPlan]: The plan, or None if the topic does not have
+                that notification target.
+        """
+        route = TopicRoute.from_topic(topic)
+        for target in route.targets:
+            if notification is None or target.notification == notification:
+                return cls.for_target(route, target)
+        return None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["DeliveryPlan"]:
+        """
+        Reads a plan from a task message.
+
+        Args:
+            data (Optional[Dict[str, Any]]): The serialized plan.
+
+        Returns:
+            Optional[DeliveryPlan]: The plan, or None if there is no plan or it
+                was written in another format version.
+        """
+        if not data or data.get("v") != DELIVERY_PLAN_SCHEMA_VERSION:
+            return None
+        template = data.get("template")
+        return cls(
+            topic=data["topic"],
+            notification=data["notification"],
+            method=data["method"],
+            config=data["config"],
+            config_version=data.get("config_version"),
+            template=TemplateSource(**template) if template else None,
+            context=data.get("context"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the plan for a task message.
+
+        Returns:
+            Dict[str, Any]: The JSON-serializable plan.
+        """
+        return {"v": DELIVERY_PLAN_SCHEMA_VERSION, **dataclasses.asdict(self)}
+
+
+def resolve_plans(deliveries: List[Dict[str, Any]]) -> List[Optional[DeliveryPlan]]:
+    """
+    Returns the up-to-date plan of each delivery.
+
+    Plans still at the current routing version are used as they are. The topics
+    of missing or stale plans are loaded together, so the database is hit once
+    per relation whatever the number of deliveries.
+
+    Args:
+        deliveries (List[Dict[str, Any]]): Items with the Topic 'pk' and,
+            optionally, the serialized 'plan'. Items without a plan are
+            delivered to the main notification of the topic.
+
+    Returns:
+        List[Optional[DeliveryPlan]]: The plan of each delivery, in order, or
+            None if its topic does not exist or no longer has that target.
+    """
+    version = routing_table.current_version()
+    plans = [DeliveryPlan.from_dict(delivery.get("plan")) for delivery in deliveries]
+    stale = {
+        delivery["pk"]
+        for delivery, plan in zip(deliveries, plans)
+        if plan is None or version is None or plan.config_version != version
+    }
+    if not stale:
+        return plans
+
+    topics = (
+        Topic.objects.select_related("notification")
+        .prefetch_related("additional_notifications", "templates")
+        .in_bulk(stale)
+    )
+    resolved = []
+    for delivery, plan in zip(deliveries, plans):
+        pk = delivery["pk"]
+        if pk in stale:
+            topic = topics.get(pk)
+            notification = plan.notification if plan is not None else None
+            plan = (
+                DeliveryPlan.from_topic(topic, notification)
+                if topic is not None
+                else None
+            )
+        resolved.append(plan)
+    return resolved
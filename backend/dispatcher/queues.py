@@ -0,0 +1,221 @@
+from backend.utils.redis import get_redis
+from dispatcher.models import Notification
+from dispatcher.settings import (
+    DEFAULT_QUEUE,
+    PRIORITY_NORMAL,
+    PRIORITY_LANES,
+    QUEUE_STATS_KEY_PREFIX,
+    QUEUE_LATENCY_SMOOTHING,
+)
+from datetime import datetime
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEND_TASKS = (
+    "dispatcher.tasks.sending.send_notification",
+    "dispatcher.tasks.sending.send_notification_batch",
+)
+
+# Records a wait of ARGV[1] seconds, moving the average towards it by the
+# weight in ARGV[2], in one step so concurrent workers do not lose updates
+RECORD_WAIT_SCRIPT = """
+local wait = tonumber(ARGV[1])
+local latency = tonumber(redis.call("HGET", KEYS[1], "latency")) or wait
+latency = latency + tonumber(ARGV[2]) * (wait - latency)
+redis.call("HSET", KEYS[1], "latency", latency, "last_latency", wait)
+redis.call("HINCRBY", KEYS[1], "tasks", 1)
+"""
+
+
+def queue_for(method: Optional[str]) -> str:
+    """
+    Returns the queue the deliveries of a notification method are sent on, so a
+    backlog of one provider does not delay the others.
+
+    Args:
+        method (Optional[str]): The notification method.
+
+    Returns:
+        str: The queue name.
+    """
+    return method.lower() if method else DEFAULT_QUEUE
+
+
+def delivery_options(
+    method: Optional[str], priority: Optional[str] = PRIORITY_NORMAL
+) -> Dict[str, Any]:
+    """
+    Returns the Celery routing options of a delivery.
+
+    Args:
+        method (Optional[str]): The notification method.
+        priority (Optional[str]): The priority lane of the message.
+
+    Returns:
+        Dict[str, Any]: The queue and message priority.
+    """
+    return {
+        "queue": queue_for(method),
+        "priority": PRIORITY_LANES.get(priority, PRIORITY_LANES[PRIORITY_NORMAL]),
+    }
+
+
+def route_task(name, args, kwargs, options, task=None, **kw) -> Optional[Dict]:
+    """
+    Celery task router sending every delivery, including retries and deferrals,
+    to the queue of its notification method and the lane of its priority.
+
+    Returns:
+        Optional[Dict]: The routing options, or None to use the default queue.
+    """
+    if name not in SEND_TASKS:
+        return None
+    if name == SEND_TASKS[1]:
+        # The deliveries of a batch may be passed positionally
+        deliveries = kwargs.get("deliveries") if kwargs else None
+        if deliveries is None and args:
+            deliveries = args[0]
+        if not deliveries:
+            return None
+        delivery = deliveries[0]
+    elif kwargs:
+        delivery = kwargs
+    else:
+        return None
+    plan = delivery.get("plan") or {}
+    return delivery_options(plan.get("method"), delivery.get("priority"))
+
+
+class QueueStats:
+    """
+    Observed state of the delivery queues, to size the workers of each provider.
+
+    Workers record how long every task waited in its queue, from the moment it
+    was due until it started. The stats live in a Redis hash per queue, updated
+    atomically by a Lua script, so the updates of concurrent workers are not
+    lost. Without Redis (e.g. in tests) they are kept in process. The depth is
+    read from the broker on demand.
+    """
+
+    def __init__(
+        self,
+        key_prefix: str = QUEUE_STATS_KEY_PREFIX,
+        smoothing: float = QUEUE_LATENCY_SMOOTHING,
+    ) -> None:
+        """
+        Initializes the stats.
+
+        Args:
+            key_prefix (str): Prefix of the cache keys of the stats.
+            smoothing (float): Weight of the latest wait in the moving average.
+        """
+        self.key_prefix = key_prefix
+        self.smoothing = smoothing
+        self._script = None
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record_wait(self, queue: str, wait: float) -> None:
+        """
+        Records how long a task waited in a queue.
+
+        Args:
+            queue (str): The queue name.
+            wait (float): Seconds the task waited.
+        """
+        key = f"{self.key_prefix}:{queue}"
+        redis = get_redis()
+        if redis is None:
+            with self._lock:
+                stats = self._local.setdefault(key, {"latency": wait, "tasks": 0})
+                stats["latency"] += self.smoothing * (wait - stats["latency"])
+                stats["last_latency"] = wait
+                stats["tasks"] += 1
+            return
+        if self._script is None:
+            self._script = redis.register_script(RECORD_WAIT_SCRIPT)
+        self._script(keys=[key], args=[wait, self.smoothing])
+
+    def status(self, app) -> List[Dict[str, Any]]:
+        """
+        Returns the depth and latency of every delivery queue.
+
+        Args:
+            app (celery.Celery): The Celery app, to read depths from its broker.
+
+        Returns:
+            List[Dict[str, Any]]: The stats of each queue.
+        """
+        queues = [queue_for(method) for method, _ in Notification.METHOD_CHOICES]
+        queues.append(DEFAULT_QUEUE)
+        stats = self._read([f"{self.key_prefix}:{queue}" for queue in queues])
+        depths = self.depths(app, queues)
+        return [
+            {
+                "queue": queue,
+                "depth": depths.get(queue),
+                "latency": None,
+                "last_latency": None,
+                "tasks": 0,
+                **queue_stats,
+            }
+            for queue, queue_stats in zip(queues, stats)
+        ]
+
+    def _read(self, keys: List[str]) -> List[Dict[str, Any]]:
+        redis = get_redis()
+        if redis is None:
+            with self._lock:
+                return [dict(self._local.get(key, {})) for key in keys]
+        with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(key)
+            hashes = pipe.execute()
+        return [
+            {
+                name.decode(): int(value) if name == b"tasks" else float(value)
+                for name, value in stats.items()
+            }
+            for stats in hashes
+        ]
+
+    @staticmethod
+    def depths(app, queues: List[str]) -> Dict[str, Optional[int]]:
+        depths = {}
+        try:
+            with app.connection_for_read() as connection:
+                connection.ensure_connection(max_retries=1)
+                channel = connection.default_channel
+                for queue in queues:
+                    try:
+                        declared = channel.queue_declare(queue=queue, passive=True)
+                        depths[queue] = declared.message_count
+                    except connection.channel_errors:
+                        # Never declared, no task was sent to it yet
+                        depths[queue] = 0
+        except Exception as e:
+            logger.error(f"Error reading queue depths: {e}")
+        return depths
+
+
+def ready_at(headers: Dict[str, Any]) -> float:
+    """
+    Returns when a task being published becomes due: now, or its ETA.
+
+    Args:
+        headers (Dict[str, Any]): The headers of the task message.
+
+    Returns:
+        float: The timestamp the task is due at.
+    """
+    eta = headers.get("eta")
+    if eta:
+        return datetime.fromisoformat(eta).timestamp()
+    return time.time()
+
+
+queue_stats = QueueStats()
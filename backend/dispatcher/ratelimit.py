@@ -0,0 +1,89 @@
+from backend.utils.redis import get_redis
+from dispatcher.settings import RATE_LIMITS, RATE_LIMIT_KEY_PREFIX
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Reserves one token and returns the seconds to wait until it is available.
+# Tokens may go negative so each caller gets its own slot instead of retrying.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - 1
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+redis.call("PEXPIRE", KEYS[1], math.ceil((wait + burst / rate) * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter per provider and destination.
+
+    Buckets live in Redis and are updated atomically by a Lua script, so every
+    worker shares them. Without Redis (e.g. in tests) buckets are kept in process.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[float, int]] = RATE_LIMITS,
+        key_prefix: str = RATE_LIMIT_KEY_PREFIX,
+    ) -> None:
+        """
+        Initializes the limiter.
+
+        Args:
+            limits (Dict[str, Tuple[float, int]]): Messages per second and burst
+                size for each notification method.
+            key_prefix (str): Prefix of the bucket keys.
+        """
+        self.limits = limits
+        self.key_prefix = key_prefix
+        self._script = None
+        self._local: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, method: str, destination: Optional[str]) -> float:
+        """
+        Reserves a slot to send one message.
+
+        Args:
+            method (str): The notification method.
+            destination (Optional[str]): The rate-limited destination, e.g. a
+                Slack channel. None means the delivery is not rate limited.
+
+        Returns:
+            float: Seconds to wait before sending, 0 if it can be sent now.
+        """
+        limit = self.limits.get(method)
+        if limit is None or destination is None:
+            return 0.0
+
+        rate, burst = limit
+        key = f"{self.key_prefix}:{method}:{destination}"
+        redis = get_redis()
+        if redis is None:
+            return self._reserve_local(key, rate, burst)
+        if self._script is None:
+            self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        return float(self._script(keys=[key], args=[rate, burst]))
+
+    def _reserve_local(self, key: str, rate: float, burst: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens, ts = self._local.get(key, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - ts) * rate) - 1
+            self._local[key] = (tokens, now)
+        return -tokens / rate if tokens < 0 else 0.0
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,141 @@
+from dispatcher.settings import (
+    NOTIFICATION_MAX_RETRIES,
+    NOTIFICATION_RETRY_BASE_DELAY,
+    NOTIFICATION_RETRY_MAX_DELAY,
+    SLACK_PERMANENT_ERRORS,
+)
+from slack_sdk.errors import SlackApiError
+from typing import Optional
+import aiohttp
+import random
+import requests
+import smtplib
+
+
+class RetryAfterError(Exception):
+    """
+    Raised when a provider rejects a message because of its rate limit and tells
+    how long to wait before sending it again.
+    """
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        """
+        Args:
+            message (str): The error message.
+            retry_after (float): Seconds to wait, as requested by the provider.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InvalidNotificationError(ValueError):
+    """
+    Raised by a service when a notification config is invalid or the provider
+    rejected its destination, so sending it again would fail the same way.
+    """
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed delivery is retried.
+
+    Transient errors are retried with exponential backoff and full jitter, so
+    deliveries that failed together do not retry together. A wait requested by
+    the provider takes precedence over the backoff. Permanent errors, such as an
+    invalid destination, are not retried.
+    """
+
+    def __init__(
+        self,
+        base_delay: float = NOTIFICATION_RETRY_BASE_DELAY,
+        max_delay: float = NOTIFICATION_RETRY_MAX_DELAY,
+        max_retries: int = NOTIFICATION_MAX_RETRIES,
+    ) -> None:
+        """
+        Initializes the policy.
+
+        Args:
+            base_delay (float): Upper bound in seconds of the first retry delay.
+            max_delay (float): Upper bound in seconds of any retry delay.
+            max_retries (int): Maximum number of retries of a delivery.
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+
+    def countdown(self, retries: int, exc: Exception) -> Optional[float]:
+        """
+        Computes the delay before retrying a failed delivery.
+
+        Args:
+            retries (int): Number of times the delivery was already retried.
+            exc (Exception): The error the delivery failed with.
+
+        Returns:
+            Optional[float]: Seconds to wait before the next attempt, or None if
+                the delivery must not be retried.
+        """
+        if retries >= self.max_retries or self.is_permanent(exc):
+            return None
+
+        retry_after = self.retry_after(exc)
+        if retry_after is not None:
+            # Spread the retries over one base delay past the requested wait
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retries))
+
+    @staticmethod
+    def is_permanent(exc: Exception) -> bool:
+        """
+        Tells whether an error will happen again however many times the delivery
+        is retried.
+
+        Args:
+            exc (Exception): The error the delivery failed with.
+
+        Returns:
+            bool: True if the delivery must not be retried.
+        """
+        if isinstance(exc, (InvalidNotificationError, smtplib.SMTPRecipientsRefused)):
+            # Invalid notification config, or a destination the provider rejected
+            return True
+        if isinstance(exc, SlackApiError):
+            return exc.response.get("error") in SLACK_PERMANENT_ERRORS
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            return _is_permanent_status(exc.response.status_code)
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return _is_permanent_status(exc.status)
+        return False
+
+    @staticmethod
+    def retry_after(exc: Exception) -> Optional[float]:
+        """
+        Returns the wait requested by the provider that rejected a delivery.
+
+        Args:
+            exc (Exception): The error the delivery failed with.
+
+        Returns:
+            Optional[float]: Seconds to wait, or None if the provider did not
+                request any.
+        """
+        if isinstance(exc, RetryAfterError):
+            return exc.retry_after
+        if isinstance(exc, SlackApiError) and exc.response.status_code == 429:
+            headers = {
+                name.lower(): value
+                for name, value in (exc.response.headers or {}).items()
+            }
+            try:
+                return float(headers["retry-after"])
+            except (KeyError, TypeError, ValueError):
+                return None
+        return None
+
+
+def _is_permanent_status(status_code: int) -> bool:
+    # Client errors are permanent, except timeouts and rate limits
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+retry_policy = RetryPolicy()
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from dispatcher.settings import (
+    REPLICA_PIN_KEY,
+    REPLICA_PIN_SECONDS,
+    REPLICA_PIN_MODELS,
+)
+import logging
+import random
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """
+    Database router sending the reads of the dispatcher models to the replicas
+    in settings.DATABASE_REPLICAS, and their writes to the primary. Without
+    replicas it leaves every query to the default database.
+
+    A route read from a lagging replica right after it changed would be kept by
+    the routing table and the delivery plans until the next change. Writes to
+    the route models therefore pin the reads of every process to the primary
+    for REPLICA_PIN_SECONDS after they commit, through a key in the shared
+    cache. Reads inside a transaction stay on the primary too.
+    """
+
+    def __init__(self) -> None:
+        # Until when this process knows the reads are pinned
+        self._pinned_until = 0.0
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label != "dispatcher":
+            return None
+        # Related rows are read from the database of the row they belong to
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if self.pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        if not settings.DATABASE_REPLICAS or model._meta.app_label != "dispatcher":
+            return None
+        if model._meta.label in REPLICA_PIN_MODELS:
+            # The replicas can only lag behind a write once it is committed,
+            # right away in autocommit mode
+            transaction.on_commit(self.pin, using=DEFAULT_DB_ALIAS)
+        # Rows read from a replica are saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # The replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints) -> Optional[bool]:
+        # Replicas get the schema from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+    def pin(self) -> None:
+        """
+        Sends the reads of every process to the primary for REPLICA_PIN_SECONDS.
+        """
+        now = time.time()
+        self._pinned_until = now + REPLICA_PIN_SECONDS
+        try:
+            cache.set(REPLICA_PIN_KEY, now, timeout=REPLICA_PIN_SECONDS)
+        except Exception as e:
+            logger.error(f"Replica pin failed: {e}")
+
+    def pinned(self) -> bool:
+        """
+        Returns True if reads must go to the primary.
+
+        Unless this process pinned them, every read asks the shared cache. The
+        check is not rate limited: a process that skipped it could load a stale
+        route into its routing table right after another one invalidated it,
+        and keep it. One cache get is cheap next to the query it routes.
+        """
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return True
+        now = time.time()
+        if now < self._pinned_until:
+            return True
+        try:
+            pinned_at = cache.get(REPLICA_PIN_KEY)
+        except Exception as e:
+            # Better a busier primary than a stale route
+            logger.error(f"Replica pin check failed: {e}")
+            return True
+        if pinned_at is None:
+            return False
+        self._pinned_until = pinned_at + REPLICA_PIN_SECONDS
+        return now < self._pinned_until
@@ -0,0 +1,260 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DatabaseError
+from dispatcher.models import Topic
+from dispatcher.settings import (
+    ROUTING_TABLE_VERSION_KEY,
+    ROUTING_TABLE_CHECK_INTERVAL,
+)
+from dispatcher.templating import TemplateSource
+import dataclasses
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class RouteTarget:
+    """
+    A notification a topic's messages are delivered to.
+    """
+
+    notification: int
+    method: str
+    config: Dict[str, Any]
+    # the topic's template for the method, None sends messages as they are
+    template: Optional[TemplateSource] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class TopicRoute:
+    """
+    Everything the dispatcher needs to know about a topic to deliver a message.
+    """
+
+    pk: int
+    name: str
+    description: str = ""
+    targets: Tuple[RouteTarget, ...] = ()
+    chatbot_token: Optional[str] = None
+    digest_window: Optional[int] = None
+    digest_max_messages: Optional[int] = None
+    quiet_hours_start: Optional[datetime.time] = None
+    quiet_hours_end: Optional[datetime.time] = None
+    version: Optional[int] = None
+
+    @classmethod
+    def from_topic(cls, topic: Topic, version: Optional[int] = None) -> "TopicRoute":
+        """
+        Builds a route from a topic with its notifications and templates
+        already loaded.
+
+        Args:
+            topic (Topic): The topic instance.
+            version (Optional[int]): The routing version the topic was loaded at.
+
+        Returns:
+            TopicRoute: The route for the topic.
+        """
+        templates = {
+            template.method: TemplateSource(
+                pk=template.pk,
+                version=template.version,
+                body=template.body,
+                subject=template.subject,
+            )
+            for template in topic.templates.all()
+        }
+        return cls(
+            pk=topic.pk,
+            name=topic.name,
+            description=topic.description,
+            targets=tuple(
+                RouteTarget(
+                    notification=notification.pk,
+                    method=notification.method,
+                    config=notification.config,
+                    template=templates.get(notification.method),
+                )
+                for notification in topic.targets
+            ),
+            chatbot_token=topic.chatbot_token,
+            digest_window=topic.digest_window,
+            digest_max_messages=topic.digest_max_messages,
+            quiet_hours_start=topic.quiet_hours_start,
+            quiet_hours_end=topic.quiet_hours_end,
+            version=version,
+        )
+
+
+class RoutingTable:
+    """
+    Process-local map of topic names to delivery routes.
+
+    The table is loaded with one query per relation and kept in memory. A version counter
+    stored in the shared cache (Redis) is bumped whenever a Topic or Notification
+    changes, so every web and worker process drops its copy on the next lookup.
+    """
+
+    def __init__(
+        self,
+        version_key: str = ROUTING_TABLE_VERSION_KEY,
+        check_interval: float = ROUTING_TABLE_CHECK_INTERVAL,
+    ) -> None:
+        """
+        Initializes an empty routing table.
+
+        Args:
+            version_key (str): Cache key holding the shared table version.
+            check_interval (float): Seconds to trust the local table before
+                comparing it with the shared version again.
+        """
+        self.version_key = version_key
+        self.check_interval = check_interval
+        self._routes: Optional[Dict[str, TopicRoute]] = None
+        self._version: Optional[int] = None
+        self._checked_at: float = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[int]:
+        """
+        The shared version the local table was loaded at.
+        """
+        return self._version
+
+    def get(self, name: str) -> TopicRoute:
+        """
+        Returns the route for a topic name.
+
+        Args:
+            name (str): The topic name.
+
+        Returns:
+            TopicRoute: The route for the topic.
+
+        Raises:
+            Topic.DoesNotExist: If there is no topic with that name.
+        """
+        try:
+            return self._get_routes()[name]
+        except KeyError:
+            raise Topic.DoesNotExist(f"No topic for {name}")
+
+    async def aget(self, name: str) -> TopicRoute:
+        """
+        Returns the route for a topic name from async code. A loaded, fresh
+        table is read without leaving the event loop, the version check and
+        reload run in a thread.
+
+        Args:
+            name (str): The topic name.
+
+        Returns:
+            TopicRoute: The route for the topic.
+
+        Raises:
+            Topic.DoesNotExist: If there is no topic with that name.
+        """
+        routes = self._routes
+        if routes is None or time.monotonic() - self._checked_at >= self.check_interval:
+            return await sync_to_async(self.get)(name)
+        try:
+            return routes[name]
+        except KeyError:
+            raise Topic.DoesNotExist(f"No topic for {name}")
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, TopicRoute]:
+        """
+        Returns the routes for several topic names at once.
+
+        Args:
+            names (Iterable[str]): The topic names.
+
+        Returns:
+            Dict[str, TopicRoute]: The routes found, keyed by topic name.
+                Unknown names are left out.
+        """
+        routes = self._get_routes()
+        return {name: routes[name] for name in set(names) if name in routes}
+
+    def load(self) -> Dict[str, TopicRoute]:
+        """
+        Loads every topic route from the database.
+
+        Returns:
+            Dict[str, TopicRoute]: The loaded routes keyed by topic name.
+        """
+        # Read the version before querying so a concurrent write is never missed
+        version = self.current_version()
+        topics = Topic.objects.select_related("notification").prefetch_related(
+            "additional_notifications", "templates"
+        )
+        routes = {topic.name: TopicRoute.from_topic(topic, version) for topic in topics}
+        with self._lock:
+            self._routes = routes
+            self._version = version
+            self._checked_at = time.monotonic()
+        logger.info(f"Routing table loaded with {len(routes)} topics (v{version})")
+        return routes
+
+    def warm(self) -> None:
+        """
+        Loads the table ahead of the first request, if the database is ready.
+        """
+        try:
+            self.load()
+        except DatabaseError as e:
+            logger.warning(f"Routing table warm-up skipped: {e}")
+
+    def invalidate(self) -> None:
+        """
+        Drops the local table and bumps the shared version so other processes
+        reload theirs.
+        """
+        with self._lock:
+            self._routes = None
+        try:
+            if not cache.add(self.version_key, 1, timeout=None):
+                cache.incr(self.version_key)
+        except Exception as e:
+            logger.error(f"Routing table version bump failed: {e}")
+
+    def _get_routes(self) -> Dict[str, TopicRoute]:
+        routes = self._routes
+        if routes is not None and not self._is_stale():
+            return routes
+        return self.load()
+
+    def _is_stale(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        version = self.current_version()
+        # Keep serving the local table when the shared cache is unreachable
+        return version is not None and version != self._version
+
+    def current_version(self) -> Optional[int]:
+        """
+        Reads the shared routing version.
+
+        Returns:
+            Optional[int]: The version, or None if the shared cache is unreachable.
+        """
+        try:
+            version = cache.get(self.version_key)
+            if version is None:
+                cache.add(self.version_key, 0, timeout=None)
+                version = cache.get(self.version_key, 0)
+            return version
+        except Exception as e:
+            logger.error(f"Routing table version check failed: {e}")
+            return None
+
+
+routing_table = RoutingTable()
@@ -0,0 +1,232 @@
+from backend.utils.redis import get_redis
+from django.utils import timezone
+from dispatcher.routing import TopicRoute
+from dispatcher.settings import (
+    PRIORITY_HIGH,
+    SCHEDULE_KEY,
+    SCHEDULE_BATCH_SIZE,
+    SCHEDULE_LEASE_SECONDS,
+)
+from datetime import datetime, timedelta
+import heapq
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Leases up to ARGV[2] members due at ARGV[1] by scoring them at the lease
+# deadline in ARGV[3], so concurrent pollers do not release the same delivery
+# while it is published. Returns them with their send times.
+LEASE_DUE_SCRIPT = """
+local due = redis.call(
+    "ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "WITHSCORES", "LIMIT", 0, ARGV[2]
+)
+for i = 1, #due, 2 do
+    redis.call("ZADD", KEYS[1], "XX", ARGV[3], due[i])
+end
+return due
+"""
+
+
+def deliver_at(
+    route: TopicRoute,
+    send_at: Optional[datetime] = None,
+    priority: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """
+    Returns when the messages of a topic should be delivered, pushing them past
+    the quiet hours of the topic. High priority messages ignore quiet hours.
+
+    Args:
+        route (TopicRoute): The topic route.
+        send_at (Optional[datetime]): When the sender asked the message to be
+            delivered, None for now.
+        priority (Optional[str]): The priority lane of the message.
+        now (Optional[datetime]): The current time, for tests.
+
+    Returns:
+        Optional[datetime]: When to deliver the message, or None to deliver it
+            right away.
+    """
+    now = now or timezone.now()
+    due = send_at if send_at is not None and send_at > now else now
+    if priority != PRIORITY_HIGH:
+        due = _after_quiet_hours(route, due)
+    return due if due > now else None
+
+
+def _after_quiet_hours(route: TopicRoute, due: datetime) -> datetime:
+    start, end = route.quiet_hours_start, route.quiet_hours_end
+    if start is None or end is None or start == end:
+        return due
+    local = timezone.localtime(due)
+    clock = local.time()
+    # Quiet hours may wrap around midnight, e.g. from 22:00 to 08:00
+    quiet = start <= clock < end if start < end else clock >= start or clock < end
+    if not quiet:
+        return due
+    resume = local.replace(
+        hour=end.hour, minute=end.minute, second=end.second, microsecond=0
+    )
+    if resume <= local:
+        resume += timedelta(days=1)
+    return resume
+
+
+class Scheduler:
+    """
+    Deliveries waiting for their send time.
+
+    Deliveries are kept in a Redis sorted set scored by their due timestamp,
+    instead of as Celery countdowns held in worker memory and redelivered on
+    restart. A poller moves the due ones to the delivery queues in batches.
+    A batch stays in the set, leased for lease_seconds, until it is published,
+    so a poller that dies meanwhile only delays it. Without Redis (e.g. in
+    tests) they are kept in process.
+    """
+
+    def __init__(
+        self,
+        key: str = SCHEDULE_KEY,
+        batch_size: int = SCHEDULE_BATCH_SIZE,
+        lease_seconds: float = SCHEDULE_LEASE_SECONDS,
+    ) -> None:
+        """
+        Initializes the scheduler.
+
+        Args:
+            key (str): Key of the sorted set.
+            batch_size (int): Maximum number of deliveries released at once.
+            lease_seconds (float): Seconds a batch being published is held back
+                from other pollers.
+        """
+        self.key = key
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self._script = None
+        self._local: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def schedule(self, deliveries: List[Dict[str, Any]], send_at: datetime) -> None:
+        """
+        Stores deliveries until their send time.
+
+        Args:
+            deliveries (List[Dict[str, Any]]): The send_notification arguments of
+                each delivery.
+            send_at (datetime): When to deliver them.
+        """
+        score = send_at.timestamp()
+        # The id keeps identical deliveries apart in the set
+        members = {
+            json.dumps({"id": uuid.uuid4().hex, "delivery": delivery}): score
+            for delivery in deliveries
+        }
+        self._add(members)
+
+    def release(
+        self,
+        publish: Callable[[List[Dict[str, Any]]], None],
+        max_batches: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        Hands the due deliveries to publish, a batch at a time. The deliveries of
+        a batch that fails to publish are scheduled again at their send time.
+
+        Args:
+            publish (Callable[[List[Dict[str, Any]]], None]): Enqueues a batch of
+                deliveries.
+            max_batches (Optional[int]): Maximum number of batches released,
+                None until no delivery is due.
+            now (Optional[float]): The current timestamp, for tests.
+
+        Returns:
+            int: The number of deliveries released.
+
+        Raises:
+            Exception: Whatever publish raised.
+        """
+        now = now if now is not None else time.time()
+        released = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            due = self._lease_due(now)
+            if not due:
+                break
+            try:
+                publish([json.loads(member)["delivery"] for member in due])
+            except Exception as e:
+                logger.error(f"Error releasing {len(due)} scheduled deliveries: {e}")
+                self._add(due)
+                raise
+            self._remove(due)
+            released += len(due)
+            batches += 1
+        return released
+
+    def pending(self) -> int:
+        """
+        Returns the number of deliveries waiting for their send time.
+        """
+        redis = get_redis()
+        if redis is None:
+            with self._lock:
+                return len(self._local)
+        return redis.zcard(self.key)
+
+    def clear(self) -> None:
+        """
+        Drops every scheduled delivery.
+        """
+        with self._lock:
+            self._local.clear()
+        redis = get_redis()
+        if redis is not None:
+            redis.delete(self.key)
+
+    def _add(self, members: Dict[str, float]) -> None:
+        redis = get_redis()
+        if redis is None:
+            with self._lock:
+                for member, score in members.items():
+                    heapq.heappush(self._local, (score, member))
+            return
+        redis.zadd(self.key, members)
+
+    def _remove(self, members: Dict[str, float]) -> None:
+        redis = get_redis()
+        if redis is not None:
+            redis.zrem(self.key, *members)
+
+    def _lease_due(self, now: float) -> Dict[str, float]:
+        redis = get_redis()
+        if redis is None:
+            # Nothing outlives the process to lease them from
+            due = {}
+            with self._lock:
+                while (
+                    self._local
+                    and self._local[0][0] <= now
+                    and len(due) < self.batch_size
+                ):
+                    score, member = heapq.heappop(self._local)
+                    due[member] = score
+            return due
+        if self._script is None:
+            self._script = redis.register_script(LEASE_DUE_SCRIPT)
+        flat = self._script(
+            keys=[self.key], args=[now, self.batch_size, now + self.lease_seconds]
+        )
+        return {
+            member.decode(): float(score)
+            for member, score in zip(flat[::2], flat[1::2])
+        }
+
+
+scheduler = Scheduler()
@@ -1,5 +1,6 @@
 from dispatcher.models import Topic, Notification
 from rest_framework import serializers
+from dispatcher.settings import PRIORITY_LANES, PRIORITY_NORMAL
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -12,6 +13,9 @@ class NotificationSerializer(serializers.ModelSerializer):
 
 class TopicSerializer(serializers.ModelSerializer):
     notification = NotificationSerializer()
+    additional_notifications = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Notification.objects.all(), required=False
+    )
 
     class Meta:
         model = Topic
@@ -19,10 +23,72 @@ class TopicSerializer(serializers.ModelSerializer):
             "name",
             "description",
             "notification",
+            "additional_notifications",
             "secure_storage_token",
+            "digest_window",
+            "digest_max_messages",
+            "quiet_hours_start",
+            "quiet_hours_end",
         ]
 
+    def validate(self, data):
+        return validate_digest(data, self.instance)
+
+
+def validate_digest(data, instance=None):
+    """
+    Runs Topic.validate on the digest settings of a topic, as a validation error.
+    """
+    topic = Topic(
+        **{
+            field: data.get(field, getattr(instance, field, None))
+            for field in ("digest_window", "digest_max_messages")
+        }
+    )
+    try:
+        topic.validate()
+    except ValueError as e:
+        raise serializers.ValidationError(str(e))
+    return data
+
+
+class NotificationRecordSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=Notification.METHOD_CHOICES)
+    config = serializers.JSONField()
+
+
+class TopicRecordSerializer(serializers.Serializer):
+    """
+    A line of an NDJSON topic import or export, with its notifications
+    embedded instead of referenced by primary key.
+    """
+
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    notification = NotificationRecordSerializer(required=False, allow_null=True)
+    additional_notifications = NotificationRecordSerializer(many=True, required=False)
+    chatbot_token = serializers.CharField(
+        max_length=255, required=False, allow_null=True
+    )
+    digest_window = serializers.IntegerField(
+        min_value=0, required=False, allow_null=True
+    )
+    digest_max_messages = serializers.IntegerField(
+        min_value=0, required=False, allow_null=True
+    )
+    quiet_hours_start = serializers.TimeField(required=False, allow_null=True)
+    quiet_hours_end = serializers.TimeField(required=False, allow_null=True)
+
+    def validate(self, data):
+        # Bulk writes do not call Topic.save
+        return validate_digest(data)
+
 
 class ChatMessageSerializer(serializers.Serializer):
     topic_id = serializers.CharField()
     description = serializers.CharField()
+    priority = serializers.ChoiceField(
+        choices=list(PRIORITY_LANES), default=PRIORITY_NORMAL
+    )
+    # deliver the message later instead of right away
+    send_at = serializers.DateTimeField(required=False)
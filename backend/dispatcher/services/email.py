@@ -1,9 +1,22 @@
+from django.conf import settings
 from django.core import mail
+from dispatcher.retries import InvalidNotificationError
 from dispatcher.services.mixins import ServiceInterfaceMixin
+from dispatcher.services.pool import client_pool
+from dispatcher.settings import (
+    EMAIL_BATCH_MAX_SIZE,
+    EMAIL_BATCH_FLUSH_INTERVAL,
+    EMAIL_CONNECTION_HEALTH_CHECK_INTERVAL,
+)
 import dataclasses
+import logging
+import threading
+import time
 from typing import Any, List, Optional
 from django.core.validators import validate_email
 
+logger = logging.getLogger(__name__)
+
 
 @dataclasses.dataclass
 class EmailRequirements:
@@ -15,6 +28,161 @@ class EmailRequirements:
             validate_email(recipient)
 
 
+@dataclasses.dataclass
+class PendingEmail:
+    message: mail.EmailMessage
+    done: threading.Event = dataclasses.field(default_factory=threading.Event)
+    error: Optional[Exception] = None
+
+
+class EmailBatcher:
+    """
+    Sends emails over a long-lived, health-checked connection.
+
+    Emails submitted while a batch is open are sent together over the same
+    connection, one message at a time. Each caller blocks until its batch has
+    been sent and gets the error of its own email, if any, so task retries
+    resend only the emails that failed.
+
+    A batch only waits for others to join it while other emails are in flight.
+    A lone sender, such as a prefork worker process that runs one task at a
+    time, sends its email right away.
+    """
+
+    def __init__(
+        self,
+        max_size: int = EMAIL_BATCH_MAX_SIZE,
+        flush_interval: float = EMAIL_BATCH_FLUSH_INTERVAL,
+        health_check_interval: float = EMAIL_CONNECTION_HEALTH_CHECK_INTERVAL,
+    ) -> None:
+        """
+        Initializes the batcher without opening a connection.
+
+        Args:
+            max_size (int): Maximum number of emails sent in one batch.
+            flush_interval (float): Seconds the first email of a batch waits for
+                others to join it.
+            health_check_interval (float): Seconds an idle connection is trusted
+                before it is checked.
+        """
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.health_check_interval = health_check_interval
+        self._connection = None
+        self._last_used: float = 0.0
+        self._open_batch: Optional[List[PendingEmail]] = None
+        # Callers of send that did not return yet
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+
+    def send(self, message: mail.EmailMessage) -> None:
+        """
+        Sends an email as part of the current batch.
+
+        Args:
+            message (mail.EmailMessage): The email to send.
+
+        Raises:
+            Exception: If sending the batch failed.
+        """
+        pending = PendingEmail(message)
+        with self._cond:
+            self._in_flight += 1
+            batch = self._open_batch
+            leader = batch is None
+            if leader:
+                batch = self._open_batch = []
+            batch.append(pending)
+            if len(batch) >= self.max_size:
+                self._open_batch = None
+                self._cond.notify_all()
+
+        try:
+            if leader:
+                self._wait_for_batch(batch)
+                self._flush(batch)
+            pending.done.wait()
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+        if pending.error is not None:
+            raise pending.error
+
+    def close(self) -> None:
+        """
+        Closes the underlying connection.
+        """
+        with self._send_lock:
+            self._close_connection()
+
+    def _wait_for_batch(self, batch: List[PendingEmail]) -> None:
+        with self._cond:
+            if self._in_flight == 1:
+                # Nobody else is sending, so nobody is likely to join
+                if self._open_batch is batch:
+                    self._open_batch = None
+                return
+            deadline = time.monotonic() + self.flush_interval
+            while self._open_batch is batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._open_batch = None
+                    break
+                self._cond.wait(remaining)
+
+    def _flush(self, batch: List[PendingEmail]) -> None:
+        with self._send_lock:
+            try:
+                for pending in batch:
+                    self._send_one(pending)
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+    def _send_one(self, pending: PendingEmail) -> None:
+        # The SMTP backend raises on the first message that fails, so each one
+        # is sent on its own to know which were delivered
+        try:
+            self._get_connection().send_messages([pending.message])
+            self._last_used = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error sending email to {pending.message.to}: {e}")
+            # The next email of the batch gets a new connection
+            self._close_connection()
+            pending.error = e
+
+    def _get_connection(self):
+        if self._connection is not None and not self._is_healthy():
+            self._close_connection()
+        if self._connection is None:
+            connection = mail.get_connection(fail_silently=False)
+            connection.open()
+            self._connection = connection
+        return self._connection
+
+    def _is_healthy(self) -> bool:
+        if time.monotonic() - self._last_used < self.health_check_interval:
+            return True
+        # Only the SMTP backend keeps a socket that can go stale
+        smtp = getattr(self._connection, "connection", None)
+        if smtp is None:
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _close_connection(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.close()
+        except Exception as e:
+            logger.error(f"Error closing email connection: {e}")
+        self._connection = None
+
+
 class EmailService(ServiceInterfaceMixin):
     """
     Service for sending notifications via Email.
@@ -34,15 +202,17 @@ class EmailService(ServiceInterfaceMixin):
 
     def connect(self, *args: Any, **kwargs: Any) -> None:
         """
-        Email service does not require an explicit connection.
+        Takes the email batcher for the configured SMTP account from the process
+        client pool. The SMTP connection itself is opened on the first send.
         """
-        pass
+        key = (settings.EMAIL_HOST, settings.EMAIL_HOST_USER)
+        self.batcher: EmailBatcher = client_pool.get("smtp", key, EmailBatcher)
 
     def disconnect(self, *args: Any, **kwargs: Any) -> None:
         """
-        Email service does not require an explicit disconnection.
+        Releases the email batcher, which stays in the pool for later tasks.
         """
-        pass
+        self.batcher = None
 
     def send(self, message: str, *args: Any, **kwargs: Any) -> None:
         """
@@ -54,17 +224,17 @@ class EmailService(ServiceInterfaceMixin):
             **kwargs: Arbitrary keyword arguments, expects 'recipient_list' and optionally 'subject'.
 
         Raises:
-            ValueError: If validation fails.
+            InvalidNotificationError: If validation fails.
         """
         if not self.validate(**kwargs):
-            raise ValueError("Invalid email data")
+            raise InvalidNotificationError("Invalid email data")
 
         recipient_list: List[str] = kwargs["recipient_list"]
         subject: str = kwargs.get("subject", f"Notification: {message[:10]}...")
-        mail.send_mail(
+        email = mail.EmailMessage(
             subject=subject,
-            message=message,
+            body=message,
             from_email=None,  # Use default from settings
-            recipient_list=recipient_list,
-            fail_silently=False,
+            to=recipient_list,
         )
+        self.batcher.send(email)
@@ -0,0 +1,73 @@
+from dispatcher.services.notification_wrapper import NotificationWrapper
+from dispatcher.services.pool import async_http_session
+from dispatcher.settings import ASYNC_DELIVERY_CONCURRENCY
+import aiohttp
+import asyncio
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryEngine:
+    """
+    Runs many deliveries concurrently on an asyncio event loop.
+
+    Telegram and Slack are sent on one shared aiohttp session; services without a
+    native async client run in worker threads. The number of in-flight deliveries
+    is capped by the concurrency limit.
+    """
+
+    def __init__(self, concurrency: int = ASYNC_DELIVERY_CONCURRENCY) -> None:
+        """
+        Initializes the engine.
+
+        Args:
+            concurrency (int): Maximum number of in-flight deliveries.
+        """
+        self.concurrency = concurrency
+
+    def run(
+        self, deliveries: Sequence[Tuple[NotificationWrapper, str]]
+    ) -> List[Optional[Exception]]:
+        """
+        Delivers every message and waits for all of them to finish.
+
+        Args:
+            deliveries (Sequence[Tuple[NotificationWrapper, str]]): Pairs of the
+                wrapper to send through and the message to send.
+
+        Returns:
+            List[Optional[Exception]]: The error of each delivery, in order, or
+                None for the ones sent successfully.
+        """
+        return asyncio.run(self.deliver(deliveries))
+
+    async def deliver(
+        self, deliveries: Sequence[Tuple[NotificationWrapper, str]]
+    ) -> List[Optional[Exception]]:
+        """
+        Async version of run(), for callers that already have an event loop.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver_one(
+            wrapper: NotificationWrapper, message: str
+        ) -> Optional[Exception]:
+            async with semaphore:
+                try:
+                    await wrapper.asend(message)
+                    return None
+                except Exception as e:
+                    logger.error(f"Error sending topic ID {wrapper.plan.topic}: {e}")
+                    return e
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            token = async_http_session.set(session)
+            try:
+                return await asyncio.gather(
+                    *(deliver_one(wrapper, message) for wrapper, message in deliveries)
+                )
+            finally:
+                async_http_session.reset(token)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+from dispatcher.services.validators import validator_registry
+import asyncio
 import os
-from typing import Any
+from typing import Any, Dict, Optional
 
 
 class ServiceInterfaceMixin(ABC):
@@ -10,6 +12,8 @@ class ServiceInterfaceMixin(ABC):
     """
 
     validator_class: Any = None
+    # send arguments of the messages rendered from a template
+    template_options: Dict[str, Any] = {}
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """
@@ -31,6 +35,18 @@ class ServiceInterfaceMixin(ABC):
         """
         raise NotImplementedError
 
+    async def asend(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Sends the message without blocking the event loop.
+
+        Services without a native async client run send() in a worker thread.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        await asyncio.to_thread(self.send, *args, **kwargs)
+
     @abstractmethod
     def connect(self, *args: Any, **kwargs: Any) -> None:
         """
@@ -51,6 +67,34 @@ class ServiceInterfaceMixin(ABC):
         """
         raise NotImplementedError
 
+    def rate_limit_key(self, *args: Any, **kwargs: Any) -> Optional[str]:
+        """
+        Returns the destination the provider rate limits deliveries by.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments, the notification config.
+
+        Returns:
+            Optional[str]: The destination key, or None if deliveries are not
+                rate limited.
+        """
+        return None
+
+    @staticmethod
+    def escape(text: str) -> str:
+        """
+        Escapes text inserted in a message template for the markup of the
+        service.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            str: The escaped text.
+        """
+        return text
+
     def _get_secret(self, key: str) -> str:
         """
         Retrieves a secret value from environment variables.
@@ -94,8 +138,4 @@ class ServiceInterfaceMixin(ABC):
         if self.validator_class is None:
             raise NotImplementedError("Validator class not set")
 
-        try:
-            self.validator_class(**kwargs)
-            return True
-        except TypeError:
-            return False
+        return validator_registry.validate(self.validator_class, kwargs)
@@ -1,5 +1,12 @@
-from dispatcher.models import Topic
-from typing import Any
+from dispatcher.breaker import Circuit, circuit_breaker
+from dispatcher.metrics import send_seconds
+from dispatcher.tracing import tracer
+from dispatcher.models import Notification, Topic
+from dispatcher.plans import DeliveryPlan
+from dispatcher.templating import template_cache
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
 
 
 class NotificationWrapper:
@@ -7,23 +14,107 @@ class NotificationWrapper:
     Wrapper for handling the topic sending process.
     """
 
-    def __init__(self, topic: Topic) -> None:
+    def __init__(
+        self, topic: Optional[Topic] = None, plan: Optional[DeliveryPlan] = None
+    ) -> None:
         """
-        Initializes the wrapper with a topic and message.
+        Initializes the wrapper with a topic or with its delivery plan.
 
         Args:
-            topic (Topic): The topic instance.
+            topic (Topic): The topic instance, used when no plan is given.
+            plan (DeliveryPlan): The delivery plan of the topic.
         """
-        self.topic = topic
-        service_class = self.topic.notification.get_service()
+        self.plan = plan if plan is not None else DeliveryPlan.from_topic(topic)
+        service_class = Notification.service_for(self.plan.method)
         self.client = service_class()
+        # seconds the provider took to answer the last send, if it was called
+        self.latency: Optional[float] = None
+
+    def rate_limit_key(self) -> Optional[str]:
+        """
+        Returns the destination the provider rate limits this delivery by.
+        """
+        return self.client.rate_limit_key(**self.plan.config)
+
+    def circuit(self) -> Circuit:
+        """
+        Returns the circuit breaker of the provider and destination.
+        """
+        return circuit_breaker.circuit(self.plan.method, self.rate_limit_key())
+
+    def render(self, message: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Renders a message with the topic's template for the method, if it has
+        one.
+
+        Args:
+            message (str): The message received from the chatbot.
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: The text to send, and the notification
+                config with the send arguments of the template.
+        """
+        if self.plan.template is None:
+            return message, self.plan.config
+        rendered = template_cache.render(
+            self.plan.template, message, self.plan.context or {}, self.client.escape
+        )
+        options = {**self.plan.config, **self.client.template_options}
+        if rendered.subject is not None:
+            options["subject"] = rendered.subject
+        return rendered.body, options
 
     def send(self, message: str, *args: Any, **kwargs: Any) -> None:
         """
-        Sends the topic using the appropriate service.
+        Sends the topic using the appropriate service, through its circuit
+        breaker.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and nothing was sent.
+        """
+        message, options = self.render(message)
+        circuit = self.circuit()
+        circuit.before_send()
+        started = time.monotonic()
+        try:
+            with tracer.span("provider_send", method=self.plan.method):
+                self.client.send(message=message, **options)
+        except Exception as e:
+            circuit.record_failure(e)
+            raise
+        finally:
+            self.latency = time.monotonic() - started
+            send_seconds.labels(method=self.plan.method).observe(self.latency)
+        circuit.record_success()
+
+    async def asend(self, message: str, *args: Any, **kwargs: Any) -> None:
+        """
+        Sends the topic using the appropriate service without blocking the event
+        loop.
 
         Args:
             *args: Variable length argument list.
             **kwargs: Arbitrary keyword arguments.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and nothing was sent.
         """
-        self.client.send(message=message, **self.topic.notification.config)
+        message, options = self.render(message)
+        circuit = self.circuit()
+        # The circuit state lives in the cache, its round trips run in threads
+        await asyncio.to_thread(circuit.before_send)
+        started = time.monotonic()
+        try:
+            with tracer.span("provider_send", method=self.plan.method):
+                await self.client.asend(message=message, **options)
+        except Exception as e:
+            await asyncio.to_thread(circuit.record_failure, e)
+            raise
+        finally:
+            self.latency = time.monotonic() - started
+            send_seconds.labels(method=self.plan.method).observe(self.latency)
+        await asyncio.to_thread(circuit.record_success)
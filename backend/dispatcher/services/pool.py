@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from contextvars import ContextVar
+from dispatcher.settings import CLIENT_POOL_MAX_SIZE
+from slack_sdk import WebClient
+import aiohttp
+import logging
+import requests
+import threading
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ClientPool:
+    """
+    Process-level pool of provider clients keyed by credentials.
+
+    Clients are kept alive between tasks so their connections are reused, and the
+    least recently used client is closed once the pool is full.
+    """
+
+    def __init__(self, max_size: int = CLIENT_POOL_MAX_SIZE) -> None:
+        """
+        Initializes an empty pool.
+
+        Args:
+            max_size (int): Maximum number of clients kept alive.
+        """
+        self.max_size = max_size
+        self._clients: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get(self, kind: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Returns the pooled client for a credential, building it if needed.
+
+        Args:
+            kind (str): The client kind, e.g. 'slack'.
+            key (Hashable): The credential the client is bound to.
+            factory (Callable[[], Any]): Builds a new client.
+
+        Returns:
+            Any: The pooled client.
+        """
+        pool_key = (kind, key)
+        with self._lock:
+            client = self._clients.get(pool_key)
+            if client is not None:
+                self._clients.move_to_end(pool_key)
+                return client
+
+            client = factory()
+            self._clients[pool_key] = client
+            while len(self._clients) > self.max_size:
+                (evicted_kind, _), evicted = self._clients.popitem(last=False)
+                logger.info(f"Evicting pooled {evicted_kind} client")
+                self._close_client(evicted)
+            return client
+
+    def slack_client(self, token: str, base_url: str = WebClient.BASE_URL) -> WebClient:
+        """
+        Returns the Slack WebClient for a token.
+
+        Args:
+            token (str): The Slack API token.
+            base_url (str): The Slack API endpoint.
+
+        Returns:
+            WebClient: The pooled Slack client.
+        """
+        return self.get(
+            "slack",
+            (token, base_url),
+            lambda: WebClient(token=token, base_url=base_url),
+        )
+
+    def http_session(self, key: Hashable) -> requests.Session:
+        """
+        Returns a keep-alive HTTP session for a credential.
+
+        Args:
+            key (Hashable): The credential the session is used with.
+
+        Returns:
+            requests.Session: The pooled session.
+        """
+        return self.get("http", key, requests.Session)
+
+    def close(self) -> None:
+        """
+        Closes every pooled client and empties the pool.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            self._close_client(client)
+
+    def _close_client(self, client: Any) -> None:
+        close = getattr(client, "close", None)
+        if close is None:
+            return
+        try:
+            close()
+        except Exception as e:
+            logger.error(f"Error closing pooled client: {e}")
+
+
+client_pool = ClientPool()
+
+# HTTP session of the running async delivery engine, shared by its async sends
+async_http_session: ContextVar[Optional[aiohttp.ClientSession]] = ContextVar(
+    "async_http_session", default=None
+)
@@ -1,7 +1,11 @@
+from dispatcher.retries import InvalidNotificationError
 from dispatcher.services.mixins import ServiceInterfaceMixin
+from dispatcher.services.pool import client_pool, async_http_session
+from dispatcher.settings import SLACK_API_URL
 from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
 import dataclasses
-from typing import Any
+from typing import Any, Optional
 
 
 @dataclasses.dataclass
@@ -15,6 +19,7 @@ class SlackService(ServiceInterfaceMixin):
     """
 
     validator_class = SlackRequirements
+    BASE_URL: str = SLACK_API_URL
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """
@@ -28,17 +33,30 @@ class SlackService(ServiceInterfaceMixin):
 
     def connect(self, *args: Any, **kwargs: Any) -> None:
         """
-        Initializes the Slack WebClient with the API token.
+        Takes the Slack WebClient for the API token from the process client pool.
         """
-        token: str = self._get_secret("SLACK_API_TOKEN")
-        self.client: WebClient = WebClient(token=token)
+        self.token: str = self._get_secret("SLACK_API_TOKEN")
+        self.client: WebClient = client_pool.slack_client(self.token, self.BASE_URL)
 
     def disconnect(self, *args: Any, **kwargs: Any) -> None:
         """
-        Closes the Slack WebClient connection if necessary.
+        Releases the Slack WebClient, which stays in the pool for later tasks.
         """
         self.client = None
 
+    @staticmethod
+    def escape(text: str) -> str:
+        """
+        Slack mrkdwn only needs the control characters escaped.
+        """
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    def rate_limit_key(self, *args: Any, **kwargs: Any) -> Optional[str]:
+        """
+        Slack rate limits messages per channel.
+        """
+        return kwargs.get("channel")
+
     def send(self, message: str, *args: Any, **kwargs: Any) -> None:
         """
         Sends a message via Slack.
@@ -49,11 +67,37 @@ class SlackService(ServiceInterfaceMixin):
             **kwargs: Arbitrary keyword arguments, expects 'channel'.
 
         Raises:
-            ValueError: If validation fails.
+            InvalidNotificationError: If validation fails.
             slack_sdk.errors.SlackApiError: If the Slack API call fails.
         """
         if not self.validate(**kwargs):
-            raise ValueError("Invalid slack data")
+            raise InvalidNotificationError("Invalid slack data")
 
         channel: str = kwargs["channel"]
         self.client.chat_postMessage(text=message, channel=channel)
+
+    async def asend(self, message: str, *args: Any, **kwargs: Any) -> None:
+        """
+        Sends a message via Slack on the delivery engine's HTTP session.
+
+        Args:
+            message (str): The message to send.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments, expects 'channel'.
+
+        Raises:
+            InvalidNotificationError: If validation fails.
+            slack_sdk.errors.SlackApiError: If the Slack API call fails.
+        """
+        session = async_http_session.get()
+        if session is None:
+            return await super().asend(message, *args, **kwargs)
+
+        if not self.validate(**kwargs):
+            raise InvalidNotificationError("Invalid slack data")
+
+        channel: str = kwargs["channel"]
+        client = AsyncWebClient(
+            token=self.token, session=session, base_url=self.BASE_URL
+        )
+        await client.chat_postMessage(text=message, channel=channel)
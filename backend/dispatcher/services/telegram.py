@@ -1,13 +1,19 @@
+from django.utils.html import escape
 from rest_framework import status
+from dispatcher.retries import InvalidNotificationError, RetryAfterError
 from dispatcher.services.mixins import ServiceInterfaceMixin
+from dispatcher.services.pool import client_pool, async_http_session
+from dispatcher.settings import TELEGRAM_API_URL
+import hashlib
 import requests
 import dataclasses
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 
 @dataclasses.dataclass
 class TelegramRequirements:
     chat_id: str
+    parse_mode: Optional[str] = None
 
 
 class TelegramService(ServiceInterfaceMixin):
@@ -16,7 +22,8 @@ class TelegramService(ServiceInterfaceMixin):
     """
 
     validator_class = TelegramRequirements
-    BASE_URL: str = "https://api.telegram.org/bot"
+    template_options = {"parse_mode": "HTML"}
+    BASE_URL: str = TELEGRAM_API_URL
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """
@@ -31,15 +38,29 @@ class TelegramService(ServiceInterfaceMixin):
 
     def connect(self, *args: Any, **kwargs: Any) -> None:
         """
-        Telegram does not require an explicit connection.
+        Takes the keep-alive HTTP session for the bot token from the process
+        client pool.
         """
-        pass
+        self.session: requests.Session = client_pool.http_session(self.bot_token)
 
     def disconnect(self, *args: Any, **kwargs: Any) -> None:
         """
-        Telegram does not require an explicit disconnection.
+        Releases the HTTP session, which stays in the pool for later tasks.
         """
-        pass
+        self.session = None
+
+    @staticmethod
+    def escape(text: str) -> str:
+        """
+        Templates are sent in the Telegram HTML parse mode.
+        """
+        return str(escape(text))
+
+    def rate_limit_key(self, *args: Any, **kwargs: Any) -> Optional[str]:
+        """
+        Telegram rate limits messages per bot, identified by a hash of its token.
+        """
+        return hashlib.sha256(self.bot_token.encode()).hexdigest()[:16]
 
     def send(self, message: str, *args: Any, **kwargs: Any) -> None:
         """
@@ -48,21 +69,72 @@ class TelegramService(ServiceInterfaceMixin):
         Args:
             message (str): The message to send.
             *args: Variable length argument list.
-            **kwargs: Arbitrary keyword arguments.
+            **kwargs: Arbitrary keyword arguments, expects 'chat_id' and
+                optionally 'parse_mode'.
 
         Raises:
-            ValueError: If validation fails.
+            InvalidNotificationError: If validation fails.
+            RetryAfterError: If the bot exceeded the Telegram rate limit.
             requests.RequestException: If the HTTP request fails.
         """
         if not self.validate(**kwargs):
-            raise ValueError("Invalid telegram data")
+            raise InvalidNotificationError("Invalid telegram data")
 
         url: str = f"{self.BASE_URL}{self.bot_token}/sendMessage"
-        data: Dict[str, str] = {"chat_id": kwargs.get("chat_id"), "text": message}
-        response = requests.post(url, data=data)
+        data: Dict[str, str] = self._message_data(message, **kwargs)
+        response = self.session.post(url, data=data)
         if response.status_code == status.HTTP_400_BAD_REQUEST:
-            raise ValueError(
+            raise InvalidNotificationError(
                 "Invalid chat_id. Have you started a conversation with the bot?"
             )
+        if response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            raise self._rate_limit_error(response.json())
 
         response.raise_for_status()
+
+    async def asend(self, message: str, *args: Any, **kwargs: Any) -> None:
+        """
+        Sends a message via Telegram on the delivery engine's HTTP session.
+
+        Args:
+            message (str): The message to send.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Raises:
+            InvalidNotificationError: If validation fails.
+            RetryAfterError: If the bot exceeded the Telegram rate limit.
+            aiohttp.ClientResponseError: If the HTTP request fails.
+        """
+        session = async_http_session.get()
+        if session is None:
+            return await super().asend(message, *args, **kwargs)
+
+        if not self.validate(**kwargs):
+            raise InvalidNotificationError("Invalid telegram data")
+
+        url: str = f"{self.BASE_URL}{self.bot_token}/sendMessage"
+        data: Dict[str, str] = self._message_data(message, **kwargs)
+        async with session.post(url, data=data) as response:
+            if response.status == status.HTTP_400_BAD_REQUEST:
+                raise InvalidNotificationError(
+                    "Invalid chat_id. Have you started a conversation with the bot?"
+                )
+            if response.status == status.HTTP_429_TOO_MANY_REQUESTS:
+                raise self._rate_limit_error(await response.json(content_type=None))
+
+            response.raise_for_status()
+
+    @staticmethod
+    def _message_data(message: str, **kwargs: Any) -> Dict[str, str]:
+        data = {"chat_id": kwargs.get("chat_id"), "text": message}
+        if kwargs.get("parse_mode"):
+            data["parse_mode"] = kwargs["parse_mode"]
+        return data
+
+    @staticmethod
+    def _rate_limit_error(body: Dict[str, Any]) -> RetryAfterError:
+        retry_after = body.get("parameters", {}).get("retry_after", 1)
+        return RetryAfterError(
+            body.get("description", "Too Many Requests"), retry_after=retry_after
+        )
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from dispatcher.settings import VALIDATION_CACHE_MAX_SIZE
+import dataclasses
+import json
+import threading
+from typing import Any, Dict, Tuple, Type
+
+
+class ConfigValidator:
+    """
+    Validator of notification configs compiled from a requirements dataclass.
+
+    The accepted and required keys are computed once, so checking a config does
+    not build the dataclass unless it has a __post_init__ with checks of its own.
+    """
+
+    def __init__(self, requirements: Type) -> None:
+        """
+        Compiles the validator.
+
+        Args:
+            requirements (Type): The requirements dataclass of a service.
+        """
+        fields = [field for field in dataclasses.fields(requirements) if field.init]
+        self.requirements = requirements
+        self.fields = frozenset(field.name for field in fields)
+        self.required = frozenset(
+            field.name
+            for field in fields
+            if field.default is dataclasses.MISSING
+            and field.default_factory is dataclasses.MISSING
+        )
+        self.post_init = hasattr(requirements, "__post_init__")
+
+    def __call__(self, config: Any) -> bool:
+        """
+        Validates a config.
+
+        Args:
+            config (Any): The notification config.
+
+        Returns:
+            bool: True if the config has every required key and no unknown one,
+                and the __post_init__ of the requirements accepts its values.
+
+        Raises:
+            Exception: Whatever else the __post_init__ of the requirements
+                raises, e.g. a ValidationError of an invalid email.
+        """
+        if not isinstance(config, dict):
+            return False
+        keys = config.keys()
+        if not self.required <= keys or not keys <= self.fields:
+            return False
+        if self.post_init:
+            try:
+                self.requirements(**config)
+            except (TypeError, ValueError):
+                # A value of the wrong type, e.g. a recipient_list of None
+                return False
+        return True
+
+
+class ValidatorRegistry:
+    """
+    Compiled validator of every service, with a bounded cache of the configs
+    already found valid.
+
+    Configs are cached by their content, so a config is validated again only
+    after it changes.
+    """
+
+    def __init__(self, max_size: int = VALIDATION_CACHE_MAX_SIZE) -> None:
+        """
+        Initializes an empty registry.
+
+        Args:
+            max_size (int): Maximum number of valid configs remembered.
+        """
+        self.max_size = max_size
+        self._validators: Dict[Type, ConfigValidator] = {}
+        self._valid: "OrderedDict[Tuple[Type, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, requirements: Type) -> ConfigValidator:
+        """
+        Returns the compiled validator of a requirements dataclass.
+
+        Args:
+            requirements (Type): The requirements dataclass of a service.
+
+        Returns:
+            ConfigValidator: The validator, compiled on first use.
+        """
+        validator = self._validators.get(requirements)
+        if validator is None:
+            validator = self._validators[requirements] = ConfigValidator(requirements)
+        return validator
+
+    def validate(self, requirements: Type, config: Any) -> bool:
+        """
+        Validates a config, skipping the check if it was already found valid.
+
+        Args:
+            requirements (Type): The requirements dataclass of a service.
+            config (Any): The notification config.
+
+        Returns:
+            bool: True if the config is valid.
+
+        Raises:
+            Exception: Whatever the __post_init__ of the requirements raises.
+        """
+        try:
+            key = (requirements, json.dumps(config, sort_keys=True, default=str))
+        except (TypeError, ValueError):
+            return self.get(requirements)(config)
+
+        with self._lock:
+            if key in self._valid:
+                self._valid.move_to_end(key)
+                return True
+        # Only valid configs are cached, invalid ones raise the same error again
+        if not self.get(requirements)(config):
+            return False
+        with self._lock:
+            self._valid[key] = None
+            if len(self._valid) > self.max_size:
+                self._valid.popitem(last=False)
+        return True
+
+
+validator_registry = ValidatorRegistry()
@@ -1 +1,181 @@
-NOTIFICATION_RETY_TIME = 60
+import os
+
+# Retries of failed deliveries, with exponential backoff and full jitter
+# Upper bound in seconds of the first retry delay, doubled on every retry
+NOTIFICATION_RETRY_BASE_DELAY = 5
+# Upper bound in seconds of any retry delay
+NOTIFICATION_RETRY_MAX_DELAY = 60 * 10
+NOTIFICATION_MAX_RETRIES = 8
+# Slack API errors that retrying a delivery cannot fix
+SLACK_PERMANENT_ERRORS = frozenset(
+    {
+        "account_inactive",
+        "channel_not_found",
+        "invalid_auth",
+        "is_archived",
+        "msg_too_long",
+        "no_text",
+        "not_authed",
+        "not_in_channel",
+        "restricted_action",
+        "token_revoked",
+    }
+)
+
+# Maximum number of chat messages accepted by a single batch resolve request
+RESOLVE_BATCH_MAX_SIZE = 500
+
+# Cursor pagination of the topic and notification lists
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+# NDJSON import and export of topics
+# Lines of an import written in one transaction
+BULK_IMPORT_BATCH_SIZE = 500
+# Invalid lines reported in detail by an import, the rest are only counted
+BULK_IMPORT_MAX_ERRORS = 100
+# Topics read from the database at a time by an export
+BULK_EXPORT_CHUNK_SIZE = 2000
+
+# Topic routing table
+ROUTING_TABLE_VERSION_KEY = "dispatcher:routing:version"
+# Seconds a process trusts its routing table before re-checking the shared version
+ROUTING_TABLE_CHECK_INTERVAL = 1.0
+
+# Read replicas, see dispatcher.routers.ReplicaRouter
+REPLICA_PIN_KEY = "dispatcher:replicas:pinned"
+# Seconds reads stay on the primary after a route changes, longer than the lag
+# of the replicas
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+# Models whose writes pin the reads to the primary
+REPLICA_PIN_MODELS = frozenset(
+    {
+        "dispatcher.Topic",
+        "dispatcher.Topic_additional_notifications",
+        "dispatcher.Notification",
+        "dispatcher.MessageTemplate",
+    }
+)
+
+# Provider API endpoints, pointed at local stubs by the benchmark
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
+SLACK_API_URL = os.getenv("SLACK_API_URL", "https://slack.com/api/")
+
+# Maximum number of provider clients kept alive per process
+CLIENT_POOL_MAX_SIZE = 32
+
+# Maximum number of notification configs remembered as valid per process
+VALIDATION_CACHE_MAX_SIZE = 1024
+
+# Maximum number of compiled message templates kept per process
+TEMPLATE_CACHE_MAX_SIZE = 256
+
+# Email batching over a persistent SMTP connection
+EMAIL_BATCH_MAX_SIZE = 50
+# Seconds the first email of a batch waits for others to join it, when other
+# emails are being sent
+EMAIL_BATCH_FLUSH_INTERVAL = 0.05
+# Seconds an idle SMTP connection is trusted before it is checked with NOOP
+EMAIL_CONNECTION_HEALTH_CHECK_INTERVAL = 30
+
+# Async delivery engine
+ASYNC_DELIVERY_ENABLED = os.getenv("ASYNC_DELIVERY_ENABLED", "False") == "True"
+# Maximum number of in-flight deliveries per worker process
+ASYNC_DELIVERY_CONCURRENCY = 100
+# Maximum number of deliveries handed to the engine in one task
+ASYNC_DELIVERY_BATCH_SIZE = 100
+
+# Version of the delivery plan format carried in send_notification messages
+DELIVERY_PLAN_SCHEMA_VERSION = 2
+
+# Digest mode
+DIGEST_KEY_PREFIX = "dispatcher:digest"
+# Seconds a buffered message is kept if its digest is never flushed
+DIGEST_MESSAGE_TTL = 60 * 60 * 24
+# Seconds a digest flush may hold its topic lock
+DIGEST_LOCK_TIMEOUT = 60
+# Seconds to wait before flushing messages still being written to the buffer
+DIGEST_RETRY_FLUSH_COUNTDOWN = 1
+DIGEST_SEPARATOR = "\n"
+
+# Provider rate limits shared by all workers, as (messages per second, burst size)
+RATE_LIMITS = {
+    "Slack": (1.0, 1),
+    "Telegram": (30.0, 30),
+}
+RATE_LIMIT_KEY_PREFIX = "dispatcher:ratelimit"
+
+# Circuit breakers per provider and destination, shared by all workers
+CIRCUIT_BREAKER_KEY_PREFIX = "dispatcher:breaker"
+# Transient failures within the window that open a circuit
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_FAILURE_WINDOW = 30
+# Seconds a circuit stays open before a probe message is let through
+CIRCUIT_BREAKER_OPEN_TIME = 30
+
+# Delivery log
+# Rows buffered in each worker process before they are written together
+DELIVERY_LOG_BUFFER_SIZE = 500
+# Seconds a row may wait in the buffer
+DELIVERY_LOG_FLUSH_INTERVAL = 1.0
+# Days rows are kept for, whole daily partitions are dropped after that
+DELIVERY_LOG_RETENTION_DAYS = 30
+# Days ahead of today the daily partitions are created for
+DELIVERY_LOG_PARTITIONS_AHEAD = 7
+
+# Scheduled delivery
+SCHEDULE_KEY = "dispatcher:schedule"
+# Maximum number of due deliveries moved to the delivery queues at once
+SCHEDULE_BATCH_SIZE = 500
+# Seconds the deliveries of a batch being released are held back from other
+# pollers, after which they are released again if the batch was not published
+SCHEDULE_LEASE_SECONDS = 60
+# Maximum number of batches released by one run of the poller
+SCHEDULE_MAX_BATCHES = 20
+
+# Idempotency of the resolve endpoint
+IDEMPOTENCY_KEY_PREFIX = "dispatcher:idempotency"
+# Seconds a response is replayed for requests with the same Idempotency-Key header
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+# Deduplicate requests without the header by topic and message content
+IDEMPOTENCY_CONTENT_KEYS = os.getenv("IDEMPOTENCY_CONTENT_KEYS", "False") == "True"
+# Seconds a response is replayed for requests with the same content
+IDEMPOTENCY_CONTENT_KEY_TTL = 60
+# Seconds a request stays claimed while it is processed, a few times the worker
+# timeout in gunicorn.conf.py, so the key of a crashed request is freed soon
+IDEMPOTENCY_IN_PROGRESS_TTL = int(os.getenv("IDEMPOTENCY_IN_PROGRESS_TTL", "90"))
+
+# Queues and priority lanes
+# Queue of the tasks that are not deliveries, each method has a queue of its own
+DEFAULT_QUEUE = "celery"
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+# Message priority of each lane, lower is served first by the Redis broker
+PRIORITY_LANES = {
+    PRIORITY_HIGH: 0,
+    PRIORITY_NORMAL: 3,
+    PRIORITY_LOW: 6,
+}
+QUEUE_STATS_KEY_PREFIX = "dispatcher:queues"
+# Weight of the latest queue wait in its moving average
+QUEUE_LATENCY_SMOOTHING = 0.1
+
+# Metrics
+# Turns off every metric timer and counter, the /metrics endpoint and the
+# worker exporters when False
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+# Bearer token scrapers must send to /metrics, empty to leave it open
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Upper bounds, in seconds, of the latency histogram buckets
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Port of the exporter started by each Celery worker, 0 to not start it
+METRICS_WORKER_PORT = int(os.getenv("METRICS_WORKER_PORT", 0))
+
+# Tracing
+# Share of the resolve requests traced, 0 turns tracing off
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", 0))
+# Dotted path of the span exporter class
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "dispatcher.tracing.ConsoleExporter")
+# File the FileExporter appends spans to, one JSON object per line
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
@@ -0,0 +1,66 @@
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    m2m_changed,
+    post_migrate,
+)
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from dispatcher.models import (
+    Topic,
+    Notification,
+    MessageTemplate,
+    NotificationDelivery,
+)
+from dispatcher.routing import routing_table
+from dispatcher.partitions import ensure_partitions
+
+
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+@receiver(post_save, sender=MessageTemplate)
+@receiver(post_delete, sender=MessageTemplate)
+@receiver(m2m_changed, sender=Topic.additional_notifications.through)
+def invalidate_routing_table(sender, **kwargs):
+    """
+    Invalidates the routing table of every process once a route change is
+    committed, so no process reloads the old rows under the new version.
+    """
+    if kwargs.get("action", "").startswith("pre_"):
+        return
+    transaction.on_commit(routing_table.invalidate)
+
+
+@receiver(m2m_changed, sender=Topic.additional_notifications.through)
+def touch_topics(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bumps the updated_at of the topics whose additional notifications changed,
+    which the ETag of the topic list is derived from.
+    """
+    if reverse and action == "pre_clear":
+        # The topics are no longer known after the clear
+        topics = list(instance.additional_topics.values_list("pk", flat=True))
+    elif not action.startswith("post_"):
+        return
+    elif reverse:
+        topics = pk_set or ()
+    else:
+        topics = [instance.pk]
+    Topic.objects.filter(pk__in=topics).update(updated_at=timezone.now())
+
+
+@receiver(post_migrate)
+def create_delivery_log_partitions(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Creates the upcoming daily partitions of the delivery log after migrating,
+    so rows do not land in the default partition before rotate_delivery_log runs.
+    """
+    if sender.name != "dispatcher":
+        return
+    if not router.allow_migrate_model(using, NotificationDelivery):
+        # e.g. a replica, which gets the partitions from the primary
+        return
+    ensure_partitions(using=using)
@@ -0,0 +1,7 @@
+from dispatcher.tasks import (  # noqa: F401
+    sending,
+    digest,
+    maintenance,
+    scheduling,
+    worker,
+)
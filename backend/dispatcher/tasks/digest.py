@@ -0,0 +1,58 @@
+from celery import shared_task, group
+from dispatcher.digest import digest_buffer
+from dispatcher.models import Topic
+from dispatcher.routing import routing_table
+from dispatcher.scheduling import deliver_at, scheduler
+from dispatcher.tasks.sending import send_notification
+from dispatcher.settings import DIGEST_SEPARATOR, DIGEST_RETRY_FLUSH_COUNTDOWN
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_digest(
+    pk: int,
+    plans: List[Dict[str, Any]],
+    skip_missing: bool = False,
+    name: Optional[str] = None,
+) -> None:
+    """
+    Celery task to deliver the buffered messages of a digest topic as one message.
+    A digest flushed during the quiet hours of its topic is scheduled for their end.
+
+    Args:
+        pk (int): The ID of the Topic instance.
+        plans (List[Dict[str, Any]]): The serialized delivery plans of the topic.
+        skip_missing (bool): Drop buffered messages that are still missing.
+        name (Optional[str]): The topic name, to look up its quiet hours.
+    """
+    messages, incomplete = digest_buffer.drain(pk, skip_missing=skip_missing)
+    if incomplete:
+        flush_digest.apply_async(
+            kwargs={"pk": pk, "plans": plans, "skip_missing": True, "name": name},
+            countdown=DIGEST_RETRY_FLUSH_COUNTDOWN,
+        )
+    if not messages:
+        return
+
+    logger.info(f"Flushing digest of {len(messages)} messages for topic ID {pk}")
+    message = DIGEST_SEPARATOR.join(messages)
+    deliveries = [{"pk": pk, "message": message, "plan": plan} for plan in plans]
+    due = _deliver_at(name)
+    if due is not None:
+        scheduler.schedule(deliveries, due)
+        return
+    group([send_notification.s(**delivery) for delivery in deliveries]).apply_async()
+
+
+def _deliver_at(name: Optional[str]):
+    if name is None:
+        return None
+    try:
+        route = routing_table.get(name)
+    except Topic.DoesNotExist:
+        # The deliveries of a deleted topic are dropped when they are sent
+        return None
+    return deliver_at(route)
@@ -0,0 +1,17 @@
+from celery import shared_task
+from dispatcher.partitions import ensure_partitions, purge_delivery_log
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rotate_delivery_log() -> None:
+    """
+    Celery task, run daily, that creates the upcoming partitions of the delivery
+    log and removes the rows past their retention period.
+    """
+    created = ensure_partitions()
+    if created:
+        logger.info(f"Created delivery log partitions: {', '.join(created)}")
+    purge_delivery_log()
@@ -0,0 +1,34 @@
+from celery import shared_task, group
+from dispatcher.scheduling import scheduler
+from dispatcher.tasks.sending import send_notification
+from dispatcher.settings import SCHEDULE_MAX_BATCHES
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def publish(deliveries: List[Dict[str, Any]]) -> None:
+    """
+    Enqueues a batch of due deliveries, one send_notification task each.
+
+    Args:
+        deliveries (List[Dict[str, Any]]): The send_notification arguments of
+            each delivery.
+    """
+    group([send_notification.s(**delivery) for delivery in deliveries]).apply_async()
+
+
+@shared_task
+def release_scheduled() -> int:
+    """
+    Celery task, run every settings.SCHEDULE_POLL_INTERVAL seconds, that moves the
+    scheduled deliveries that are due to the delivery queues.
+
+    Returns:
+        int: The number of deliveries released.
+    """
+    released = scheduler.release(publish, max_batches=SCHEDULE_MAX_BATCHES)
+    if released:
+        logger.info(f"Released {released} scheduled deliveries")
+    return released
@@ -1,9 +1,17 @@
 from celery import shared_task
 from dispatcher.services.notification_wrapper import NotificationWrapper
-from dispatcher.models import Topic
+from dispatcher.services.engine import DeliveryEngine
+from dispatcher.plans import resolve_plans
+from dispatcher.ratelimit import rate_limiter
+from dispatcher.breaker import CircuitOpenError
+from dispatcher.retries import retry_policy
+from dispatcher.deliverylog import delivery_log
+from dispatcher.metrics import deliveries, failures
+from dispatcher.tracing import tracer
+from dispatcher.models import NotificationDelivery
 import logging
-from typing import Any
-from dispatcher.settings import NOTIFICATION_RETY_TIME
+from typing import Any, Dict, List, Optional
+from dispatcher.settings import NOTIFICATION_MAX_RETRIES, PRIORITY_NORMAL
 
 logger = logging.getLogger(__name__)
 
@@ -13,32 +21,240 @@ def add(x, y):
     return x + y
 
 
-@shared_task(bind=True)
-def send_notification(self, pk: str, message: str, **kwargs: Any) -> None:
+def defer_if_rate_limited(
+    pk: int,
+    message: str,
+    wrapper: NotificationWrapper,
+    retries: int = 0,
+    **kwargs: Any,
+) -> bool:
+    """
+    Reserves a rate limit slot for a delivery and, if the slot is in the future,
+    enqueues the delivery again to run exactly then.
+
+    Args:
+        pk (int): The ID of the Topic instance.
+        message (str): The message to send.
+        wrapper (NotificationWrapper): The wrapper the message is sent through.
+        retries (int): Number of times the delivery was already retried, kept
+            by the deferred task.
+        **kwargs: Additional keyword arguments of the delivery.
+
+    Returns:
+        bool: True if the delivery was deferred.
+    """
+    wait = rate_limiter.reserve(wrapper.plan.method, wrapper.rate_limit_key())
+    if wait <= 0:
+        return False
+
+    logger.info(f"Topic ID {pk} rate limited, sending in {wait:.2f}s")
+    send_notification.apply_async(
+        kwargs={
+            "pk": pk,
+            "message": message,
+            "plan": wrapper.plan.to_dict(),
+            "rate_limit_reserved": True,
+            **kwargs,
+        },
+        countdown=wait,
+        retries=retries,
+    )
+    return True
+
+
+def log_delivery(
+    pk: int,
+    method: str,
+    status: str,
+    attempt: int,
+    wrapper: Optional[NotificationWrapper] = None,
+    error: Optional[Exception] = None,
+) -> None:
+    """
+    Buffers the delivery log row of an attempt to send a message and counts it.
+
+    Args:
+        pk (int): The ID of the Topic instance.
+        method (str): The notification method.
+        status (str): The NotificationDelivery status of the attempt.
+        attempt (int): The attempt number, starting at 1.
+        wrapper (Optional[NotificationWrapper]): The wrapper the message was sent
+            through, which measured the provider latency.
+        error (Optional[Exception]): The error the attempt failed with.
+    """
+    latency = wrapper.latency if wrapper is not None else None
+    delivery_log.record(pk, method, status, attempt, latency, error)
+    deliveries.labels(method=method, status=status).inc()
+    if error is not None and status != NotificationDelivery.DEFERRED:
+        failures.labels(method=method, error=type(error).__name__).inc()
+
+
+@shared_task(bind=True, max_retries=NOTIFICATION_MAX_RETRIES)
+def send_notification(
+    self,
+    pk: str,
+    message: str,
+    plan: Optional[Dict[str, Any]] = None,
+    rate_limit_reserved: bool = False,
+    priority: str = PRIORITY_NORMAL,
+    **kwargs: Any,
+) -> None:
     """
     Celery task to send notifications asynchronously.
 
     Args:
         pk (int): The ID of the Topic instance.
         message (str): The message to send.
+        plan (Optional[Dict[str, Any]]): The serialized delivery plan of the
+            topic. The topic is only loaded when the plan is missing or stale.
+        rate_limit_reserved (bool): Whether the task was deferred to a rate limit
+            slot already reserved for it.
+        priority (str): The priority lane of the message.
         **kwargs: Additional keyword arguments.
 
     Raises:
-        Exception: If any error occurs during the sending process.
+        Exception: If sending failed with a permanent error or too many times.
+        celery.exceptions.Retry: If sending failed and will be retried.
     """
     logger.info(f"Sending topic ID {pk}")
-    topic = Topic.objects.get(id=pk)
+    with tracer.span("resolve_plan"):
+        (delivery_plan,) = resolve_plans([{"pk": pk, "plan": plan}])
 
-    if not hasattr(topic, "notification"):
-        logger.info("This topic has not any notification method, skipping")
+    if delivery_plan is None:
+        logger.info(
+            f"Topic ID {pk} not found or has not any notification method, skipping"
+        )
     else:
+        attempt = self.request.retries + 1
+        notification_wrapper = None
         try:
-            logger.info(f"Topic method: {topic.notification.method}")
-            notification_wrapper = NotificationWrapper(topic)
+            logger.info(f"Topic method: {delivery_plan.method}")
+            notification_wrapper = NotificationWrapper(plan=delivery_plan)
+            if not rate_limit_reserved and defer_if_rate_limited(
+                pk,
+                message,
+                notification_wrapper,
+                retries=self.request.retries,
+                priority=priority,
+                **kwargs,
+            ):
+                return
             notification_wrapper.send(message, **kwargs)
             logger.info(f"Topic ID {pk} sent successfully.")
-        except Topic.DoesNotExist:
-            logger.error(f"Topic with ID {pk} not found.")
+            log_delivery(
+                pk,
+                delivery_plan.method,
+                NotificationDelivery.SENT,
+                attempt,
+                notification_wrapper,
+            )
+        except CircuitOpenError as e:
+            # Deferring does not count as a retry, however long the outage lasts
+            countdown = retry_policy.countdown(0, e)
+            logger.info(f"Topic ID {pk} deferred {countdown:.2f}s: {e}")
+            log_delivery(
+                pk,
+                delivery_plan.method,
+                NotificationDelivery.DEFERRED,
+                attempt,
+                error=e,
+            )
+            send_notification.apply_async(
+                kwargs={
+                    "pk": pk,
+                    "message": message,
+                    "plan": delivery_plan.to_dict(),
+                    "priority": priority,
+                    **kwargs,
+                },
+                countdown=countdown,
+                retries=self.request.retries,
+            )
         except Exception as e:
             logger.error(f"Error sending topic ID {pk}: {e}")
-            raise self.retry(exc=e, countdown=NOTIFICATION_RETY_TIME)
+            countdown = retry_policy.countdown(self.request.retries, e)
+            log_delivery(
+                pk,
+                delivery_plan.method,
+                NotificationDelivery.RETRYING
+                if countdown is not None
+                else NotificationDelivery.FAILED,
+                attempt,
+                notification_wrapper,
+                e,
+            )
+            if countdown is None:
+                logger.error(f"Giving up sending topic ID {pk}")
+                raise
+            # A retry reserves a new rate limit slot for itself
+            raise self.retry(
+                exc=e,
+                countdown=countdown,
+                kwargs={
+                    "pk": pk,
+                    "message": message,
+                    "plan": delivery_plan.to_dict(),
+                    "priority": priority,
+                    **kwargs,
+                },
+            )
+
+
+@shared_task
+def send_notification_batch(deliveries: List[Dict[str, Any]]) -> None:
+    """
+    Celery task to send many notifications concurrently with the async delivery
+    engine. Deliveries that failed with a transient error are handed to
+    send_notification to be retried.
+
+    Args:
+        deliveries (List[Dict[str, Any]]): Items with the Topic 'pk', the
+            'message' to send and, optionally, the serialized delivery 'plan'.
+    """
+    pending = []
+    with tracer.span("resolve_plan", deliveries=len(deliveries)):
+        plans = resolve_plans(deliveries)
+    for delivery, plan in zip(deliveries, plans):
+        if plan is None:
+            logger.info(
+                f"Topic ID {delivery['pk']} not found or has not any notification "
+                "method, skipping"
+            )
+        else:
+            wrapper = NotificationWrapper(plan=plan)
+            # Reserved before the event loop starts, so the cache round trips
+            # of the rate limiter do not block the concurrent sends
+            if not defer_if_rate_limited(
+                delivery["pk"],
+                delivery["message"],
+                wrapper,
+                priority=delivery.get("priority", PRIORITY_NORMAL),
+            ):
+                pending.append((delivery, wrapper))
+
+    errors = DeliveryEngine().run(
+        [(wrapper, delivery["message"]) for delivery, wrapper in pending]
+    )
+    for (delivery, wrapper), error in zip(pending, errors):
+        pk, method = delivery["pk"], wrapper.plan.method
+        if error is None:
+            logger.info(f"Topic ID {pk} sent successfully.")
+            log_delivery(pk, method, NotificationDelivery.SENT, 1, wrapper)
+            continue
+        countdown = retry_policy.countdown(0, error)
+        if isinstance(error, CircuitOpenError):
+            status = NotificationDelivery.DEFERRED
+        elif countdown is None:
+            status = NotificationDelivery.FAILED
+        else:
+            status = NotificationDelivery.RETRYING
+        log_delivery(pk, method, status, 1, wrapper, error)
+        if countdown is None:
+            logger.error(f"Giving up sending topic ID {pk}")
+        else:
+            send_notification.apply_async(
+                kwargs={**delivery, "plan": wrapper.plan.to_dict()},
+                countdown=countdown,
+                # Deliveries deferred by an open circuit were not attempted
+                retries=0 if isinstance(error, CircuitOpenError) else 1,
+            )
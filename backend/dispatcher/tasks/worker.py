@@ -0,0 +1,140 @@
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from dispatcher.deliverylog import delivery_log
+from dispatcher import metrics
+from dispatcher.queues import queue_stats, ready_at
+from dispatcher.services.pool import client_pool
+from dispatcher.services.slack import SlackService
+from dispatcher.services.telegram import TelegramService
+from dispatcher.tracing import tracer
+from dispatcher.settings import METRICS_ENABLED, METRICS_WORKER_PORT
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@worker_process_init.connect
+def warm_client_pool(**kwargs):
+    """
+    Builds the provider clients of each worker process before the first task.
+    """
+    for service_class in (SlackService, TelegramService):
+        try:
+            service_class().disconnect()
+        except KeyError as e:
+            logger.info(f"Skipping {service_class.__name__} client warm-up: {e}")
+
+
+@worker_process_init.connect
+def start_delivery_log(**kwargs):
+    """
+    Starts the thread that flushes the delivery log of each worker process.
+    """
+    delivery_log.start()
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    """
+    Serves the metrics of every process of the worker from its main process,
+    on METRICS_WORKER_PORT.
+    """
+    if METRICS_ENABLED and METRICS_WORKER_PORT:
+        metrics.serve(METRICS_WORKER_PORT)
+        logger.info(f"Serving metrics on port {METRICS_WORKER_PORT}")
+
+
+@worker_process_shutdown.connect
+def close_client_pool(**kwargs):
+    """
+    Closes the pooled provider clients when a worker process exits.
+    """
+    client_pool.close()
+
+
+@worker_process_shutdown.connect
+def close_delivery_log(**kwargs):
+    """
+    Writes the buffered delivery log rows when a worker process exits.
+    """
+    delivery_log.close()
+
+
+@worker_process_shutdown.connect
+def close_metrics(**kwargs):
+    """
+    Drops the live samples of a worker process when it exits.
+    """
+    metrics.mark_process_dead(os.getpid())
+
+
+@before_task_publish.connect
+def stamp_ready_at(headers=None, **kwargs):
+    """
+    Stamps every task message with the time it becomes due, to measure how long
+    it waits in its queue.
+    """
+    if headers is not None:
+        headers["ready_at"] = ready_at(headers)
+
+
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs):
+    """
+    Records how long a task waited in its queue before a worker started it.
+    """
+    due = getattr(task.request, "ready_at", None)
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    if due is None or queue is None:
+        return
+    try:
+        queue_stats.record_wait(queue, max(0.0, time.time() - due))
+    except Exception as e:
+        logger.error(f"Error recording the wait of queue {queue}: {e}")
+
+
+@before_task_publish.connect
+def propagate_trace(headers=None, **kwargs):
+    """
+    Propagates the current trace to the task being published.
+    """
+    traceparent = tracer.traceparent()
+    if headers is not None and traceparent is not None:
+        headers["traceparent"] = traceparent
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    """
+    Continues the trace of a task in a span of its own, after a span for the
+    time it waited in its queue.
+    """
+    handle = tracer.begin(
+        task.name.rsplit(".", 1)[-1],
+        getattr(task.request, "traceparent", None),
+        task_id=task_id,
+        retries=task.request.retries,
+    )
+    task.request.trace_span = handle
+    due = getattr(task.request, "ready_at", None)
+    if handle is not None and due is not None:
+        tracer.record("queue_wait", due, max(due, time.time()))
+
+
+@task_postrun.connect
+def end_task_span(task=None, retval=None, state=None, **kwargs):
+    """
+    Ends the span of a task.
+    """
+    handle = getattr(task.request, "trace_span", None)
+    if handle is not None:
+        handle[0].attributes["state"] = state
+        tracer.end(handle, retval if isinstance(retval, Exception) else None)
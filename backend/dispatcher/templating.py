@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from django.template import Context, Engine, Template
+from dispatcher.settings import TEMPLATE_CACHE_MAX_SIZE
+import dataclasses
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Templates only see the message and topic fields, so they get no loaders and
+# the escaping is left to each service
+engine = Engine(autoescape=False)
+
+
+@dataclasses.dataclass(frozen=True)
+class TemplateSource:
+    """
+    The source of a message template at one of its versions.
+    """
+
+    pk: int
+    version: int
+    body: str
+    subject: str = ""
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return self.pk, self.version
+
+
+@dataclasses.dataclass(frozen=True)
+class RenderedMessage:
+    body: str
+    subject: Optional[str] = None
+
+
+class CompiledTemplate:
+    """
+    A message template parsed into Django template nodes, ready to render.
+    """
+
+    def __init__(self, body: str, subject: str = "") -> None:
+        """
+        Compiles the template.
+
+        Args:
+            body (str): The template of the message body.
+            subject (str): The template of the subject, if the method has one.
+
+        Raises:
+            django.template.TemplateSyntaxError: If a template does not parse.
+        """
+        self.body = Template(body, engine=engine)
+        self.subject = Template(subject, engine=engine) if subject else None
+
+    def render(self, context: Dict[str, Any]) -> RenderedMessage:
+        """
+        Renders the template.
+
+        Args:
+            context (Dict[str, Any]): The template variables, already escaped
+                for the method.
+
+        Returns:
+            RenderedMessage: The body and, if there is a subject template, the
+                subject on a single line.
+        """
+        context = Context(context, autoescape=False)
+        subject = None
+        if self.subject is not None:
+            subject = " ".join(self.subject.render(context).split())
+        return RenderedMessage(body=self.body.render(context), subject=subject)
+
+
+class TemplateCache:
+    """
+    Process-local cache of compiled message templates, keyed by template
+    version.
+
+    A template is parsed the first time a version of it is rendered, every
+    later message only walks the compiled nodes. Editing a template bumps its
+    version, so stale entries are never read again and age out of the cache.
+    """
+
+    def __init__(self, max_size: int = TEMPLATE_CACHE_MAX_SIZE) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int): Maximum number of compiled templates kept.
+        """
+        self.max_size = max_size
+        self._compiled: "OrderedDict[Tuple[int, int], CompiledTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source: TemplateSource) -> CompiledTemplate:
+        """
+        Returns the compiled template of a template version.
+
+        Args:
+            source (TemplateSource): The template source.
+
+        Returns:
+            CompiledTemplate: The template, compiled on first use.
+
+        Raises:
+            django.template.TemplateSyntaxError: If the template does not parse.
+        """
+        with self._lock:
+            compiled = self._compiled.get(source.key)
+            if compiled is not None:
+                self._compiled.move_to_end(source.key)
+                return compiled
+        # Compiled outside the lock, a race only compiles the same version twice
+        compiled = CompiledTemplate(source.body, source.subject)
+        with self._lock:
+            self._compiled[source.key] = compiled
+            if len(self._compiled) > self.max_size:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def render(
+        self,
+        source: TemplateSource,
+        message: str,
+        topic: Dict[str, str],
+        escape: Callable[[str], str] = str,
+    ) -> RenderedMessage:
+        """
+        Renders a message with a template.
+
+        Args:
+            source (TemplateSource): The template source.
+            message (str): The message received from the chatbot.
+            topic (Dict[str, str]): The topic fields, 'name' and 'description'.
+            escape (Callable[[str], str]): Escapes the variables for the markup
+                of the method.
+
+        Returns:
+            RenderedMessage: The rendered message.
+        """
+        context = {
+            "message": escape(message),
+            "topic": {field: escape(value) for field, value in topic.items()},
+        }
+        return self.get(source).render(context)
+
+    def clear(self) -> None:
+        """
+        Drops every compiled template.
+        """
+        with self._lock:
+            self._compiled.clear()
+
+
+template_cache = TemplateCache()
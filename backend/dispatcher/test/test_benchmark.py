@@ -0,0 +1,121 @@
+from django.core import mail
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase
+from unittest.mock import patch
+from dispatcher.benchmark.load import LoadGenerator, percentile, summarize
+from dispatcher.benchmark.stubs import (
+    Recorder,
+    SlackStub,
+    SMTPSink,
+    TelegramStub,
+    marker,
+)
+from dispatcher.services.slack import SlackService
+from dispatcher.services.telegram import TelegramService
+from dispatcher.models import Notification, Topic
+from io import StringIO
+import json
+import math
+import os
+
+
+class LoadTest(SimpleTestCase):
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile(values, 100), 100.0)
+        self.assertTrue(math.isnan(percentile([], 50)))
+
+    def test_summarize_in_milliseconds(self):
+        summary = summarize([0.001, 0.002, 0.003])
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(summary["p50"], 2.0)
+        self.assertEqual(summary["max"], 3.0)
+        self.assertEqual(summary["mean"], 2.0)
+        self.assertIsNone(summarize([])["p99"])
+
+    def test_sends_at_rate_and_counts_errors(self):
+        def send(seq):
+            if seq == 3:
+                raise ConnectionError("refused")
+
+        load = LoadGenerator(send, rate=100, duration=0.1).run()
+
+        self.assertEqual(sorted(load.scheduled), list(range(10)))
+        self.assertEqual(load.errors, 1)
+        self.assertEqual(sorted(load.sent), [0, 1, 2, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(len(load.latencies), 9)
+        # Scheduled 10ms apart from the start
+        self.assertAlmostEqual(load.scheduled[9] - load.scheduled[0], 0.09)
+
+
+class StubTest(SimpleTestCase):
+    def setUp(self):
+        self.recorder = Recorder()
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "token"})
+    def test_telegram_stub(self):
+        with TelegramStub(self.recorder) as stub:
+            with patch.object(TelegramService, "BASE_URL", f"{stub.url}/bot"):
+                TelegramService().send(marker("run", 1), chat_id="1")
+
+        [(seq, provider, _)] = self.recorder.received("run")
+        self.assertEqual((seq, provider), (1, "telegram"))
+
+    @patch.dict(os.environ, {"SLACK_API_TOKEN": "token"})
+    def test_slack_stub(self):
+        with SlackStub(self.recorder) as stub:
+            with patch.object(SlackService, "BASE_URL", f"{stub.url}/api/"):
+                SlackService().send(marker("run", 2), channel="#general")
+
+        [(seq, provider, _)] = self.recorder.received("run")
+        self.assertEqual((seq, provider), (2, "slack"))
+
+    def test_smtp_sink(self):
+        with SMTPSink(self.recorder) as stub:
+            connection = mail.get_connection(
+                "django.core.mail.backends.smtp.EmailBackend",
+                host="127.0.0.1",
+                port=stub.port,
+                use_tls=False,
+                username="",
+                password="",
+            )
+            email = mail.EmailMessage(
+                "Subject", marker("run", 3), "from@example.com", ["to@example.com"]
+            )
+            connection.send_messages([email])
+
+        [(seq, provider, _)] = self.recorder.received("run")
+        self.assertEqual((seq, provider), (3, "email"))
+
+
+class BenchmarkCommandTest(TransactionTestCase):
+    def test_delivers_every_message(self):
+        notifications = Notification.objects.count()
+        out = StringIO()
+        call_command(
+            "benchmark",
+            "--eager",
+            "--json",
+            "--rate=20",
+            "--duration=0.5",
+            "--provider-latency=0",
+            "--drain-timeout=5",
+            "--endpoint=async",
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["endpoint"], "async")
+        self.assertEqual(report["requests"], 10)
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(report["deliveries"], 30)
+        self.assertEqual(report["expected_deliveries"], 30)
+        self.assertEqual(set(report["providers"]), {"email", "slack", "telegram"})
+        self.assertEqual(report["server_cpu_ms"]["count"], 10)
+        # The benchmark fixtures are removed
+        self.assertFalse(Topic.objects.filter(name__startswith="benchmark-").exists())
+        self.assertEqual(Notification.objects.count(), notifications)
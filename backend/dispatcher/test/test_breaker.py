@@ -0,0 +1,150 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from dispatcher.breaker import Circuit, CircuitOpenError, circuit_breaker
+from dispatcher.models import Notification, Topic
+from dispatcher.retries import InvalidNotificationError
+from dispatcher.tasks.sending import send_notification
+from dispatcher.test.test_retries import slack_error
+import os
+import threading
+import requests
+
+
+class CircuitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.circuit = Circuit(
+            Notification.SLACK,
+            "#general",
+            failure_threshold=2,
+            failure_window=30,
+            open_time=10,
+        )
+
+    def _fail(self, error=None):
+        self.circuit.before_send()
+        self.circuit.record_failure(error or requests.ConnectionError())
+
+    def test_opens_after_failure_threshold(self):
+        self._fail()
+        self.circuit.before_send()
+        self._fail()
+
+        with self.assertRaises(CircuitOpenError) as context:
+            self.circuit.before_send()
+        self.assertAlmostEqual(context.exception.retry_after, 10, delta=1)
+        self.assertEqual(self.circuit.status()["state"], "open")
+        self.assertEqual(self.circuit.status()["trips"], 1)
+
+    def test_permanent_errors_do_not_open(self):
+        for _ in range(3):
+            self._fail(InvalidNotificationError("Invalid channel"))
+        self.circuit.before_send()
+        self.assertEqual(self.circuit.status()["state"], "closed")
+
+    def test_rate_limits_do_not_open(self):
+        for _ in range(3):
+            self._fail(
+                slack_error(
+                    "ratelimited", status_code=429, headers={"Retry-After": "3"}
+                )
+            )
+        self.circuit.before_send()
+        self.assertEqual(self.circuit.status()["state"], "closed")
+
+    def test_half_open_lets_one_probe_through(self):
+        self._fail()
+        self._fail()
+        cache.delete(self.circuit._key("open"))
+
+        self.circuit.before_send()
+        other = Circuit(Notification.SLACK, "#general")
+        with self.assertRaises(CircuitOpenError):
+            other.before_send()
+
+        self.circuit.record_success()
+        other.before_send()
+        self.assertEqual(other.status()["state"], "closed")
+
+    def test_failed_probe_opens_again(self):
+        self._fail()
+        self._fail()
+        cache.delete(self.circuit._key("open"))
+
+        self._fail()
+        self.assertEqual(self.circuit.status()["state"], "open")
+        self.assertEqual(self.circuit.status()["trips"], 2)
+
+    def test_concurrent_trips_are_all_listed(self):
+        channels = [f"#channel-{i}" for i in range(8)]
+
+        def trip(channel):
+            Circuit(Notification.SLACK, channel, failure_threshold=1)._open()
+
+        threads = [threading.Thread(target=trip, args=(c,)) for c in channels]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        listed = [circuit["destination"] for circuit in circuit_breaker.status()]
+        self.assertEqual(listed, sorted(channels))
+
+    @patch("dispatcher.breaker.get_redis")
+    def test_index_is_a_redis_set(self, mock_get_redis):
+        redis = mock_get_redis.return_value
+        self._fail()
+        self._fail()
+
+        redis.sadd.assert_called_once_with(
+            self.circuit.index_key, '["Slack", "#general"]'
+        )
+        redis.smembers.return_value = {b'["Slack", "#general"]', b'["Email", null]'}
+        self.assertEqual(
+            [(c["method"], c["destination"]) for c in circuit_breaker.status()],
+            [("Email", None), ("Slack", "#general")],
+        )
+
+
+class CircuitBreakerSendTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        notification = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        self.topic = Topic.objects.create(
+            name="Breaker Topic", description="Breaker test", notification=notification
+        )
+        circuit = circuit_breaker.circuit(Notification.SLACK, "#general")
+        for _ in range(circuit.failure_threshold):
+            circuit.before_send()
+            circuit.record_failure(requests.ConnectionError())
+
+    @patch.dict(os.environ, {"SLACK_API_TOKEN": "dummy_slack_token"})
+    @patch("dispatcher.tasks.sending.send_notification.apply_async")
+    @patch("dispatcher.services.slack.WebClient.chat_postMessage")
+    def test_open_circuit_defers_without_sending(self, mock_post, mock_apply_async):
+        send_notification(pk=self.topic.pk, message="Hello")
+
+        mock_post.assert_not_called()
+        mock_apply_async.assert_called_once()
+        self.assertGreater(mock_apply_async.call_args.kwargs["countdown"], 0)
+        self.assertEqual(mock_apply_async.call_args.kwargs["retries"], 0)
+
+    def test_status_endpoint(self):
+        response = APIClient().get("/api/dispatcher/breakers/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "method": Notification.SLACK,
+                    "destination": "#general",
+                    "state": "open",
+                    "trips": 1,
+                    "failures": 0,
+                }
+            ],
+        )
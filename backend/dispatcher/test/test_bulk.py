@@ -0,0 +1,195 @@
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from dispatcher.bulk import export_topics, import_topics
+from dispatcher.models import Notification, Topic
+from dispatcher.routing import routing_table
+from datetime import time
+import io
+import json
+import os
+import tempfile
+
+SLACK = {"method": Notification.SLACK, "config": {"channel": "#sales"}}
+
+# Optional topic fields of an exported record
+EMPTY = {
+    "chatbot_token": None,
+    "digest_window": None,
+    "digest_max_messages": None,
+    "quiet_hours_end": None,
+}
+
+
+def record_counts(created=0, updated=0):
+    return {"created": created, "updated": updated, "invalid": 0, "errors": []}
+
+
+def record(name, chat_id="123456789", **fields):
+    return {
+        "name": name,
+        "description": f"{name} topic",
+        "notification": {
+            "method": Notification.TELEGRAM,
+            "config": {"chat_id": chat_id},
+        },
+        "additional_notifications": [SLACK],
+        **fields,
+    }
+
+
+def ndjson(*records):
+    return [json.dumps(record).encode() + b"\n" for record in records]
+
+
+class ImportTopicsTest(TestCase):
+    def test_creates_topics_sharing_notifications(self):
+        report = import_topics(
+            ndjson(
+                record("Sales", quiet_hours_start="22:00", quiet_hours_end="08:00"),
+                record("Support", chat_id="987654321"),
+            )
+        )
+
+        self.assertEqual(report.to_dict(), record_counts(created=2))
+        sales = Topic.objects.get(name="Sales")
+        self.assertEqual(sales.notification.config, {"chat_id": "123456789"})
+        self.assertEqual(sales.quiet_hours_start, time(22, 0))
+        self.assertIsNone(sales.digest_window)
+        # The Slack channel of both topics is a single notification
+        self.assertEqual(Notification.objects.filter(config=SLACK["config"]).count(), 1)
+        self.assertEqual(
+            list(Topic.objects.get(name="Support").additional_notifications.all()),
+            list(sales.additional_notifications.all()),
+        )
+
+    def test_queries_do_not_grow_with_the_lines(self):
+        with self.assertNumQueries(6):
+            import_topics(ndjson(*(record(f"Topic {n}", str(n)) for n in range(2))))
+        with self.assertNumQueries(6):
+            import_topics(ndjson(*(record(f"Other {n}", str(n)) for n in range(40))))
+        self.assertEqual(Topic.objects.filter(name__startswith="Other").count(), 40)
+
+    def test_updates_topics_by_name(self):
+        import_topics(ndjson(record("Sales")))
+        sales = Topic.objects.get(name="Sales")
+        notifications = Notification.objects.count()
+
+        report = import_topics(
+            ndjson(record("Sales", digest_window=60, additional_notifications=[]))
+        )
+
+        self.assertEqual(report.to_dict(), record_counts(updated=1))
+        updated = Topic.objects.get(name="Sales")
+        self.assertEqual(updated.digest_window, 60)
+        self.assertGreater(updated.updated_at, sales.updated_at)
+        # The unchanged main notification is kept
+        self.assertEqual(updated.notification_id, sales.notification_id)
+        self.assertEqual(Notification.objects.count(), notifications)
+        self.assertFalse(updated.additional_notifications.exists())
+
+    def test_reports_invalid_lines(self):
+        lines = ndjson(record("Sales"), {"description": "No name"})
+        lines.insert(1, b"{not json\n")
+        lines.insert(2, b"\n")
+        lines += ndjson(
+            record("Bad chat", additional_notifications=[SLACK, {"method": "Slack"}]),
+            record("Bad config", notification={"method": "Slack", "config": {}}),
+            record("Support"),
+        )
+
+        report = import_topics(lines, batch_size=2)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual(report.invalid, 4)
+        errors = {error["line"]: error["errors"] for error in report.errors}
+        self.assertEqual(list(errors), [2, 4, 5, 6])
+        self.assertIn("Invalid JSON", errors[2]["non_field_errors"][0])
+        self.assertIn("name", errors[4])
+        self.assertIn("config", errors[5]["additional_notifications"][1])
+        self.assertEqual(errors[6], {"notification": ["Invalid notification data"]})
+        self.assertEqual(
+            set(Topic.objects.values_list("name", flat=True)) & {"Sales", "Support"},
+            {"Sales", "Support"},
+        )
+
+    def test_invalidates_routing_table(self):
+        routing_table.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            import_topics(ndjson(record("Sales")))
+        self.assertIsNone(routing_table._routes)
+
+
+class ExportTopicsTest(TestCase):
+    def setUp(self):
+        Topic.objects.all().delete()
+        import_topics(ndjson(record("Sales", quiet_hours_start="22:00"), record("HR")))
+
+    def test_round_trip(self):
+        lines = list(export_topics(chunk_size=1))
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            records[0], record("Sales", quiet_hours_start="22:00:00") | EMPTY
+        )
+
+        notifications = Notification.objects.count()
+        report = import_topics(lines)
+        self.assertEqual(report.to_dict(), record_counts(updated=2))
+        self.assertEqual(Notification.objects.count(), notifications)
+        self.assertEqual(list(export_topics()), lines)
+
+    def test_export_queries(self):
+        # One query for the topics and one for their additional notifications
+        with self.assertNumQueries(2):
+            list(export_topics())
+
+
+class BulkEndpointsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_import_and_export(self):
+        response = self.client.post(
+            "/api/dispatcher/topics/import/",
+            b"".join(ndjson(record("Sales"), {"name": "Missing description"})),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["line"], 2)
+
+        response = self.client.get(
+            "/api/dispatcher/topics/export/", HTTP_ACCEPT="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        names = [json.loads(line)["name"] for line in response.streaming_content]
+        self.assertIn("Sales", names)
+
+
+class BulkCommandsTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "topics.ndjson")
+
+    def test_export_then_import(self):
+        with open(self.path, "wb") as f:
+            f.writelines(ndjson(record("Sales")))
+        out = io.StringIO()
+        call_command("import_topics", self.path, stdout=out)
+        self.assertIn("1 created, 0 updated", out.getvalue())
+
+        exported = os.path.join(os.path.dirname(self.path), "exported.ndjson")
+        call_command("export_topics", output=exported, stderr=io.StringIO())
+        with open(exported, "rb") as f:
+            self.assertIn("Sales", [json.loads(line)["name"] for line in f])
+
+    def test_invalid_lines_fail_the_command(self):
+        with open(self.path, "wb") as f:
+            f.writelines(ndjson(record("Sales"), {"name": "Missing description"}))
+        err = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command("import_topics", self.path, stdout=io.StringIO(), stderr=err)
+        self.assertIn("Line 2", err.getvalue())
+        self.assertTrue(Topic.objects.filter(name="Sales").exists())
@@ -0,0 +1,126 @@
+from django.apps import apps as django_apps
+from django.core.management.sql import emit_post_migrate_signal
+from django.test import SimpleTestCase, TestCase, override_settings
+from unittest.mock import MagicMock, patch
+from celery.exceptions import Retry
+from dispatcher.deliverylog import DeliveryLog
+from dispatcher.models import Notification, NotificationDelivery, Topic
+from dispatcher.partitions import ensure_partitions, purge_delivery_log
+from dispatcher.signals import create_delivery_log_partitions
+from dispatcher.tasks.sending import send_notification
+from django.utils import timezone
+from datetime import timedelta
+from importlib import import_module
+import os
+import requests
+
+
+class DeliveryLogTest(TestCase):
+    def setUp(self):
+        notification = Notification.objects.create(
+            method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+        )
+        self.topic = Topic.objects.create(
+            name="Logged Topic", description="Log test", notification=notification
+        )
+
+    def _record(self, log, status=NotificationDelivery.SENT):
+        log.record(self.topic.pk, Notification.TELEGRAM, status, latency=0.0123)
+
+    def test_rows_are_written_in_bulk_when_full(self):
+        log = DeliveryLog(max_size=3, flush_interval=60)
+        with self.assertNumQueries(0):
+            self._record(log)
+            self._record(log)
+        with self.assertNumQueries(1):
+            self._record(log)
+
+        self.assertEqual(NotificationDelivery.objects.count(), 3)
+        delivery = NotificationDelivery.objects.first()
+        self.assertEqual(delivery.topic, self.topic)
+        self.assertEqual(delivery.latency_ms, 12)
+
+    def test_old_rows_are_flushed(self):
+        log = DeliveryLog(max_size=100, flush_interval=1)
+        with patch("dispatcher.deliverylog.time.monotonic", return_value=10.0):
+            self._record(log)
+        with patch("dispatcher.deliverylog.time.monotonic", return_value=11.0):
+            self._record(log)
+        self.assertEqual(NotificationDelivery.objects.count(), 2)
+
+    def test_close_flushes_remaining_rows(self):
+        log = DeliveryLog(max_size=100, flush_interval=60)
+        log.start()
+        self._record(log, NotificationDelivery.FAILED)
+        log.close()
+        self.assertEqual(
+            NotificationDelivery.objects.get().status, NotificationDelivery.FAILED
+        )
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    @patch("dispatcher.tasks.sending.delivery_log.record")
+    @patch("dispatcher.services.telegram.requests.Session.post")
+    def test_send_notification_records_attempt(self, mock_post, mock_record):
+        mock_post.side_effect = requests.ConnectionError("Connection reset")
+        with patch(
+            "dispatcher.tasks.sending.send_notification.retry", side_effect=Retry
+        ):
+            with self.assertRaises(Retry):
+                send_notification(pk=self.topic.pk, message="Hello")
+
+        pk, method, status, attempt, latency, error = mock_record.call_args.args
+        self.assertEqual((pk, method), (self.topic.pk, Notification.TELEGRAM))
+        self.assertEqual((status, attempt), (NotificationDelivery.RETRYING, 1))
+        self.assertIsNotNone(latency)
+        self.assertIsInstance(error, requests.ConnectionError)
+
+    def test_purge_outside_postgres_deletes_old_rows(self):
+        today = timezone.now().date()
+        old = NotificationDelivery.objects.create(
+            topic=self.topic,
+            method=Notification.TELEGRAM,
+            status=NotificationDelivery.SENT,
+            created_at=timezone.now() - timedelta(days=40),
+        )
+        recent = NotificationDelivery.objects.create(
+            topic=self.topic,
+            method=Notification.TELEGRAM,
+            status=NotificationDelivery.SENT,
+        )
+        self.assertEqual(ensure_partitions(today=today), [])
+        purge_delivery_log(retention_days=30, today=today)
+        self.assertQuerysetEqual(
+            NotificationDelivery.objects.all(), [recent], ordered=False
+        )
+        self.assertFalse(NotificationDelivery.objects.filter(pk=old.pk).exists())
+
+
+class PartitionMigrationTest(SimpleTestCase):
+    def test_id_does_not_depend_on_identity_columns(self):
+        migration = import_module("dispatcher.migrations.0006_notificationdelivery")
+        schema_editor = MagicMock()
+        schema_editor.connection.vendor = "postgresql"
+        schema_editor._model_indexes_sql.return_value = []
+
+        migration.partition_delivery_log(django_apps, schema_editor)
+
+        statements = [call.args[0] for call in schema_editor.execute.call_args_list]
+        table = NotificationDelivery._meta.db_table
+        self.assertFalse(any("IDENTITY" in sql for sql in statements))
+        self.assertLess(
+            statements.index(f'DROP TABLE "{table}_old"'),
+            statements.index(f'CREATE SEQUENCE "{table}_id_seq" AS bigint'),
+        )
+        self.assertIn(
+            f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{table}_id_seq"\')',
+            statements,
+        )
+
+    @patch("dispatcher.signals.ensure_partitions")
+    def test_partitions_are_created_on_the_migrated_database(self, mock_ensure):
+        sender = django_apps.get_app_config("dispatcher")
+        with override_settings(DATABASE_REPLICAS=["replica"]):
+            emit_post_migrate_signal(0, False, "replica")
+            mock_ensure.assert_not_called()
+            create_delivery_log_partitions(sender, using="default")
+        mock_ensure.assert_called_once_with(using="default")
@@ -0,0 +1,132 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from datetime import timedelta
+from dispatcher.digest import DigestBuffer, digest_buffer
+from dispatcher.models import Notification, Topic
+from dispatcher.routing import TopicRoute, routing_table
+from dispatcher.scheduling import scheduler
+from dispatcher.tasks.digest import flush_digest
+
+
+class DigestBufferTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.buffer = DigestBuffer()
+        self.route = TopicRoute(
+            pk=1, name="Digest Topic", digest_window=30, digest_max_messages=3
+        )
+
+    def test_first_message_opens_window(self):
+        self.assertEqual(self.buffer.add(self.route, "First"), 30)
+        self.assertIsNone(self.buffer.add(self.route, "Second"))
+
+    def test_full_digest_flushes_now(self):
+        self.buffer.add(self.route, "First")
+        self.buffer.add(self.route, "Second")
+        self.assertEqual(self.buffer.add(self.route, "Third"), 0)
+
+    def test_drain_in_order(self):
+        for message in ("First", "Second"):
+            self.buffer.add(self.route, message)
+        self.assertEqual(self.buffer.drain(1), (["First", "Second"], False))
+        self.assertEqual(self.buffer.drain(1), ([], False))
+
+    def test_drain_reopens_window(self):
+        self.buffer.add(self.route, "First")
+        self.buffer.drain(1)
+        self.assertEqual(self.buffer.add(self.route, "Second"), 30)
+        self.assertEqual(self.buffer.drain(1), (["Second"], False))
+
+    def test_drain_waits_for_missing_messages(self):
+        for message in ("First", "Second", "Third"):
+            self.buffer.add(self.route, message)
+        cache.delete(self.buffer._key(1, 2))
+
+        self.assertEqual(self.buffer.drain(1), (["First"], True))
+        self.assertEqual(self.buffer.drain(1, skip_missing=True), (["Third"], False))
+
+    def test_drain_while_locked(self):
+        self.buffer.add(self.route, "First")
+        cache.add(self.buffer._key(1, "lock"), 1)
+        self.assertEqual(self.buffer.drain(1), ([], False))
+
+
+class DigestDispatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        notification = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        self.topic = Topic.objects.create(
+            name="Digest Topic",
+            description="Digest test",
+            notification=notification,
+            digest_window=30,
+        )
+        routing_table.load()
+
+    def _resolve(self, message, priority="normal"):
+        return self.client.post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Digest Topic", "description": message, "priority": priority},
+            format="json",
+        )
+
+    @patch("dispatcher.views.group")
+    @patch("dispatcher.views.flush_digest.apply_async")
+    def test_messages_are_buffered(self, mock_flush, mock_group):
+        self._resolve("First")
+        self._resolve("Second")
+
+        mock_group.assert_not_called()
+        mock_flush.assert_called_once()
+        self.assertEqual(mock_flush.call_args.kwargs["countdown"], 30)
+
+        with patch("dispatcher.tasks.digest.group") as mock_send_group:
+            flush_digest(**mock_flush.call_args.kwargs["kwargs"])
+        (signature,) = mock_send_group.call_args.args[0]
+        self.assertEqual(signature.kwargs["message"], "First\nSecond")
+        self.assertEqual(signature.kwargs["plan"]["config"], {"channel": "#general"})
+
+    @patch("dispatcher.views.group")
+    @patch("dispatcher.views.flush_digest.apply_async")
+    def test_high_priority_skips_the_digest(self, mock_flush, mock_group):
+        self._resolve("Buffered")
+        self._resolve("Urgent", priority="high")
+
+        mock_flush.assert_called_once()
+        (signature,) = mock_group.call_args.args[0]
+        self.assertEqual(signature.kwargs["message"], "Urgent")
+        self.assertEqual(signature.kwargs["priority"], "high")
+        self.assertEqual(digest_buffer.drain(self.topic.pk), (["Buffered"], False))
+
+    @patch("dispatcher.tasks.digest.group")
+    @patch("dispatcher.views.flush_digest.apply_async")
+    def test_flush_during_quiet_hours_is_scheduled(self, mock_flush, mock_group):
+        scheduler.clear()
+        self.addCleanup(scheduler.clear)
+        now = timezone.localtime()
+        self.topic.quiet_hours_start = (now - timedelta(hours=1)).time()
+        self.topic.quiet_hours_end = (now + timedelta(hours=1)).time()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.topic.save()
+        self._resolve("First")
+
+        flush_digest(**mock_flush.call_args.kwargs["kwargs"])
+
+        mock_group.assert_not_called()
+        self.assertEqual(scheduler.pending(), 1)
+
+    def test_max_messages_without_window_is_rejected(self):
+        response = self.client.post(
+            "/api/dispatcher/topics/import/",
+            b'{"name": "Capped", "description": "No window", '
+            b'"digest_max_messages": 10}\n',
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.data["invalid"], 1)
+        self.assertIn("digest_window", str(response.data["errors"][0]["errors"]))
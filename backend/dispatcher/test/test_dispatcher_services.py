@@ -3,13 +3,17 @@
 from django.test import TestCase
 from unittest.mock import patch, MagicMock
 from dispatcher.models import Notification, Topic
+from dispatcher.retries import RetryAfterError
 from dispatcher.services.telegram import TelegramService
 from dispatcher.services.slack import SlackService
-from dispatcher.services.email import EmailService
+from dispatcher.services.email import EmailService, EmailBatcher
 from dispatcher.services.notification_wrapper import NotificationWrapper
 from django.core import mail
 from django.core.exceptions import ValidationError
+from smtplib import SMTPException, SMTPRecipientsRefused
 import os
+import threading
+import time
 
 
 class TelegramServiceTest(TestCase):
@@ -17,7 +21,7 @@ class TelegramServiceTest(TestCase):
         self.telegram_config = {"chat_id": "123456789"}
 
     @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
-    @patch("dispatcher.services.telegram.requests.post")
+    @patch("dispatcher.services.telegram.requests.Session.post")
     def test_send_success(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -38,7 +42,7 @@ class TelegramServiceTest(TestCase):
         )
 
     @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
-    @patch("dispatcher.services.telegram.requests.post")
+    @patch("dispatcher.services.telegram.requests.Session.post")
     def test_send_invalid_chat_id(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 400
@@ -49,6 +53,24 @@ class TelegramServiceTest(TestCase):
             service.send(message="Hello Telegram!", chat_id="invalid_chat_id")
         self.assertIn("Invalid chat_id", str(context.exception))
 
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    @patch("dispatcher.services.telegram.requests.Session.post")
+    def test_send_rate_limited(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 429
+        mock_response.json.return_value = {
+            "ok": False,
+            "error_code": 429,
+            "description": "Too Many Requests: retry after 7",
+            "parameters": {"retry_after": 7},
+        }
+        mock_post.return_value = mock_response
+
+        service = TelegramService(**self.telegram_config)
+        with self.assertRaises(RetryAfterError) as context:
+            service.send(message="Hello Telegram!", **self.telegram_config)
+        self.assertEqual(context.exception.retry_after, 7)
+
 
 class SlackServiceTest(TestCase):
     def setUp(self):
@@ -89,35 +111,128 @@ class EmailServiceTest(TestCase):
         }
         self.service = EmailService(**self.email_config)
 
-    @patch("dispatcher.services.email.mail.send_mail")
-    def test_send_success(self, mock_send_mail):
+    def test_send_success(self):
         self.service.send(message="Hello Email!", **self.email_config)
-        mock_send_mail.assert_called_once_with(
-            subject="Test Subject",
-            message="Hello Email!",
-            from_email=None,
-            recipient_list=["test@example.com"],
-            fail_silently=False,
-        )
-        self.assertEqual(len(mail.outbox), 0)  # Since send_mail is mocked
+        self.assertEqual(len(mail.outbox), 1)
+        email = mail.outbox[0]
+        self.assertEqual(email.subject, "Test Subject")
+        self.assertEqual(email.body, "Hello Email!")
+        self.assertEqual(email.to, ["test@example.com"])
 
-    @patch("dispatcher.services.email.mail.send_mail")
-    def test_send_invalid_email(self, mock_send_mail):
+    def test_send_invalid_email(self):
         invalid_config = {"recipient_list": ["invalid-email"], "subject": "Test Email"}
         with self.assertRaises(ValidationError):
             service = EmailService(**invalid_config)
             service.send(message="This should fail", **invalid_config)
+        self.assertEqual(len(mail.outbox), 0)
 
-    @patch("dispatcher.services.email.mail.send_mail")
-    def test_send_without_subject(self, mock_send_mail):
+    def test_send_without_subject(self):
         config = {"recipient_list": ["test@example.com"]}
         service = EmailService(**config)
         service.send(message="Hello without subject!", **config)
-        mock_send_mail.assert_called_once()
-        args, kwargs = mock_send_mail.call_args
+        self.assertEqual(len(mail.outbox), 1)
         expected_subject = "Notification: Hello with..."
-        self.assertEqual(kwargs["subject"], expected_subject)
-        self.assertEqual(kwargs["message"], "Hello without subject!")
+        self.assertEqual(mail.outbox[0].subject, expected_subject)
+        self.assertEqual(mail.outbox[0].body, "Hello without subject!")
+
+
+class EmailBatcherTest(TestCase):
+    def setUp(self):
+        self.connection = MagicMock()
+        self.connection.connection = None
+        patcher = patch(
+            "dispatcher.services.email.mail.get_connection",
+            return_value=self.connection,
+        )
+        self.mock_get_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _email(self, body):
+        return mail.EmailMessage(subject="Batch", body=body, to=["test@example.com"])
+
+    def test_reuses_connection(self):
+        batcher = EmailBatcher(flush_interval=0)
+        batcher.send(self._email("First"))
+        batcher.send(self._email("Second"))
+        self.mock_get_connection.assert_called_once()
+        self.connection.open.assert_called_once()
+        self.assertEqual(self.connection.send_messages.call_count, 2)
+
+    def test_lone_sender_does_not_wait(self):
+        batcher = EmailBatcher(flush_interval=5)
+        started = time.monotonic()
+        batcher.send(self._email("Alone"))
+        self.assertLess(time.monotonic() - started, 1)
+        self.connection.send_messages.assert_called_once()
+
+    def test_concurrent_sends_are_batched(self):
+        batcher = EmailBatcher(max_size=3, flush_interval=5)
+        threads = [
+            threading.Thread(target=batcher.send, args=(self._email(str(i)),))
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # The batch is full before the flush interval expires, and is sent
+        # over a single connection
+        self.connection.open.assert_called_once()
+        sent = [
+            message.body
+            for (messages,), _ in self.connection.send_messages.call_args_list
+            for message in messages
+        ]
+        self.assertEqual(sorted(sent), ["0", "1", "2"])
+
+    def test_failure_is_given_to_its_email_only(self):
+        def send_messages(messages):
+            if messages[0].body == "Refused":
+                raise SMTPRecipientsRefused({"test@example.com": (550, b"No")})
+            return len(messages)
+
+        self.connection.send_messages.side_effect = send_messages
+        batcher = EmailBatcher(max_size=3, flush_interval=5)
+        errors = {}
+
+        def send(body):
+            try:
+                batcher.send(self._email(body))
+            except Exception as e:
+                errors[body] = e
+
+        threads = [
+            threading.Thread(target=send, args=(body,))
+            for body in ("First", "Refused", "Last")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(list(errors), ["Refused"])
+        self.assertEqual(self.connection.send_messages.call_count, 3)
+
+    def test_failure_is_raised_and_connection_reset(self):
+        self.connection.send_messages.side_effect = SMTPException("SMTP down")
+        batcher = EmailBatcher(flush_interval=0)
+        with self.assertRaises(SMTPException):
+            batcher.send(self._email("Lost"))
+        self.connection.close.assert_called_once()
+
+        self.connection.send_messages.side_effect = None
+        batcher.send(self._email("Retried"))
+        self.assertEqual(self.mock_get_connection.call_count, 2)
+
+    def test_stale_connection_is_reopened(self):
+        self.connection.connection = MagicMock()
+        self.connection.connection.noop.return_value = (421, b"closing")
+        batcher = EmailBatcher(flush_interval=0, health_check_interval=0)
+        batcher.send(self._email("First"))
+        batcher.send(self._email("Second"))
+        self.connection.close.assert_called_once()
+        self.assertEqual(self.mock_get_connection.call_count, 2)
 
 
 class NotificationWrapperTest(TestCase):
@@ -128,12 +243,11 @@ class NotificationWrapperTest(TestCase):
             "SLACK_API_TOKEN": "dummy_slack_token",
         },
     )
-    @patch("dispatcher.services.email.mail.send_mail")
-    @patch("dispatcher.services.telegram.requests.post")
+    @patch("dispatcher.services.telegram.requests.Session.post")
     @patch("dispatcher.services.slack.WebClient.chat_postMessage")
     @patch("dispatcher.services.slack.WebClient.__init__", return_value=None)
     def test_wrapper_send_email(
-        self, mock_slack_init, mock_slack_post, mock_telegram_post, mock_send_mail
+        self, mock_slack_init, mock_slack_post, mock_telegram_post
     ):
         # Setup
         email_config = {
@@ -154,16 +268,13 @@ class NotificationWrapperTest(TestCase):
         wrapper.send(message="Hello from Wrapper!")
 
         # Assertions
-        mock_send_mail.assert_called_once_with(
-            subject="Wrapper Test Email",
-            message="Hello from Wrapper!",
-            from_email=None,
-            recipient_list=["test@example.com"],
-            fail_silently=False,
-        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Wrapper Test Email")
+        self.assertEqual(mail.outbox[0].body, "Hello from Wrapper!")
+        self.assertEqual(mail.outbox[0].to, ["test@example.com"])
 
     @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
-    @patch("dispatcher.services.telegram.requests.post")
+    @patch("dispatcher.services.telegram.requests.Session.post")
     def test_wrapper_send_telegram(self, mock_post):
         # Setup
         telegram_config = {"chat_id": "987654321"}
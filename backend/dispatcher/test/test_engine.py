@@ -0,0 +1,144 @@
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+from dispatcher.breaker import circuit_breaker
+from dispatcher.models import Notification, Topic
+from dispatcher.services.engine import DeliveryEngine
+from dispatcher.services.notification_wrapper import NotificationWrapper
+from dispatcher.services.pool import async_http_session
+from dispatcher.services.telegram import TelegramService
+from dispatcher.tasks.sending import send_notification_batch
+import asyncio
+import os
+import threading
+
+
+class DeliveryEngineTest(SimpleTestCase):
+    def _wrapper(self, side_effect=None):
+        wrapper = MagicMock()
+        wrapper.asend = AsyncMock(side_effect=side_effect)
+        return wrapper
+
+    def test_run_returns_errors_in_order(self):
+        error = ValueError("Invalid chat_id")
+        wrappers = [self._wrapper(), self._wrapper(error), self._wrapper()]
+        errors = DeliveryEngine().run(
+            [(wrapper, f"Message {i}") for i, wrapper in enumerate(wrappers)]
+        )
+        self.assertEqual(errors, [None, error, None])
+        wrappers[2].asend.assert_awaited_once_with("Message 2")
+
+    def test_concurrency_limit(self):
+        in_flight = 0
+        peak = 0
+
+        async def slow_send(message):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        wrappers = [self._wrapper(slow_send) for _ in range(10)]
+        DeliveryEngine(concurrency=3).run([(wrapper, "Hi") for wrapper in wrappers])
+        self.assertEqual(peak, 3)
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    def test_telegram_asend_uses_engine_session(self):
+        response = MagicMock(status=200)
+        session = MagicMock()
+        session.post.return_value.__aenter__ = AsyncMock(return_value=response)
+        session.post.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        async def send():
+            async_http_session.set(session)
+            await TelegramService().asend(message="Hello", chat_id="123456789")
+
+        asyncio.run(send())
+        session.post.assert_called_once_with(
+            "https://api.telegram.org/botdummy_telegram_token/sendMessage",
+            data={"chat_id": "123456789", "text": "Hello"},
+        )
+        response.raise_for_status.assert_called_once()
+
+
+class AsyncSendTest(TestCase):
+    def setUp(self):
+        notification = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        topic = Topic.objects.create(
+            name="Async Topic", description="Async test", notification=notification
+        )
+        self.wrapper = NotificationWrapper(topic=topic)
+        self.wrapper.client.asend = AsyncMock()
+
+    def _threads(self, circuit):
+        threads = {}
+        for name in ("before_send", "record_success", "record_failure"):
+            method = getattr(circuit, name)
+
+            def record(*args, name=name, method=method):
+                threads[name] = threading.get_ident()
+                return method(*args)
+
+            setattr(circuit, name, record)
+        return threads
+
+    def test_circuit_is_not_checked_on_the_event_loop(self):
+        circuit = circuit_breaker.circuit(Notification.SLACK, "#general")
+        threads = self._threads(circuit)
+
+        async def send():
+            with patch.object(self.wrapper, "circuit", return_value=circuit):
+                await self.wrapper.asend("Hello")
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(send())
+        self.assertEqual(set(threads), {"before_send", "record_success"})
+        self.assertNotIn(loop_thread, threads.values())
+
+    def test_failure_is_not_recorded_on_the_event_loop(self):
+        circuit = circuit_breaker.circuit(Notification.SLACK, "#general")
+        threads = self._threads(circuit)
+        self.wrapper.client.asend.side_effect = ConnectionError("Slack down")
+
+        async def send():
+            with patch.object(self.wrapper, "circuit", return_value=circuit):
+                with self.assertRaises(ConnectionError):
+                    await self.wrapper.asend("Hello")
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(send())
+        self.assertEqual(set(threads), {"before_send", "record_failure"})
+        self.assertNotIn(loop_thread, threads.values())
+
+
+class SendNotificationBatchTest(TestCase):
+    def setUp(self):
+        notification = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        self.topic = Topic.objects.create(
+            name="Batch Topic", description="Batch test", notification=notification
+        )
+
+    @patch("dispatcher.tasks.sending.rate_limiter.reserve", return_value=0.0)
+    @patch("dispatcher.tasks.sending.send_notification.apply_async")
+    @patch("dispatcher.tasks.sending.DeliveryEngine.run")
+    def test_failed_deliveries_are_retried(
+        self, mock_run, mock_apply_async, mock_reserve
+    ):
+        mock_run.return_value = [None, Exception("Slack API Error")]
+        deliveries = [
+            {"pk": self.topic.pk, "message": "First"},
+            {"pk": self.topic.pk, "message": "Second"},
+        ]
+        send_notification_batch(deliveries)
+
+        sent = mock_run.call_args.args[0]
+        self.assertEqual([message for _, message in sent], ["First", "Second"])
+        mock_apply_async.assert_called_once()
+        retried = mock_apply_async.call_args.kwargs["kwargs"]
+        self.assertEqual(retried["pk"], self.topic.pk)
+        self.assertEqual(retried["message"], "Second")
+        self.assertEqual(retried["plan"]["config"], {"channel": "#general"})
@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+from dispatcher.ingest import IngestError, parse_chat_message
+from dispatcher.serializers import ChatMessageSerializer
+
+PAYLOADS = [
+    {"topic_id": "Sales", "description": "Hello"},
+    {"topic_id": "  Sales ", "description": "Hello ", "priority": "high"},
+    {"topic_id": 42, "description": 1.5, "priority": "low"},
+    {"topic_id": "Sales"},
+    {"description": "Hello"},
+    {},
+    {"topic_id": None, "description": "Hello"},
+    {"topic_id": "", "description": "   "},
+    {"topic_id": True, "description": ["Hello"]},
+    {"topic_id": {"name": "Sales"}, "description": "Hello"},
+    {"topic_id": "Sa\x00les", "description": "Hello"},
+    {"topic_id": "Sales", "description": "Hi \ud83d"},
+    {"topic_id": "Sales", "description": "Hello", "priority": "urgent"},
+    {"topic_id": "Sales", "description": "Hello", "priority": None},
+    {"topic_id": "Sales", "description": "Hello", "priority": ""},
+    {"topic_id": "Sales", "description": "Hello", "send_at": "2030-01-01T09:00"},
+    {"topic_id": "Sales", "description": "Hello", "send_at": "2030-01-01T09:00Z"},
+    {"topic_id": "Sales", "description": "Hello", "send_at": "tomorrow"},
+    {"topic_id": "Sales", "description": "Hello", "send_at": None},
+    ["Sales", "Hello"],
+    "Hello",
+    None,
+]
+
+
+class ParseChatMessageTest(SimpleTestCase):
+    def test_matches_serializer(self):
+        for payload in PAYLOADS:
+            with self.subTest(payload=payload):
+                serializer = ChatMessageSerializer(data=payload)
+                if serializer.is_valid():
+                    self.assertEqual(
+                        parse_chat_message(payload),
+                        (
+                            serializer.validated_data["topic_id"],
+                            serializer.validated_data["description"],
+                            serializer.validated_data["priority"],
+                            serializer.validated_data.get("send_at"),
+                        ),
+                    )
+                    continue
+                with self.assertRaises(IngestError) as context:
+                    parse_chat_message(payload)
+                expected = {
+                    field: [str(error) for error in errors]
+                    for field, errors in serializer.errors.items()
+                }
+                self.assertEqual(context.exception.errors, expected)
@@ -0,0 +1,92 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from dispatcher.models import Notification, Topic
+
+
+class TopicListTest(TestCase):
+    url = "/api/dispatcher/topics/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.slack = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        self._topics(3)
+
+    def _topics(self, count):
+        for _ in range(count):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            topic = Topic.objects.create(
+                name=f"Topic {Topic.objects.count()}",
+                description="Listing test",
+                notification=notification,
+            )
+            topic.additional_notifications.add(self.slack)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_constant_number_of_queries(self):
+        queries = self._queries(self.url)
+        self._topics(10)
+        self.assertEqual(self._queries(self.url), queries)
+        self.assertEqual(self._queries("/api/dispatcher/notifications/"), 2)
+
+    def test_cursor_pagination(self):
+        self._topics(2)
+        names = []
+        url = f"{self.url}?page_size=2"
+        while url:
+            response = self.client.get(url)
+            names.extend(topic["name"] for topic in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(
+            names,
+            list(
+                Topic.objects.order_by("created_at", "pk").values_list(
+                    "name", flat=True
+                )
+            ),
+        )
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+
+        with patch("dispatcher.views.TopicSerializer") as serializer:
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        serializer.assert_not_called()
+
+        # Another page has an ETag of its own
+        response = self.client.get(f"{self.url}?page_size=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_modify_the_etag(self):
+        topic = Topic.objects.first()
+        changes = [
+            lambda: Topic.objects.filter(pk=topic.pk).update(
+                updated_at=topic.updated_at
+            ),
+            lambda: topic.additional_notifications.remove(self.slack),
+            lambda: self.slack.additional_topics.clear(),
+            lambda: topic.notification.save(),
+            lambda: Topic.objects.last().delete(),
+        ]
+        etags = [self.client.get(self.url)["ETag"]]
+        for change in changes:
+            change()
+            etags.append(self.client.get(self.url)["ETag"])
+        # Only the first change leaves the list as it was
+        self.assertEqual(etags[0], etags[1])
+        self.assertEqual(len(set(etags[1:])), len(changes))
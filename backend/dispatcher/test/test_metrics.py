@@ -0,0 +1,151 @@
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from dispatcher.metrics import counter, histogram, registry, render
+from dispatcher.models import Notification, NotificationDelivery, Topic
+from dispatcher.tasks.sending import log_delivery
+from prometheus_client import Counter, values
+import os
+import tempfile
+
+QUEUES = [
+    {"queue": "slack", "depth": 2, "latency": 0.5},
+    {"queue": "email", "depth": None, "latency": None},
+]
+
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+@patch("dispatcher.metrics._queue_status", return_value=QUEUES)
+class MetricsRenderTest(SimpleTestCase):
+    def test_queue_gauges_are_collected_on_render(self, mock_queue_status):
+        lines = render().decode().splitlines()
+        self.assertIn('dispatcher_queue_depth{queue="slack"} 2.0', lines)
+        self.assertIn('dispatcher_queue_latency_seconds{queue="slack"} 0.5', lines)
+        self.assertNotIn('queue="email"', "\n".join(lines))
+
+    def test_broken_broker_leaves_queue_gauges_empty(self, mock_queue_status):
+        mock_queue_status.side_effect = ConnectionError("Broker down")
+        self.assertNotIn("dispatcher_queue_depth{", render().decode())
+
+    def test_multiprocess_samples_are_added_up(self, mock_queue_status):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}):
+            # Two worker processes writing the same counter
+            for pid in (101, 102):
+                value_class = values.MultiProcessValue(lambda: pid)
+                with patch("prometheus_client.values.ValueClass", value_class):
+                    Counter("dispatcher_test", "Test.", registry=None).inc()
+
+            lines = render().decode().splitlines()
+        self.assertIn("dispatcher_test_total 2.0", lines)
+        self.assertIn('dispatcher_queue_depth{queue="slack"} 2.0', lines)
+
+    def test_disabled_metrics_record_nothing(self, mock_queue_status):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}):
+            value_class = values.MultiProcessValue(lambda: 101)
+            with patch("prometheus_client.values.ValueClass", value_class):
+                requests = counter("dispatcher_off", "Off.", ["status"], enabled=False)
+                latency = histogram("dispatcher_off_seconds", "Off.", enabled=False)
+                requests.labels(status=200).inc()
+                with latency.time():
+                    pass
+
+        self.assertEqual(os.listdir(directory.name), [])
+        self.assertIsNone(registry.get_sample_value("dispatcher_off_total"))
+        self.assertNotIn("dispatcher_off", render().decode())
+
+
+@patch("dispatcher.metrics._queue_status", return_value=QUEUES)
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            self.topic = Topic.objects.create(
+                name="Metrics Topic",
+                description="Metrics test",
+                notification=notification,
+            )
+
+    @patch("dispatcher.views.group")
+    def test_counts_resolve_requests(self, mock_group, mock_queue_status):
+        name = "dispatcher_resolve_requests_total"
+        sent = sample(name, endpoint="resolve", status="200")
+        missing = sample(name, endpoint="resolve", status="404")
+        lookups = sample("dispatcher_topic_lookup_seconds_count")
+        enqueues = sample("dispatcher_enqueue_seconds_count")
+
+        self.client.post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Metrics Topic", "description": "Hello"},
+            format="json",
+        )
+        self.client.post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Missing", "description": "Hello"},
+            format="json",
+        )
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'dispatcher_queue_depth{queue="slack"} 2.0',
+            response.content.decode().splitlines(),
+        )
+        self.assertEqual(sample(name, endpoint="resolve", status="200"), sent + 1)
+        self.assertEqual(sample(name, endpoint="resolve", status="404"), missing + 1)
+        self.assertEqual(sample("dispatcher_topic_lookup_seconds_count"), lookups + 2)
+        self.assertEqual(sample("dispatcher_enqueue_seconds_count"), enqueues + 1)
+
+    def test_counts_failures_by_error_class(self, mock_queue_status):
+        retrying = sample(
+            "dispatcher_deliveries_total", method="Slack", status="retrying"
+        )
+        sent = sample("dispatcher_deliveries_total", method="Slack", status="sent")
+        failed = sample(
+            "dispatcher_failures_total", method="Slack", error="ConnectionError"
+        )
+
+        error = ConnectionError("refused")
+        log_delivery(
+            self.topic.pk, "Slack", NotificationDelivery.RETRYING, 1, error=error
+        )
+        log_delivery(self.topic.pk, "Slack", NotificationDelivery.SENT, 2)
+
+        self.assertEqual(
+            sample("dispatcher_deliveries_total", method="Slack", status="retrying"),
+            retrying + 1,
+        )
+        self.assertEqual(
+            sample("dispatcher_deliveries_total", method="Slack", status="sent"),
+            sent + 1,
+        )
+        self.assertEqual(
+            sample(
+                "dispatcher_failures_total", method="Slack", error="ConnectionError"
+            ),
+            failed + 1,
+        )
+
+    @patch("dispatcher.views.METRICS_TOKEN", "scraper-token")
+    def test_token_is_required_when_set(self, mock_queue_status):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong-token")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            "/metrics", HTTP_AUTHORIZATION="Bearer scraper-token"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @patch("dispatcher.views.METRICS_ENABLED", False)
+    def test_disabled(self, mock_queue_status):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
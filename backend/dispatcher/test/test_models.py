@@ -92,3 +92,24 @@ class TopicModelTest(TestCase):
         )
         expected_str = f"{topic.name} - {topic.notification}"
         self.assertEqual(str(topic), expected_str)
+
+    def test_topic_targets(self):
+        slack = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        topic = Topic.objects.create(
+            name="Fan-out Topic",
+            description="Several targets",
+            notification=self.notification,
+        )
+        topic.additional_notifications.add(slack, self.notification)
+        self.assertEqual(topic.targets, [self.notification, slack])
+
+    def test_digest_max_messages_needs_window(self):
+        with self.assertRaises(ValueError):
+            Topic.objects.create(
+                name="Capped Topic",
+                description="No window",
+                notification=self.notification,
+                digest_max_messages=10,
+            )
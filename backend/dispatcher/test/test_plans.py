@@ -0,0 +1,84 @@
+from django.test import TestCase
+from unittest.mock import patch
+from dispatcher.models import Notification, Topic
+from dispatcher.plans import DeliveryPlan, resolve_plans
+from dispatcher.routing import routing_table
+from dispatcher.tasks.sending import send_notification
+import os
+
+
+class DeliveryPlanTest(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            self.topic = Topic.objects.create(
+                name="Planned Topic",
+                description="Delivery plan test",
+                notification=self.notification,
+            )
+
+    def _fresh_plan(self):
+        routing_table.load()
+        (plan,) = DeliveryPlan.for_route(routing_table.get("Planned Topic"))
+        return plan
+
+    def test_round_trip(self):
+        plan = self._fresh_plan()
+        self.assertEqual(DeliveryPlan.from_dict(plan.to_dict()), plan)
+
+    def test_other_schema_version_is_ignored(self):
+        data = {**self._fresh_plan().to_dict(), "v": 0}
+        self.assertIsNone(DeliveryPlan.from_dict(data))
+
+    def test_current_plan_skips_database(self):
+        plan = self._fresh_plan()
+        with self.assertNumQueries(0):
+            (resolved,) = resolve_plans([{"pk": self.topic.pk, "plan": plan.to_dict()}])
+        self.assertEqual(resolved, plan)
+
+    def test_stale_plan_is_reloaded(self):
+        plan = self._fresh_plan()
+        self.notification.config = {"chat_id": "987654321"}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification.save()
+        with self.assertNumQueries(3):
+            (resolved,) = resolve_plans([{"pk": self.topic.pk, "plan": plan.to_dict()}])
+        self.assertEqual(resolved.config, {"chat_id": "987654321"})
+
+    def test_missing_plans_are_loaded_together(self):
+        other = Topic.objects.create(name="Silent Topic", description="No method")
+        deliveries = [{"pk": self.topic.pk}, {"pk": other.pk}, {"pk": 0}]
+        with self.assertNumQueries(3):
+            resolved = resolve_plans(deliveries)
+        self.assertEqual(resolved[0].method, Notification.TELEGRAM)
+        self.assertEqual(resolved[1:], [None, None])
+
+    def test_removed_target_is_skipped(self):
+        slack = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        self.topic.additional_notifications.add(slack)
+        routing_table.load()
+        plans = DeliveryPlan.for_route(routing_table.get("Planned Topic"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.topic.additional_notifications.remove(slack)
+
+        resolved = resolve_plans(
+            [{"pk": self.topic.pk, "plan": plan.to_dict()} for plan in plans]
+        )
+        self.assertEqual(resolved[0].method, Notification.TELEGRAM)
+        self.assertIsNone(resolved[1])
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    @patch("dispatcher.services.telegram.requests.Session.post")
+    def test_send_notification_with_current_plan(self, mock_post):
+        mock_post.return_value.status_code = 200
+        plan = self._fresh_plan()
+        with self.assertNumQueries(0):
+            send_notification(pk=self.topic.pk, message="Hello", plan=plan.to_dict())
+        self.assertEqual(
+            mock_post.call_args.kwargs["data"],
+            {"chat_id": "123456789", "text": "Hello"},
+        )
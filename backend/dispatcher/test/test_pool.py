@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase
+from unittest.mock import MagicMock, patch
+from dispatcher.services.pool import ClientPool
+from dispatcher.services.telegram import TelegramService
+import os
+
+
+class ClientPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.pool = ClientPool(max_size=2)
+
+    def test_reuses_client_per_credential(self):
+        first = self.pool.http_session("token-a")
+        self.assertIs(self.pool.http_session("token-a"), first)
+        self.assertIsNot(self.pool.http_session("token-b"), first)
+
+    def test_evicts_least_recently_used(self):
+        clients = {key: MagicMock() for key in ("a", "b", "c")}
+        for key in ("a", "b"):
+            self.pool.get("http", key, lambda key=key: clients[key])
+        # Touch "a" so "b" becomes the least recently used
+        self.pool.get("http", "a", MagicMock)
+        self.pool.get("http", "c", lambda: clients["c"])
+
+        self.assertEqual(len(self.pool), 2)
+        clients["b"].close.assert_called_once()
+        clients["a"].close.assert_not_called()
+
+    def test_close(self):
+        client = MagicMock()
+        self.pool.get("http", "a", lambda: client)
+        self.pool.close()
+        client.close.assert_called_once()
+        self.assertEqual(len(self.pool), 0)
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    def test_services_share_pooled_session(self):
+        with patch("dispatcher.services.telegram.client_pool", self.pool):
+            first = TelegramService()
+            second = TelegramService()
+        self.assertIs(first.session, second.session)
@@ -0,0 +1,157 @@
+from celery import current_app
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from unittest.mock import MagicMock, patch
+from dispatcher.models import Notification, Topic
+from dispatcher.queues import QueueStats, route_task
+from dispatcher.tasks.sending import send_notification_batch
+from dispatcher.tasks.worker import record_queue_wait
+
+
+class RouteTaskTest(SimpleTestCase):
+    def test_deliveries_are_routed_by_method_and_priority(self):
+        options = current_app.amqp.router.route(
+            {},
+            "dispatcher.tasks.sending.send_notification",
+            kwargs={"pk": 1, "plan": {"method": "Slack"}, "priority": "high"},
+        )
+        self.assertEqual(options["queue"].name, "slack")
+        self.assertEqual(options["priority"], 0)
+
+    def test_batches_are_routed_by_their_deliveries(self):
+        route = route_task(
+            "dispatcher.tasks.sending.send_notification_batch",
+            (),
+            {"deliveries": [{"pk": 1, "plan": {"method": "Email"}}]},
+            {},
+        )
+        self.assertEqual(route, {"queue": "email", "priority": 3})
+
+    def test_batches_of_the_view_are_routed(self):
+        lane = [{"pk": 1, "plan": {"method": "Telegram"}, "priority": "high"}]
+        for signature in (
+            send_notification_batch.s(deliveries=lane),
+            send_notification_batch.s(lane),
+        ):
+            with self.subTest(signature=signature):
+                options = current_app.amqp.router.route(
+                    {}, signature.task, args=signature.args, kwargs=signature.kwargs
+                )
+                self.assertEqual(options["queue"].name, "telegram")
+                self.assertEqual(options["priority"], 0)
+
+    def test_other_tasks_use_the_default_queue(self):
+        self.assertIsNone(
+            route_task("dispatcher.tasks.digest.flush_digest", (), {"pk": 1}, {})
+        )
+        self.assertEqual(
+            route_task("dispatcher.tasks.sending.send_notification", (), {"pk": 1}, {})[
+                "queue"
+            ],
+            "celery",
+        )
+
+
+class PriorityViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            slack = Notification.objects.create(
+                method=Notification.SLACK, config={"channel": "#general"}
+            )
+            email = Notification.objects.create(
+                method=Notification.EMAIL, config={"recipient_list": ["a@example.com"]}
+            )
+            topic = Topic.objects.create(
+                name="Lanes Topic", description="Lanes test", notification=slack
+            )
+            topic.additional_notifications.add(email)
+
+    @patch("dispatcher.views.group")
+    def test_priority_is_carried_by_deliveries(self, mock_group):
+        self.client.post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Lanes Topic", "description": "Down!", "priority": "high"},
+            format="json",
+        )
+        signatures = mock_group.call_args.args[0]
+        self.assertEqual(
+            [signature.kwargs["priority"] for signature in signatures],
+            ["high", "high"],
+        )
+
+    @patch("dispatcher.views.ASYNC_DELIVERY_ENABLED", True)
+    @patch("dispatcher.views.group")
+    def test_batches_hold_one_lane(self, mock_group):
+        payload = [
+            {"topic_id": "Lanes Topic", "description": "First", "priority": "low"},
+            {"topic_id": "Lanes Topic", "description": "Second"},
+        ]
+        self.client.post("/api/dispatcher/resolve/batch/", payload, format="json")
+
+        lanes = [
+            {
+                (delivery["plan"]["method"], delivery["priority"])
+                for delivery in signature.kwargs["deliveries"]
+            }
+            for signature in mock_group.call_args.args[0]
+        ]
+        self.assertEqual(len(lanes), 4)
+        self.assertTrue(all(len(lane) == 1 for lane in lanes))
+
+
+class QueueStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stats = QueueStats(smoothing=0.5)
+
+    @patch("dispatcher.queues.QueueStats.depths", return_value={})
+    def test_record_wait(self, mock_depths):
+        self.stats.record_wait("slack", 2.0)
+        self.stats.record_wait("slack", 4.0)
+        stats = next(s for s in self.stats.status(None) if s["queue"] == "slack")
+        self.assertEqual(stats["latency"], 3.0)
+        self.assertEqual(stats["last_latency"], 4.0)
+        self.assertEqual(stats["tasks"], 2)
+
+    @patch("dispatcher.queues.get_redis")
+    def test_redis_stats(self, mock_get_redis):
+        redis = mock_get_redis.return_value
+        self.stats.record_wait("slack", 2.0)
+        redis.register_script.return_value.assert_called_once_with(
+            keys=["dispatcher:queues:slack"], args=[2.0, 0.5]
+        )
+
+        pipe = redis.pipeline.return_value.__enter__.return_value
+        pipe.execute.return_value = [
+            {b"latency": b"3", b"last_latency": b"4", b"tasks": b"2"}
+        ]
+        self.assertEqual(
+            self.stats._read(["dispatcher:queues:slack"]),
+            [{"latency": 3.0, "last_latency": 4.0, "tasks": 2}],
+        )
+
+    @patch("dispatcher.tasks.worker.time.time", return_value=105.0)
+    @patch("dispatcher.tasks.worker.queue_stats")
+    def test_wait_is_recorded_when_task_starts(self, mock_stats, mock_time):
+        task = MagicMock()
+        task.request.ready_at = 100.0
+        task.request.delivery_info = {"routing_key": "telegram"}
+        record_queue_wait(task=task)
+        mock_stats.record_wait.assert_called_once_with("telegram", 5.0)
+
+    @patch("dispatcher.queues.QueueStats.depths", return_value={"slack": 7})
+    def test_status_endpoint(self, mock_depths):
+        self.stats.record_wait("slack", 1.5)
+        with patch("dispatcher.views.queue_stats", self.stats):
+            response = APIClient().get("/api/dispatcher/queues/")
+
+        self.assertEqual(response.status_code, 200)
+        slack = next(queue for queue in response.json() if queue["queue"] == "slack")
+        self.assertEqual(slack["depth"], 7)
+        self.assertEqual(slack["latency"], 1.5)
+        self.assertEqual(
+            {queue["queue"] for queue in response.json()},
+            {"email", "slack", "telegram", "celery"},
+        )
@@ -0,0 +1,93 @@
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import patch
+from dispatcher.models import Notification, Topic
+from dispatcher.plans import DeliveryPlan
+from dispatcher.ratelimit import RateLimiter
+from dispatcher.tasks.sending import send_notification
+import os
+
+
+class RateLimiterTest(SimpleTestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(limits={"Slack": (2.0, 2)})
+
+    def test_burst_then_reserved_slots(self):
+        with patch("dispatcher.ratelimit.time.monotonic", return_value=100.0):
+            waits = [self.limiter.reserve("Slack", "#general") for _ in range(4)]
+        self.assertEqual(waits, [0.0, 0.0, 0.5, 1.0])
+
+    def test_tokens_refill(self):
+        with patch("dispatcher.ratelimit.time.monotonic", return_value=100.0):
+            self.limiter.reserve("Slack", "#general")
+            self.limiter.reserve("Slack", "#general")
+        with patch("dispatcher.ratelimit.time.monotonic", return_value=100.5):
+            self.assertEqual(self.limiter.reserve("Slack", "#general"), 0.0)
+
+    def test_destinations_are_independent(self):
+        with patch("dispatcher.ratelimit.time.monotonic", return_value=100.0):
+            for _ in range(2):
+                self.limiter.reserve("Slack", "#general")
+            self.assertEqual(self.limiter.reserve("Slack", "#alerts"), 0.0)
+
+    def test_unlimited_deliveries(self):
+        self.assertEqual(self.limiter.reserve("Email", "test@example.com"), 0.0)
+        self.assertEqual(self.limiter.reserve("Slack", None), 0.0)
+
+    @patch("dispatcher.ratelimit.get_redis")
+    def test_redis_bucket(self, mock_get_redis):
+        script = mock_get_redis.return_value.register_script.return_value
+        script.return_value = b"0.25"
+        self.assertEqual(self.limiter.reserve("Slack", "#general"), 0.25)
+        script.assert_called_once_with(
+            keys=["dispatcher:ratelimit:Slack:#general"], args=[2.0, 2]
+        )
+
+
+class RateLimitedSendTest(TestCase):
+    def setUp(self):
+        notification = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        topic = Topic.objects.create(
+            name="Limited Topic",
+            description="Rate limit test",
+            notification=notification,
+        )
+        self.plan = DeliveryPlan.from_topic(topic)
+
+    @patch.dict(os.environ, {"SLACK_API_TOKEN": "dummy_slack_token"})
+    @patch("dispatcher.tasks.sending.send_notification.apply_async")
+    @patch("dispatcher.tasks.sending.rate_limiter.reserve", return_value=0.75)
+    @patch("dispatcher.services.slack.WebClient.chat_postMessage")
+    def test_over_limit_is_deferred(self, mock_post, mock_reserve, mock_apply_async):
+        send_notification(pk=self.plan.topic, message="Hello", plan=self.plan.to_dict())
+
+        mock_post.assert_not_called()
+        mock_reserve.assert_called_once_with(Notification.SLACK, "#general")
+        self.assertEqual(mock_apply_async.call_args.kwargs["countdown"], 0.75)
+        self.assertTrue(
+            mock_apply_async.call_args.kwargs["kwargs"]["rate_limit_reserved"]
+        )
+
+    @patch.dict(os.environ, {"SLACK_API_TOKEN": "dummy_slack_token"})
+    @patch("dispatcher.tasks.sending.send_notification.apply_async")
+    @patch("dispatcher.tasks.sending.rate_limiter.reserve", return_value=0.75)
+    @patch("dispatcher.services.slack.WebClient.chat_postMessage")
+    def test_deferral_keeps_retries(self, mock_post, mock_reserve, mock_apply_async):
+        send_notification.apply(
+            kwargs={"pk": self.plan.topic, "message": "Hello"}, retries=3
+        )
+        self.assertEqual(mock_apply_async.call_args.kwargs["retries"], 3)
+
+    @patch.dict(os.environ, {"SLACK_API_TOKEN": "dummy_slack_token"})
+    @patch("dispatcher.tasks.sending.rate_limiter.reserve", return_value=0.75)
+    @patch("dispatcher.services.slack.WebClient.chat_postMessage")
+    def test_reserved_slot_is_sent(self, mock_post, mock_reserve):
+        send_notification(
+            pk=self.plan.topic,
+            message="Hello",
+            plan=self.plan.to_dict(),
+            rate_limit_reserved=True,
+        )
+        mock_reserve.assert_not_called()
+        mock_post.assert_called_once_with(text="Hello", channel="#general")
@@ -0,0 +1,107 @@
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import MagicMock, patch
+from celery.exceptions import Retry
+from dispatcher.models import Notification, Topic
+from dispatcher.retries import InvalidNotificationError, RetryAfterError, RetryPolicy
+from dispatcher.tasks.sending import send_notification
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.slack_response import SlackResponse
+import json
+import os
+import requests
+
+
+def slack_error(error, status_code=200, headers=None):
+    response = SlackResponse(
+        client=None,
+        http_verb="POST",
+        api_url="https://slack.com/api/chat.postMessage",
+        req_args={},
+        data={"ok": False, "error": error},
+        headers=headers or {},
+        status_code=status_code,
+    )
+    return SlackApiError("Slack API Error", response)
+
+
+def http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(response=response)
+
+
+@patch("dispatcher.retries.random.uniform", side_effect=lambda low, high: high)
+class RetryPolicyTest(SimpleTestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(base_delay=5, max_delay=60, max_retries=8)
+
+    def test_exponential_backoff(self, mock_uniform):
+        delays = [self.policy.countdown(n, Exception("Timeout")) for n in range(6)]
+        self.assertEqual(delays, [5, 10, 20, 40, 60, 60])
+        mock_uniform.assert_called_with(0, 60)
+
+    def test_gives_up_after_max_retries(self, mock_uniform):
+        self.assertIsNone(self.policy.countdown(8, Exception("Timeout")))
+
+    def test_permanent_errors_are_not_retried(self, mock_uniform):
+        for error in (
+            InvalidNotificationError("Invalid chat_id"),
+            slack_error("channel_not_found"),
+            http_error(403),
+        ):
+            with self.subTest(error=error):
+                self.assertIsNone(self.policy.countdown(0, error))
+
+    def test_transient_errors_are_retried(self, mock_uniform):
+        for error in (
+            slack_error("internal_error", status_code=500),
+            http_error(502),
+            http_error(429),
+            requests.ConnectionError(),
+            # A garbled provider response, not an invalid config
+            json.JSONDecodeError("Expecting value", "", 0),
+        ):
+            with self.subTest(error=error):
+                self.assertEqual(self.policy.countdown(0, error), 5)
+
+    def test_retry_after(self, mock_uniform):
+        self.assertEqual(self.policy.countdown(0, RetryAfterError("Slow", 7)), 12)
+        error = slack_error(
+            "ratelimited", status_code=429, headers={"Retry-After": "30"}
+        )
+        self.assertEqual(self.policy.countdown(3, error), 35)
+
+
+class SendNotificationRetryTest(TestCase):
+    def setUp(self):
+        notification = Notification.objects.create(
+            method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+        )
+        self.topic = Topic.objects.create(
+            name="Retry Topic", description="Retry test", notification=notification
+        )
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    @patch("dispatcher.tasks.sending.send_notification.retry", side_effect=Retry)
+    @patch("dispatcher.services.telegram.requests.Session.post")
+    def test_transient_error_is_retried(self, mock_post, mock_retry):
+        mock_post.side_effect = requests.ConnectionError("Connection reset")
+
+        with patch("dispatcher.retries.random.uniform", return_value=3.5):
+            with self.assertRaises(Retry):
+                send_notification(pk=self.topic.pk, message="Hello")
+
+        self.assertEqual(mock_retry.call_args.kwargs["countdown"], 3.5)
+        retried = mock_retry.call_args.kwargs["kwargs"]
+        self.assertEqual(retried["plan"]["config"], {"chat_id": "123456789"})
+        self.assertNotIn("rate_limit_reserved", retried)
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    @patch("dispatcher.tasks.sending.send_notification.retry")
+    @patch("dispatcher.services.telegram.requests.Session.post")
+    def test_permanent_error_is_not_retried(self, mock_post, mock_retry):
+        mock_post.return_value = MagicMock(status_code=400)
+
+        with self.assertRaises(InvalidNotificationError):
+            send_notification(pk=self.topic.pk, message="Hello")
+        mock_retry.assert_not_called()
@@ -0,0 +1,98 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from unittest.mock import patch
+from dispatcher.models import NotificationDelivery, Topic
+from dispatcher.routers import ReplicaRouter
+from dispatcher.routing import routing_table
+from dispatcher.settings import REPLICA_PIN_KEY, REPLICA_PIN_SECONDS
+import time
+
+ROUTER = ["dispatcher.routers.ReplicaRouter"]
+
+
+class ReplicaRouterTest(TransactionTestCase):
+    # Two separate databases, so reads from the replica are told apart by the
+    # rows written to it alone
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        # A new router for each test, disabled before the databases are flushed
+        replicas = override_settings(
+            DATABASE_ROUTERS=ROUTER, DATABASE_REPLICAS=["replica"]
+        )
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        Topic.objects.using("replica").create(name="Replica only", description="")
+        cache.clear()
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(router.db_for_read(Topic), "replica")
+        self.assertTrue(Topic.objects.filter(name="Replica only").exists())
+        self.assertIn("Replica only", routing_table.load())
+
+    def test_route_writes_pin_reads_to_primary(self):
+        Topic.objects.create(name="Primary only", description="")
+
+        self.assertTrue(Topic.objects.filter(name="Primary only").exists())
+        # Other processes see the pin through the cache
+        self.assertEqual(ReplicaRouter().db_for_read(Topic), "default")
+
+        later = time.time() + REPLICA_PIN_SECONDS + 1
+        with patch("dispatcher.routers.time.time", return_value=later):
+            self.assertEqual(router.db_for_read(Topic), "replica")
+            self.assertEqual(ReplicaRouter().db_for_read(Topic), "replica")
+
+    def test_pin_starts_at_commit(self):
+        with transaction.atomic():
+            Topic.objects.create(name="Primary only", description="")
+            self.assertIsNone(cache.get(REPLICA_PIN_KEY))
+
+        self.assertIsNotNone(cache.get(REPLICA_PIN_KEY))
+        self.assertEqual(ReplicaRouter().db_for_read(Topic), "default")
+
+    def test_rolled_back_writes_do_not_pin(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Topic.objects.create(name="Primary only", description="")
+            raise RuntimeError
+
+        self.assertEqual(router.db_for_read(Topic), "replica")
+
+    def test_delivery_log_writes_do_not_pin(self):
+        NotificationDelivery.objects.create(
+            topic_id=1, method="Slack", status=NotificationDelivery.SENT
+        )
+        self.assertEqual(router.db_for_read(Topic), "replica")
+
+    def test_rows_read_from_replica_are_saved_to_primary(self):
+        topic = Topic.objects.get(name="Replica only")
+        self.assertEqual(topic._state.db, "replica")
+        # Related rows come from the same database
+        self.assertEqual(
+            router.db_for_read(Topic, instance=topic),
+            "replica",
+        )
+
+        topic.description = "Edited"
+        topic.save()
+        self.assertEqual(
+            Topic.objects.using("default").get(name="Replica only").description,
+            "Edited",
+        )
+
+    def test_transactions_read_primary(self):
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Topic), "default")
+
+    def test_only_dispatcher_models_and_no_replica_migrations(self):
+        self.assertEqual(router.db_for_read(User), "default")
+        self.assertFalse(router.allow_migrate("replica", "dispatcher"))
+        self.assertTrue(router.allow_migrate("default", "dispatcher"))
+
+
+class NoReplicaRouterTest(SimpleTestCase):
+    def test_inert_without_replicas(self):
+        replica_router = ReplicaRouter()
+        self.assertIsNone(replica_router.db_for_read(Topic))
+        self.assertIsNone(replica_router.db_for_write(Topic))
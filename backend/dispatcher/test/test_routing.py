@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import TestCase
+from unittest.mock import patch
+from dispatcher.models import Notification, Topic
+from dispatcher.routing import RouteTarget, RoutingTable, routing_table
+
+
+class RoutingTableTest(TestCase):
+    def setUp(self):
+        self.table = RoutingTable(check_interval=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification = Notification.objects.create(
+                method=Notification.SLACK, config={"channel": "#general"}
+            )
+            self.topic = Topic.objects.create(
+                name="Routed Topic",
+                description="Routing table test",
+                notification=self.notification,
+                chatbot_token="token-ref",
+            )
+
+    def test_get_route(self):
+        route = self.table.get("Routed Topic")
+        self.assertEqual(route.pk, self.topic.pk)
+        self.assertEqual(
+            route.targets,
+            (
+                RouteTarget(
+                    notification=self.notification.pk,
+                    method=Notification.SLACK,
+                    config={"channel": "#general"},
+                ),
+            ),
+        )
+        self.assertEqual(route.chatbot_token, "token-ref")
+
+    def test_get_does_not_query_once_loaded(self):
+        self.table.load()
+        with self.assertNumQueries(0):
+            self.table.get("Routed Topic")
+
+    def test_get_unknown_topic(self):
+        with self.assertRaises(Topic.DoesNotExist):
+            self.table.get("Unknown Topic")
+
+    async def test_aget(self):
+        table = RoutingTable(check_interval=60)
+        route = await table.aget("Routed Topic")
+        self.assertEqual(route.pk, self.topic.pk)
+
+        # Served from the loaded table without leaving the event loop
+        with patch("dispatcher.routing.sync_to_async") as mock_sync_to_async:
+            self.assertEqual(await table.aget("Routed Topic"), route)
+            with self.assertRaises(Topic.DoesNotExist):
+                await table.aget("Unknown Topic")
+        mock_sync_to_async.assert_not_called()
+
+    def test_topic_without_notification(self):
+        Topic.objects.create(name="Silent Topic", description="No notification")
+        self.assertEqual(self.table.get("Silent Topic").targets, ())
+
+    def test_additional_notifications(self):
+        email = Notification.objects.create(
+            method=Notification.EMAIL, config={"recipient_list": ["a@example.com"]}
+        )
+        self.topic.additional_notifications.add(email, self.notification)
+        route = routing_table.get("Routed Topic")
+        self.assertEqual(
+            [target.method for target in route.targets],
+            [Notification.SLACK, Notification.EMAIL],
+        )
+
+    def test_shared_version_bump_reloads(self):
+        self.table.load()
+        # Another process changed a route
+        Topic.objects.filter(pk=self.topic.pk).update(chatbot_token="new-ref")
+        cache.incr(self.table.version_key)
+        self.assertEqual(self.table.get("Routed Topic").chatbot_token, "new-ref")
+
+    def test_save_invalidates_routes(self):
+        routing_table.load()
+        self.notification.config = {"channel": "#alerts"}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification.save()
+        (target,) = routing_table.get("Routed Topic").targets
+        self.assertEqual(target.config, {"channel": "#alerts"})
+
+    def test_delete_invalidates_routes(self):
+        routing_table.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.topic.delete()
+        with self.assertRaises(Topic.DoesNotExist):
+            routing_table.get("Routed Topic")
@@ -0,0 +1,173 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from unittest.mock import MagicMock, patch
+from dispatcher.models import Notification, Topic
+from dispatcher.routing import TopicRoute
+from dispatcher.scheduling import Scheduler, deliver_at, scheduler
+from dispatcher.tasks.scheduling import publish, release_scheduled
+from datetime import datetime, time, timedelta
+
+
+class SchedulerTest(SimpleTestCase):
+    def setUp(self):
+        self.scheduler = Scheduler(key="test:schedule", batch_size=2)
+        self.now = timezone.now()
+
+    def _at(self, seconds):
+        return self.now + timedelta(seconds=seconds)
+
+    def test_releases_due_deliveries_in_order(self):
+        self.scheduler.schedule([{"message": "later"}], self._at(60))
+        self.scheduler.schedule([{"message": "second"}], self._at(20))
+        self.scheduler.schedule([{"message": "first"}], self._at(10))
+
+        batches = []
+        released = self.scheduler.release(batches.append, now=self._at(30).timestamp())
+        self.assertEqual(released, 2)
+        self.assertEqual(batches, [[{"message": "first"}, {"message": "second"}]])
+        self.assertEqual(self.scheduler.pending(), 1)
+
+    def test_releases_in_batches(self):
+        deliveries = [{"message": "same"}] * 5
+        self.scheduler.schedule(deliveries, self._at(0))
+        self.assertEqual(self.scheduler.pending(), 5)
+
+        batches = []
+        now = self._at(1).timestamp()
+        self.scheduler.release(batches.append, max_batches=2, now=now)
+        self.assertEqual([len(batch) for batch in batches], [2, 2])
+        self.scheduler.release(batches.append, now=now)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+
+    def test_failed_publish_keeps_deliveries(self):
+        self.scheduler.schedule([{"message": "Hello"}], self._at(0))
+        with self.assertRaises(ConnectionError):
+            self.scheduler.release(
+                MagicMock(side_effect=ConnectionError("Broker down")),
+                now=self._at(1).timestamp(),
+            )
+        self.assertEqual(self.scheduler.pending(), 1)
+
+    @patch("dispatcher.scheduling.get_redis")
+    def test_redis_deliveries_are_leased_until_published(self, mock_get_redis):
+        redis = mock_get_redis.return_value
+        script = redis.register_script.return_value
+        member = '{"id": "1", "delivery": {"message": "Hello"}}'
+        script.side_effect = [[member.encode(), b"10.0"], []]
+        scheduler = Scheduler(key="test:schedule", batch_size=2, lease_seconds=30)
+
+        publish = MagicMock(side_effect=lambda batch: redis.zrem.assert_not_called())
+        self.assertEqual(scheduler.release(publish, now=20.0), 1)
+
+        publish.assert_called_once_with([{"message": "Hello"}])
+        script.assert_called_with(keys=["test:schedule"], args=[20.0, 2, 50.0])
+        redis.zrem.assert_called_once_with("test:schedule", member)
+
+
+class DeliverAtTest(SimpleTestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2030, 1, 1, 23, 0))
+        self.route = TopicRoute(
+            pk=1,
+            name="Quiet Topic",
+            quiet_hours_start=time(22, 0),
+            quiet_hours_end=time(8, 0),
+        )
+
+    def test_send_at(self):
+        route = TopicRoute(pk=1, name="Topic")
+        later = self.now + timedelta(hours=1)
+        self.assertEqual(deliver_at(route, later, now=self.now), later)
+        self.assertIsNone(
+            deliver_at(route, self.now - timedelta(hours=1), now=self.now)
+        )
+        self.assertIsNone(deliver_at(route, now=self.now))
+
+    def test_quiet_hours_wrap_midnight(self):
+        morning = timezone.make_aware(datetime(2030, 1, 2, 8, 0))
+        self.assertEqual(deliver_at(self.route, now=self.now), morning)
+        early = timezone.make_aware(datetime(2030, 1, 2, 6, 0))
+        self.assertEqual(deliver_at(self.route, early, now=self.now), morning)
+        self.assertIsNone(
+            deliver_at(self.route, now=timezone.make_aware(datetime(2030, 1, 1, 12, 0)))
+        )
+
+    def test_high_priority_ignores_quiet_hours(self):
+        self.assertIsNone(deliver_at(self.route, priority="high", now=self.now))
+
+
+class ScheduledResolveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        scheduler.clear()
+        self.addCleanup(scheduler.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            self.topic = Topic.objects.create(
+                name="Scheduled Topic",
+                description="Scheduling test",
+                notification=notification,
+            )
+
+    @patch("dispatcher.tasks.scheduling.group")
+    @patch("dispatcher.views.group")
+    def test_send_at_is_scheduled_then_released(self, mock_views_group, mock_group):
+        send_at = timezone.now() + timedelta(hours=1)
+        response = APIClient().post(
+            "/api/dispatcher/resolve/",
+            {
+                "topic_id": "Scheduled Topic",
+                "description": "Later",
+                "send_at": send_at.isoformat(),
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Notifications scheduled")
+        mock_views_group.assert_not_called()
+        self.assertEqual(scheduler.pending(), 1)
+
+        # Not due yet
+        self.assertEqual(release_scheduled(), 0)
+        released = scheduler.release(publish, now=send_at.timestamp())
+        self.assertEqual(released, 1)
+        (signature,) = mock_group.call_args.args[0]
+        self.assertEqual(signature.kwargs["pk"], self.topic.pk)
+        self.assertEqual(signature.kwargs["message"], "Later")
+        self.assertEqual(signature.kwargs["plan"]["method"], Notification.TELEGRAM)
+
+    @patch("dispatcher.views.group")
+    def test_lean_ingest_send_at(self, mock_group):
+        response = self.client.post(
+            "/api/dispatcher/ingest/",
+            {
+                "topic_id": "Scheduled Topic",
+                "description": "Later",
+                "send_at": (timezone.now() + timedelta(hours=1)).isoformat(),
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["message"], "Notifications scheduled")
+        mock_group.assert_not_called()
+        self.assertEqual(scheduler.pending(), 1)
+
+    @patch("dispatcher.views.group")
+    def test_past_send_at_is_sent_now(self, mock_group):
+        response = APIClient().post(
+            "/api/dispatcher/resolve/",
+            {
+                "topic_id": "Scheduled Topic",
+                "description": "Now",
+                "send_at": (timezone.now() - timedelta(minutes=1)).isoformat(),
+            },
+            format="json",
+        )
+        self.assertEqual(response.data, {"message": "Notifications sent"})
+        mock_group.return_value.apply_async.assert_called_once()
+        self.assertEqual(scheduler.pending(), 0)
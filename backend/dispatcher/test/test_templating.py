@@ -0,0 +1,161 @@
+from django.core import mail
+from django.template import Template
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import patch
+from dispatcher.models import MessageTemplate, Notification, Topic
+from dispatcher.plans import DeliveryPlan
+from dispatcher.routing import routing_table
+from dispatcher.services.notification_wrapper import NotificationWrapper
+from dispatcher.services.slack import SlackService
+from dispatcher.templating import TemplateCache, TemplateSource, template_cache
+import os
+
+TOPIC = {"name": "Sales", "description": "Leads from the web"}
+
+
+class TemplateCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = TemplateCache(max_size=2)
+
+    def test_renders_message_and_topic(self):
+        source = TemplateSource(
+            pk=1, version=1, body="[{{ topic.name }}] {{ message }}"
+        )
+        rendered = self.cache.render(source, "Hello", TOPIC)
+        self.assertEqual(rendered.body, "[Sales] Hello")
+        self.assertIsNone(rendered.subject)
+
+    def test_subject_is_a_single_line(self):
+        source = TemplateSource(
+            pk=1,
+            version=1,
+            body="{{ message }}",
+            subject="{{ topic.name }}:\n{{ message|truncatechars:8 }}",
+        )
+        rendered = self.cache.render(source, "A long message", TOPIC)
+        self.assertEqual(rendered.subject, "Sales: A long …")
+
+    def test_compiles_each_version_once(self):
+        source = TemplateSource(pk=1, version=1, body="{{ message }}")
+        with patch("dispatcher.templating.Template", wraps=Template) as template:
+            self.cache.render(source, "First", TOPIC)
+            self.cache.render(source, "Second", TOPIC)
+            self.assertEqual(template.call_count, 1)
+
+            edited = TemplateSource(pk=1, version=2, body="> {{ message }}")
+            self.assertEqual(self.cache.render(edited, "Third", TOPIC).body, "> Third")
+            self.assertEqual(template.call_count, 2)
+
+    def test_evicts_least_recently_used(self):
+        first, second, third = (
+            TemplateSource(pk=pk, version=1, body="{{ message }}") for pk in (1, 2, 3)
+        )
+        compiled = self.cache.get(first)
+        self.cache.get(second)
+        self.cache.get(first)
+        self.cache.get(third)
+        self.assertIs(self.cache.get(first), compiled)
+        self.assertEqual(list(self.cache._compiled), [(3, 1), (1, 1)])
+
+    def test_escapes_variables_not_markup(self):
+        source = TemplateSource(
+            pk=1, version=1, body="*{{ topic.name }}* {{ message }}"
+        )
+        rendered = self.cache.render(
+            source, "a < b & c", TOPIC, escape=SlackService.escape
+        )
+        self.assertEqual(rendered.body, "*Sales* a &lt; b &amp; c")
+
+
+class MessageTemplateModelTest(TestCase):
+    def setUp(self):
+        self.topic = Topic.objects.create(name="Sales", description="Leads")
+
+    def test_version_is_bumped_on_change(self):
+        template = MessageTemplate.objects.create(
+            topic=self.topic, method=Notification.SLACK, body="{{ message }}"
+        )
+        self.assertEqual(template.version, 1)
+        template.body = "*{{ topic.name }}* {{ message }}"
+        template.save()
+        template.refresh_from_db()
+        self.assertEqual(template.version, 2)
+
+    def test_invalid_template(self):
+        with self.assertRaises(ValueError):
+            MessageTemplate.objects.create(
+                topic=self.topic, method=Notification.SLACK, body="{% if %}"
+            )
+        with self.assertRaises(ValueError):
+            MessageTemplate.objects.create(
+                topic=self.topic,
+                method=Notification.SLACK,
+                subject="{{ topic.name }}",
+                body="{{ message }}",
+            )
+
+    def test_change_invalidates_routing_table(self):
+        routing_table.load()
+        with self.captureOnCommitCallbacks() as callbacks:
+            MessageTemplate.objects.create(
+                topic=self.topic, method=Notification.SLACK, body="{{ message }}"
+            )
+        # Only once the change is committed
+        self.assertIsNotNone(routing_table._routes)
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(routing_table._routes)
+
+
+class TemplatedDeliveryTest(TestCase):
+    def setUp(self):
+        # Primary keys are reused once each test is rolled back
+        template_cache.clear()
+
+    def _topic(self, method, config, **template):
+        notification = Notification.objects.create(method=method, config=config)
+        topic = Topic.objects.create(
+            name="Sales", description="Leads", notification=notification
+        )
+        MessageTemplate.objects.create(topic=topic, method=method, **template)
+        routing_table.load()
+        (plan,) = DeliveryPlan.for_route(routing_table.get("Sales"))
+        return plan
+
+    def test_plan_carries_template(self):
+        plan = self._topic(
+            Notification.SLACK, {"channel": "#sales"}, body="{{ message }}"
+        )
+        self.assertEqual(plan.template.body, "{{ message }}")
+        self.assertEqual(plan.context, {"name": "Sales", "description": "Leads"})
+        self.assertEqual(DeliveryPlan.from_dict(plan.to_dict()), plan)
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    @patch("dispatcher.services.telegram.requests.Session.post")
+    def test_telegram_html(self, mock_post):
+        mock_post.return_value.status_code = 200
+        plan = self._topic(
+            Notification.TELEGRAM,
+            {"chat_id": "123456789"},
+            body="<b>{{ topic.name }}</b>\n{{ message }}",
+        )
+        NotificationWrapper(plan=plan).send("1 < 2")
+        self.assertEqual(
+            mock_post.call_args.kwargs["data"],
+            {
+                "chat_id": "123456789",
+                "text": "<b>Sales</b>\n1 &lt; 2",
+                "parse_mode": "HTML",
+            },
+        )
+
+    def test_email_subject_and_body(self):
+        plan = self._topic(
+            Notification.EMAIL,
+            {"recipient_list": ["sales@example.com"], "subject": "Default"},
+            subject="[{{ topic.name }}] New lead",
+            body="{{ topic.description }}:\n\n{{ message }}",
+        )
+        NotificationWrapper(plan=plan).send("Call me back")
+        self.assertEqual(mail.outbox[0].subject, "[Sales] New lead")
+        self.assertEqual(mail.outbox[0].body, "Leads:\n\nCall me back")
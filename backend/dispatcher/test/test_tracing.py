@@ -0,0 +1,184 @@
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from unittest.mock import MagicMock, patch
+from dispatcher.models import Notification, Topic
+from dispatcher.plans import DeliveryPlan
+from dispatcher.services.notification_wrapper import NotificationWrapper
+from dispatcher.tasks.worker import end_task_span, propagate_trace, start_task_span
+from dispatcher.tracing import FileExporter, InMemoryExporter, Tracer
+import json
+import os
+import tempfile
+import time
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class TracerTest(SimpleTestCase):
+    def setUp(self):
+        self.exporter = InMemoryExporter()
+        self.tracer = Tracer(sample_rate=1, exporter=self.exporter)
+
+    def test_nests_spans(self):
+        with self.tracer.trace("resolve") as root:
+            with self.tracer.span("topic_lookup", topic="a"):
+                pass
+
+        child, exported_root = self.exporter.spans
+        self.assertIs(exported_root, root)
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(child.context.trace_id, root.context.trace_id)
+        self.assertEqual(child.parent_id, root.context.span_id)
+        self.assertEqual(child.attributes, {"topic": "a"})
+        self.assertGreaterEqual(root.end, child.end)
+
+    def test_span_outside_trace_is_noop(self):
+        with self.tracer.span("topic_lookup") as span:
+            self.assertIsNone(span)
+        self.assertIsNone(self.tracer.traceparent())
+        self.assertEqual(self.exporter.spans, [])
+
+    def test_sampling(self):
+        self.tracer.sample_rate = 0.5
+        with patch("dispatcher.tracing.random.random", return_value=0.7):
+            with self.tracer.trace("resolve") as span:
+                self.assertIsNone(span)
+        with patch("dispatcher.tracing.random.random", return_value=0.2):
+            with self.tracer.trace("resolve") as span:
+                self.assertIsNotNone(span)
+
+    def test_disabled(self):
+        self.tracer.sample_rate = 0
+        with self.tracer.trace("resolve", TRACEPARENT) as span:
+            self.assertIsNone(span)
+        self.assertEqual(self.exporter.spans, [])
+
+    def test_continues_sampled_traceparent(self):
+        self.tracer.sample_rate = 0.0001
+        with self.tracer.trace("resolve", TRACEPARENT) as span:
+            self.assertEqual(
+                self.tracer.traceparent(),
+                f"00-0af7651916cd43dd8448eb211c80319c-{span.context.span_id}-01",
+            )
+        self.assertEqual(span.parent_id, "b7ad6b7169203331")
+
+    def test_ignores_invalid_or_unsampled_traceparent(self):
+        self.assertIsNone(self.tracer.extract("garbage"))
+        self.assertIsNone(self.tracer.extract(TRACEPARENT[:-2] + "00"))
+
+    def test_records_error(self):
+        with self.assertRaises(ValueError):
+            with self.tracer.trace("resolve"):
+                raise ValueError("bad")
+        self.assertEqual(self.exporter.spans[0].error, "ValueError: bad")
+
+    def test_file_exporter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            tracer = Tracer(sample_rate=1, exporter=FileExporter(path))
+            with tracer.trace("resolve"):
+                with tracer.span("enqueue"):
+                    pass
+            tracer.exporter.stream.close()
+            with open(path) as file:
+                spans = [json.loads(line) for line in file]
+        self.assertEqual([span["name"] for span in spans], ["enqueue", "resolve"])
+        self.assertEqual(spans[0]["parent_id"], spans[1]["span_id"])
+
+
+class CeleryPropagationTest(SimpleTestCase):
+    def setUp(self):
+        self.exporter = InMemoryExporter()
+        self.tracer = Tracer(sample_rate=1, exporter=self.exporter)
+        patcher = patch("dispatcher.tasks.worker.tracer", self.tracer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_task_continues_published_trace(self):
+        headers = {}
+        with self.tracer.trace("resolve") as root:
+            propagate_trace(headers=headers)
+
+        task = MagicMock()
+        task.name = "dispatcher.tasks.sending.send_notification"
+        task.request.traceparent = headers["traceparent"]
+        task.request.ready_at = time.time() - 2
+        task.request.retries = 0
+        start_task_span(task_id="1", task=task)
+        with self.tracer.span("provider_send"):
+            pass
+        end_task_span(task=task, retval=None, state="SUCCESS")
+
+        _, queue_wait, provider_send, task_span = self.exporter.spans
+        self.assertEqual(task_span.name, "send_notification")
+        self.assertEqual(task_span.parent_id, root.context.span_id)
+        self.assertEqual(task_span.attributes["state"], "SUCCESS")
+        self.assertEqual(queue_wait.name, "queue_wait")
+        self.assertEqual(queue_wait.parent_id, task_span.context.span_id)
+        self.assertGreaterEqual(queue_wait.end - queue_wait.start, 2)
+        self.assertEqual(provider_send.parent_id, task_span.context.span_id)
+        self.assertIsNone(self.tracer.traceparent())
+
+    def test_untraced_task(self):
+        headers = {}
+        propagate_trace(headers=headers)
+        self.assertNotIn("traceparent", headers)
+
+        task = MagicMock(spec_set=["name", "request"])
+        task.name = "dispatcher.tasks.sending.send_notification"
+        task.request = MagicMock(traceparent=None, ready_at=None, retries=0)
+        start_task_span(task_id="1", task=task)
+        end_task_span(task=task, retval=None, state="SUCCESS")
+        self.assertEqual(self.exporter.spans, [])
+
+
+class TracedRequestTest(TestCase):
+    def setUp(self):
+        self.exporter = InMemoryExporter()
+        self.tracer = Tracer(sample_rate=1, exporter=self.exporter)
+        for target in (
+            "dispatcher.views.tracer",
+            "dispatcher.services.notification_wrapper.tracer",
+        ):
+            patcher = patch(target, self.tracer)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            self.topic = Topic.objects.create(
+                name="Traced Topic",
+                description="Tracing test",
+                notification=notification,
+            )
+
+    @patch("dispatcher.views.group")
+    def test_resolve_spans(self, mock_group):
+        response = APIClient().post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Traced Topic", "description": "Hello"},
+            format="json",
+            HTTP_TRACEPARENT=TRACEPARENT,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        names = [span.name for span in self.exporter.spans]
+        self.assertEqual(names, ["validate", "topic_lookup", "enqueue", "resolve"])
+        root = self.exporter.spans[-1]
+        self.assertEqual(root.parent_id, "b7ad6b7169203331")
+        self.assertEqual(root.attributes["status"], 200)
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "dummy_telegram_token"})
+    @patch("dispatcher.services.telegram.TelegramService.send")
+    def test_provider_send_span(self, mock_send):
+        mock_send.side_effect = ConnectionError("refused")
+        wrapper = NotificationWrapper(plan=DeliveryPlan.from_topic(self.topic))
+        with self.tracer.trace("send_notification"):
+            with self.assertRaises(ConnectionError):
+                wrapper.send("Hello")
+
+        provider_send = self.exporter.spans[0]
+        self.assertEqual(provider_send.name, "provider_send")
+        self.assertEqual(provider_send.attributes, {"method": Notification.TELEGRAM})
+        self.assertEqual(provider_send.error, "ConnectionError: refused")
@@ -0,0 +1,81 @@
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import patch
+from dispatcher.models import Notification
+from dispatcher.services.email import EmailRequirements
+from dispatcher.services.slack import SlackRequirements
+from dispatcher.services.validators import ConfigValidator, ValidatorRegistry
+
+
+class ConfigValidatorTest(SimpleTestCase):
+    def test_required_and_unknown_keys(self):
+        validator = ConfigValidator(EmailRequirements)
+        self.assertEqual(validator.required, {"recipient_list"})
+        self.assertTrue(validator({"recipient_list": ["a@example.com"]}))
+        self.assertTrue(
+            validator({"recipient_list": ["a@example.com"], "subject": "Hi"})
+        )
+        self.assertFalse(validator({"subject": "Hi"}))
+        self.assertFalse(validator({"recipient_list": [], "channel": "#general"}))
+        self.assertFalse(validator(["a@example.com"]))
+
+    def test_post_init_checks_still_run(self):
+        with self.assertRaises(ValidationError):
+            ConfigValidator(EmailRequirements)({"recipient_list": ["invalid"]})
+
+    def test_wrong_types_are_invalid(self):
+        validator = ConfigValidator(EmailRequirements)
+        self.assertFalse(validator({"recipient_list": 5}))
+        self.assertFalse(validator({"recipient_list": None}))
+
+    def test_no_instance_without_post_init(self):
+        validator = ConfigValidator(SlackRequirements)
+        self.assertFalse(validator.post_init)
+        with patch.object(validator, "requirements") as mock_requirements:
+            self.assertTrue(validator({"channel": "#general"}))
+        mock_requirements.assert_not_called()
+
+
+class ValidatorRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = ValidatorRegistry(max_size=2)
+
+    def test_valid_configs_are_cached_by_content(self):
+        original = ConfigValidator.__call__
+        with patch.object(
+            ConfigValidator, "__call__", autospec=True, side_effect=original
+        ) as mock_call:
+            for _ in range(3):
+                self.registry.validate(SlackRequirements, {"channel": "#general"})
+            self.registry.validate(SlackRequirements, {"channel": "#alerts"})
+        self.assertEqual(mock_call.call_count, 2)
+
+    def test_invalid_configs_are_not_cached(self):
+        for _ in range(2):
+            self.assertFalse(self.registry.validate(SlackRequirements, {}))
+        with self.assertRaises(ValidationError):
+            self.registry.validate(EmailRequirements, {"recipient_list": ["invalid"]})
+
+    def test_cache_is_bounded(self):
+        for channel in ("#a", "#b", "#c"):
+            self.registry.validate(SlackRequirements, {"channel": channel})
+        self.assertEqual(len(self.registry._valid), 2)
+
+
+class NotificationValidationTest(TestCase):
+    @patch("dispatcher.services.slack.SlackService.__init__")
+    def test_save_does_not_build_the_service(self, mock_init):
+        Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        mock_init.assert_not_called()
+
+    def test_save_rejects_invalid_config(self):
+        with self.assertRaises(ValueError):
+            Notification.objects.create(method=Notification.SLACK, config={})
+
+    def test_save_rejects_wrong_types(self):
+        with self.assertRaises(ValueError):
+            Notification.objects.create(
+                method=Notification.EMAIL, config={"recipient_list": None}
+            )
@@ -0,0 +1,371 @@
+from celery import current_app
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from dispatcher.models import Notification, Topic
+from dispatcher.routing import routing_table
+from dispatcher.idempotency import IdempotencyStore, idempotency_store
+
+
+class DispatcherViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            self.topic = Topic.objects.create(
+                name="Dispatch Topic",
+                description="Dispatcher test",
+                notification=notification,
+            )
+
+    @patch("dispatcher.views.group")
+    def test_resolve(self, mock_group):
+        routing_table.load()
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                "/api/dispatcher/resolve/",
+                {"topic_id": "Dispatch Topic", "description": "Hello"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        (signature,) = mock_group.call_args.args[0]
+        kwargs = signature.kwargs
+        self.assertEqual(kwargs["pk"], self.topic.pk)
+        self.assertEqual(kwargs["message"], "Hello")
+        self.assertEqual(kwargs["plan"]["method"], Notification.TELEGRAM)
+        self.assertEqual(kwargs["plan"]["config"], {"chat_id": "123456789"})
+        self.assertEqual(kwargs["plan"]["config_version"], routing_table.version)
+
+    @patch("dispatcher.views.group")
+    def test_resolve_fans_out_to_every_target(self, mock_group):
+        slack = Notification.objects.create(
+            method=Notification.SLACK, config={"channel": "#general"}
+        )
+        self.topic.additional_notifications.add(slack)
+        response = self.client.post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Dispatch Topic", "description": "Hello"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        signatures = mock_group.call_args.args[0]
+        self.assertEqual(
+            [signature.kwargs["plan"]["method"] for signature in signatures],
+            [Notification.TELEGRAM, Notification.SLACK],
+        )
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch("dispatcher.views.group")
+    def test_resolve_topic_without_notification(self, mock_group):
+        Topic.objects.create(name="Silent Topic", description="No notification")
+        response = self.client.post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Silent Topic", "description": "Hello"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        mock_group.assert_not_called()
+
+    @patch("dispatcher.views.group")
+    def test_resolve_unknown_topic(self, mock_group):
+        response = self.client.post(
+            "/api/dispatcher/resolve/",
+            {"topic_id": "Unknown Topic", "description": "Hello"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+        mock_group.assert_not_called()
+
+
+class DispatcherBatchViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.SLACK, config={"channel": "#general"}
+            )
+            self.sales = Topic.objects.create(
+                name="Sales", description="Sales topic", notification=notification
+            )
+            self.support = Topic.objects.create(
+                name="Support", description="Support topic", notification=notification
+            )
+
+    @patch("dispatcher.views.group")
+    def test_batch_resolve(self, mock_group):
+        routing_table.load()
+        payload = [
+            {"topic_id": "Sales", "description": "First"},
+            {"topic_id": "Unknown", "description": "Lost"},
+            {"topic_id": "Support", "description": "Second"},
+        ]
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                "/api/dispatcher/resolve/batch/", payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["status"] for item in response.data["results"]], [200, 404, 200]
+        )
+        mock_group.assert_called_once()
+        signatures = mock_group.call_args.args[0]
+        self.assertEqual(
+            [
+                (signature.kwargs["pk"], signature.kwargs["message"])
+                for signature in signatures
+            ],
+            [(self.sales.pk, "First"), (self.support.pk, "Second")],
+        )
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch("dispatcher.views.group")
+    def test_batch_all_unknown(self, mock_group):
+        response = self.client.post(
+            "/api/dispatcher/resolve/batch/",
+            [{"topic_id": "Unknown", "description": "Lost"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["status"], 404)
+        mock_group.assert_not_called()
+
+    @patch("dispatcher.views.group")
+    def test_batch_invalid_payload(self, mock_group):
+        response = self.client.post(
+            "/api/dispatcher/resolve/batch/",
+            [{"topic_id": "Sales"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        mock_group.assert_not_called()
+
+    @patch("dispatcher.views.ASYNC_DELIVERY_BATCH_SIZE", 2)
+    @patch("dispatcher.views.ASYNC_DELIVERY_ENABLED", True)
+    @patch("dispatcher.views.group")
+    def test_batch_async_delivery(self, mock_group):
+        payload = [{"topic_id": "Sales", "description": str(i)} for i in range(3)]
+        response = self.client.post(
+            "/api/dispatcher/resolve/batch/", payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        signatures = mock_group.call_args.args[0]
+        self.assertEqual(
+            [signature.task for signature in signatures],
+            ["dispatcher.tasks.sending.send_notification_batch"] * 2,
+        )
+        self.assertEqual(
+            [len(signature.kwargs["deliveries"]) for signature in signatures], [2, 1]
+        )
+        # Each batch goes to the queue of its method
+        queues = {
+            current_app.amqp.router.route(
+                {}, signature.task, args=signature.args, kwargs=signature.kwargs
+            )["queue"].name
+            for signature in signatures
+        }
+        self.assertNotIn("celery", queues)
+
+
+class DispatcherIdempotencyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            Topic.objects.create(
+                name="Webhook Topic",
+                description="Webhook test",
+                notification=notification,
+            )
+            self.payload = {"topic_id": "Webhook Topic", "description": "Hello"}
+
+    def _post(self, **headers):
+        return self.client.post(
+            "/api/dispatcher/resolve/", self.payload, format="json", headers=headers
+        )
+
+    @patch("dispatcher.views.group")
+    def test_duplicate_key_replays_response(self, mock_group):
+        first = self._post(**{"Idempotency-Key": "webhook-1"})
+        second = self._post(**{"Idempotency-Key": "webhook-1"})
+
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        mock_group.assert_called_once()
+
+    @patch("dispatcher.views.group")
+    def test_different_keys_are_sent(self, mock_group):
+        self._post(**{"Idempotency-Key": "webhook-1"})
+        self._post(**{"Idempotency-Key": "webhook-2"})
+        self._post()
+        self._post()
+        self.assertEqual(mock_group.call_count, 4)
+
+    @patch("dispatcher.views.group")
+    def test_duplicate_in_progress(self, mock_group):
+        key = idempotency_store.key("webhook-1", "Webhook Topic", "Hello")
+        idempotency_store.claim(key)
+        response = self._post(**{"Idempotency-Key": "webhook-1"})
+        self.assertEqual(response.status_code, 409)
+        mock_group.assert_not_called()
+
+    @patch("dispatcher.views.group")
+    def test_only_responses_are_kept_for_the_key_ttl(self, mock_group):
+        store = IdempotencyStore(ttl=3600, in_progress_ttl=30)
+        with patch("dispatcher.views.idempotency_store", store), patch(
+            "dispatcher.idempotency.cache"
+        ) as mock_cache:
+            mock_cache.add.return_value = True
+            self._post(**{"Idempotency-Key": "webhook-1"})
+        self.assertEqual(mock_cache.add.call_args.kwargs["timeout"], 30)
+        self.assertEqual(mock_cache.set.call_args.kwargs["timeout"], 3600)
+
+    @patch("dispatcher.views.group")
+    def test_failed_request_can_be_retried(self, mock_group):
+        mock_group.return_value.apply_async.side_effect = [
+            ConnectionError("Broker down"),
+            None,
+        ]
+        self.assertEqual(
+            self._post(**{"Idempotency-Key": "webhook-1"}).status_code, 500
+        )
+        self.assertEqual(
+            self._post(**{"Idempotency-Key": "webhook-1"}).status_code, 200
+        )
+
+    @patch("dispatcher.views.group")
+    def test_content_keys(self, mock_group):
+        store = IdempotencyStore(content_keys=True)
+        with patch("dispatcher.views.idempotency_store", store):
+            self._post()
+            self._post()
+        mock_group.assert_called_once()
+
+
+class AsyncDispatcherViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = AsyncClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            self.topic = Topic.objects.create(
+                name="Async Topic", description="Async test", notification=notification
+            )
+
+    def _post(self, data, **headers):
+        return self.client.post(
+            "/api/dispatcher/resolve/async/",
+            data,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    @patch("dispatcher.views.group")
+    async def test_resolve(self, mock_group):
+        response = await self._post({"topic_id": "Async Topic", "description": "Hi"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"message": "Notifications sent"})
+        (signature,) = mock_group.call_args.args[0]
+        self.assertEqual(signature.kwargs["pk"], self.topic.pk)
+        self.assertEqual(signature.kwargs["message"], "Hi")
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch("dispatcher.views.group")
+    async def test_unknown_topic(self, mock_group):
+        response = await self._post({"topic_id": "Missing", "description": "Hi"})
+        self.assertEqual(response.status_code, 404)
+        mock_group.assert_not_called()
+
+    async def test_invalid_payload(self):
+        response = await self._post("{not json")
+        self.assertEqual(response.status_code, 400)
+        response = await self._post({"topic_id": "Async Topic"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("description", response.json()["message"])
+
+    async def test_only_post(self):
+        response = await self.client.get("/api/dispatcher/resolve/async/")
+        self.assertEqual(response.status_code, 405)
+
+    @patch("dispatcher.views.group")
+    async def test_duplicate_key_replays_response(self, mock_group):
+        payload = {"topic_id": "Async Topic", "description": "Hi"}
+        await self._post(payload, **{"Idempotency-Key": "webhook-1"})
+        second = await self._post(payload, **{"Idempotency-Key": "webhook-1"})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        mock_group.assert_called_once()
+
+
+class LeanIngestViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                method=Notification.TELEGRAM, config={"chat_id": "123456789"}
+            )
+            self.topic = Topic.objects.create(
+                name="Lean Topic", description="Lean test", notification=notification
+            )
+
+    def _post(self, data, **headers):
+        return self.client.post(
+            "/api/dispatcher/ingest/",
+            data,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    @patch("dispatcher.views.group")
+    def test_ingest(self, mock_group):
+        response = self._post(
+            {"topic_id": "Lean Topic", "description": "Hi", "priority": "high"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json(), {"message": "Notifications sent"})
+        (signature,) = mock_group.call_args.args[0]
+        self.assertEqual(signature.kwargs["pk"], self.topic.pk)
+        self.assertEqual(signature.kwargs["message"], "Hi")
+        mock_group.return_value.apply_async.assert_called_once()
+
+    @patch("dispatcher.views.group")
+    def test_unknown_topic(self, mock_group):
+        response = self._post({"topic_id": "Missing", "description": "Hi"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"message": "No topic for Missing"})
+        mock_group.assert_not_called()
+
+    def test_invalid_payload(self):
+        response = self._post("{not json")
+        self.assertEqual(response.status_code, 400)
+        response = self._post({"topic_id": "Lean Topic", "priority": "urgent"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["message"]), {"description", "priority"})
+
+    def test_only_post(self):
+        response = self.client.get("/api/dispatcher/ingest/")
+        self.assertEqual(response.status_code, 405)
+
+    @patch("dispatcher.views.group")
+    def test_duplicate_key_replays_response(self, mock_group):
+        payload = {"topic_id": "Lean Topic", "description": "Hi"}
+        self._post(payload, **{"Idempotency-Key": "webhook-1"})
+        second = self._post(payload, **{"Idempotency-Key": "webhook-1"})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        mock_group.assert_called_once()
@@ -0,0 +1,304 @@
+from django.utils.module_loading import import_string
+from dispatcher.settings import (
+    TRACING_SAMPLE_RATE,
+    TRACING_EXPORTER,
+    TRACING_FILE,
+)
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, Token
+import dataclasses
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+
+@dataclasses.dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        # W3C trace context header, only sampled traces are propagated
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+@dataclasses.dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: Optional[str] = None
+    start: float = dataclasses.field(default_factory=time.time)
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(((self.end or self.start) - self.start) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class SpanExporter:
+    """
+    Receives every finished span of a sampled trace.
+    """
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class ConsoleExporter(SpanExporter):
+    """
+    Writes each span to stdout as a JSON line.
+    """
+
+    def __init__(self, stream=None) -> None:
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class FileExporter(ConsoleExporter):
+    """
+    Appends each span to a file as a JSON line.
+    """
+
+    def __init__(self, path: str = TRACING_FILE) -> None:
+        super().__init__(open(path, "a", buffering=1))
+
+
+class InMemoryExporter(SpanExporter):
+    """
+    Keeps the spans in a list, for tests.
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class Tracer:
+    """
+    Traces a message from the resolve request to the provider response.
+
+    A trace is started for a share of the resolve requests, or continued from
+    the traceparent header of the request. The current span lives in a context
+    variable, and its context travels to the workers in the traceparent header
+    of the Celery task messages. Unsampled requests pay only for a context
+    variable lookup per span.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = TRACING_SAMPLE_RATE,
+        exporter: Optional[SpanExporter] = None,
+    ) -> None:
+        """
+        Initializes the tracer.
+
+        Args:
+            sample_rate (float): Share of the requests traced, 0 disables tracing.
+            exporter (Optional[SpanExporter]): Where finished spans are sent. By
+                default an instance of the TRACING_EXPORTER class, built on first
+                use.
+        """
+        self.sample_rate = sample_rate
+        self._exporter = exporter
+        self._current: ContextVar[Optional[Span]] = ContextVar(
+            "current_span", default=None
+        )
+
+    @property
+    def exporter(self) -> SpanExporter:
+        if self._exporter is None:
+            self._exporter = import_string(TRACING_EXPORTER)()
+        return self._exporter
+
+    def trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any):
+        """
+        Returns a context manager running its block in the root span of a new
+        trace, or of the trace of a traceparent header.
+
+        Args:
+            name (str): The span name.
+            traceparent (Optional[str]): The traceparent header of the request.
+            **attributes: Attributes of the span.
+        """
+        if self.sample_rate <= 0:
+            return nullcontext()
+        parent = self.extract(traceparent)
+        if parent is None and random.random() >= self.sample_rate:
+            return nullcontext()
+        return self._span(name, parent, attributes)
+
+    def span(self, name: str, **attributes: Any):
+        """
+        Returns a context manager running its block in a child span of the
+        current one. It does nothing outside a sampled trace.
+
+        Args:
+            name (str): The span name.
+            **attributes: Attributes of the span.
+        """
+        parent = self._current.get()
+        if parent is None:
+            return nullcontext()
+        return self._span(name, parent.context, attributes)
+
+    def begin(
+        self,
+        name: str,
+        traceparent: Optional[str] = None,
+        **attributes: Any,
+    ) -> Optional[Tuple[Span, Token]]:
+        """
+        Starts a span continuing the trace of a traceparent header, or else the
+        current span, and makes it current until end() is called.
+
+        Args:
+            name (str): The span name.
+            traceparent (Optional[str]): The propagated trace context.
+            **attributes: Attributes of the span.
+
+        Returns:
+            Optional[Tuple[Span, Token]]: The span to pass to end(), or None if
+                there is no sampled trace to continue.
+        """
+        parent = self.extract(traceparent)
+        if parent is None:
+            current = self._current.get()
+            if current is None:
+                return None
+            parent = current.context
+        span = self._start(name, parent, attributes)
+        return span, self._current.set(span)
+
+    def end(
+        self, handle: Optional[Tuple[Span, Token]], error: Optional[Exception] = None
+    ) -> None:
+        """
+        Ends a span started with begin().
+
+        Args:
+            handle (Optional[Tuple[Span, Token]]): What begin() returned.
+            error (Optional[Exception]): The error the span failed with.
+        """
+        if handle is None:
+            return
+        span, token = handle
+        self._current.reset(token)
+        self._finish(span, error)
+
+    def record(self, name: str, start: float, end: float, **attributes: Any) -> None:
+        """
+        Records a child span of the current one that already happened, e.g. the
+        time a task waited in its queue.
+
+        Args:
+            name (str): The span name.
+            start (float): When the span started, as a timestamp.
+            end (float): When the span ended, as a timestamp.
+            **attributes: Attributes of the span.
+        """
+        parent = self._current.get()
+        if parent is None:
+            return
+        span = self._start(name, parent.context, attributes)
+        span.start = start
+        span.end = end
+        self._export(span)
+
+    def traceparent(self) -> Optional[str]:
+        """
+        Returns the traceparent header propagating the current span.
+
+        Returns:
+            Optional[str]: The header, or None outside a sampled trace.
+        """
+        current = self._current.get()
+        return current.context.traceparent if current is not None else None
+
+    def extract(self, traceparent: Optional[str]) -> Optional[SpanContext]:
+        """
+        Parses a traceparent header, honoring the sampling decision in it.
+
+        Args:
+            traceparent (Optional[str]): The header.
+
+        Returns:
+            Optional[SpanContext]: The parent context, or None if the header is
+                missing, invalid or not sampled, or tracing is disabled.
+        """
+        if not traceparent or self.sample_rate <= 0:
+            return None
+        match = TRACEPARENT.fullmatch(traceparent.strip().lower())
+        if match is None or not int(match[3], 16) & 1:
+            return None
+        return SpanContext(match[1], match[2])
+
+    @contextmanager
+    def _span(
+        self, name: str, parent: Optional[SpanContext], attributes: Dict[str, Any]
+    ) -> Iterator[Span]:
+        span = self._start(name, parent, attributes)
+        token = self._current.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._current.reset(token)
+            self._finish(span, error)
+
+    @staticmethod
+    def _start(
+        name: str, parent: Optional[SpanContext], attributes: Dict[str, Any]
+    ) -> Span:
+        trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        return Span(
+            name=name,
+            context=SpanContext(trace_id, f"{random.getrandbits(64):016x}"),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+
+    def _finish(self, span: Span, error: Optional[BaseException]) -> None:
+        span.end = time.time()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        self._export(span)
+
+    def _export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.error(f"Error exporting span {span.name}: {e}")
+
+
+tracer = Tracer()
@@ -4,6 +4,10 @@ from dispatcher.views import (
     TopicViewSet,
     NotificationViewSet,
     Dispatcher,
+    CircuitBreakerViewSet,
+    QueueViewSet,
+    resolve,
+    ingest,
 )
 
 
@@ -16,5 +20,10 @@ router.register(r"notifications", NotificationViewSet)
 # The API URLs are now determined automatically by the router.
 dispatcher_urlpatterns = [
     path("resolve/", Dispatcher.as_view({"post": "post"})),
+    path("resolve/batch/", Dispatcher.as_view({"post": "batch"})),
+    path("resolve/async/", resolve),
+    path("ingest/", ingest),
+    path("breakers/", CircuitBreakerViewSet.as_view({"get": "list"})),
+    path("queues/", QueueViewSet.as_view({"get": "list"})),
     path("", include(router.urls)),
 ]
@@ -1,25 +1,104 @@
 from dispatcher.models import Topic, Notification
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, serializers
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from dispatcher.serializers import (
     TopicSerializer,
     NotificationSerializer,
     ChatMessageSerializer,
 )
 from rest_framework.response import Response
-from dispatcher.tasks.sending import send_notification
+from dispatcher.tasks.sending import send_notification, send_notification_batch
+from dispatcher.tasks.digest import flush_digest
+from dispatcher.digest import digest_buffer
+from dispatcher.routing import routing_table
+from dispatcher.plans import DeliveryPlan
+from dispatcher.breaker import circuit_breaker
+from dispatcher.idempotency import idempotency_store
+from dispatcher.queues import queue_stats
+from dispatcher.scheduling import deliver_at, scheduler
+from dispatcher.metrics import (
+    CONTENT_TYPE,
+    render as render_metrics,
+    resolve_requests,
+    topic_lookup_seconds,
+    enqueue_seconds,
+)
+from dispatcher.tracing import tracer
+from dispatcher.ingest import IngestError, parse_chat_message
+from dispatcher.listing import CreatedCursorPagination, list_etag
+from dispatcher.bulk import (
+    NDJSON_CONTENT_TYPE,
+    NDJSONRenderer,
+    export_topics,
+    import_topics,
+)
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from asgiref.sync import sync_to_async
+from dispatcher.settings import (
+    RESOLVE_BATCH_MAX_SIZE,
+    ASYNC_DELIVERY_ENABLED,
+    ASYNC_DELIVERY_BATCH_SIZE,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    METRICS_ENABLED,
+    METRICS_TOKEN,
+)
+from celery import current_app, group
+from collections import defaultdict
+import hmac
+import json
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
 
 class TopicViewSet(viewsets.ModelViewSet):
-    queryset = Topic.objects.all()
+    queryset = Topic.objects.select_related("notification").prefetch_related(
+        "additional_notifications"
+    )
     serializer_class = TopicSerializer
+    pagination_class = CreatedCursorPagination
+
+    # Topics embed their main notification
+    @method_decorator(condition(etag_func=list_etag(Topic, Notification)))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_ndjson(self, request):
+        """
+        Creates or updates topics from an NDJSON body, one topic per line, as
+        the body is read. See dispatcher.bulk.TopicImporter.
+        """
+        report = import_topics(request.stream or ())
+        return Response(report.to_dict(), status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=[NDJSONRenderer, JSONRenderer],
+    )
+    def export_ndjson(self, request):
+        """
+        Streams every topic as an NDJSON line that the import accepts.
+        """
+        return StreamingHttpResponse(export_topics(), content_type=NDJSON_CONTENT_TYPE)
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    pagination_class = CreatedCursorPagination
+
+    @method_decorator(condition(etag_func=list_etag(Notification)))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -28,19 +107,76 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class CircuitBreakerViewSet(viewsets.ViewSet):
+    def list(self, request):
+        """
+        Lists the state and trip count of every provider circuit that tripped.
+        """
+        return Response(circuit_breaker.status(), status=status.HTTP_200_OK)
+
+
+class QueueViewSet(viewsets.ViewSet):
+    def list(self, request):
+        """
+        Lists the depth and waiting time of every delivery queue.
+        """
+        return Response(queue_stats.status(current_app), status=status.HTTP_200_OK)
+
+
+def metrics(request):
+    """
+    Renders the metrics of the API in the Prometheus text format. When
+    METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+    if not METRICS_ENABLED:
+        raise Http404
+    if METRICS_TOKEN:
+        expected = f"Bearer {METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
+
+
 class Dispatcher(viewsets.ViewSet):
     def post(self, request):
+        with tracer.trace("resolve", request.headers.get("traceparent")) as span:
+            response = self._resolve(request)
+            if span is not None:
+                span.attributes["status"] = response.status_code
+        resolve_requests.labels(endpoint="resolve", status=response.status_code).inc()
+        return response
+
+    def batch(self, request):
+        """
+        Resolves a list of chat messages and enqueues all their deliveries at once.
+
+        Every item gets its own result so a missing topic does not reject the
+        whole batch.
+        """
+        traceparent = request.headers.get("traceparent")
+        with tracer.trace("resolve_batch", traceparent) as span:
+            response = self._resolve_batch(request)
+            if span is not None:
+                span.attributes["status"] = response.status_code
+        resolve_requests.labels(endpoint="batch", status=response.status_code).inc()
+        return response
+
+    def _resolve(self, request):
         try:
-            serializer = ChatMessageSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+            with tracer.span("validate"):
+                serializer = ChatMessageSerializer(data=request.data)
+                serializer.is_valid(raise_exception=True)
             message: str = serializer.validated_data["description"]
             topic_id: int = serializer.validated_data["topic_id"]
+            priority: str = serializer.validated_data["priority"]
+            send_at = serializer.validated_data.get("send_at")
 
-            topic = Topic.objects.get(name=topic_id)
-            send_notification.delay(pk=topic.pk, message=message)
-            return Response(
-                {"message": "Notifications sent"}, status=status.HTTP_200_OK
+            key = idempotency_store.key(
+                request.headers.get("Idempotency-Key"), topic_id, message
             )
+            with topic_lookup_seconds.time(), tracer.span("topic_lookup"):
+                route = routing_table.get(topic_id)
+            return self._dispatch(key, route, message, priority, send_at)
         except Topic.DoesNotExist:
             error = f"No topic for {topic_id}"
             logger.error(error)
@@ -50,3 +186,255 @@ class Dispatcher(viewsets.ViewSet):
             return Response(
                 {"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+    def _dispatch(self, key, route, message, priority, send_at=None):
+        """
+        Enqueues the deliveries of a resolved message, or schedules them if they
+        are due later, unless it is a duplicate.
+        """
+        replay = idempotency_store.claim(key)
+        if replay is not None:
+            logger.info(f"Duplicate message for {route.name}, not sending")
+            return replay
+
+        try:
+            deliveries = self._deliveries(route, message, priority)
+            due = deliver_at(route, send_at, priority) if deliveries else None
+            if due is not None:
+                with tracer.span("schedule"):
+                    scheduler.schedule(deliveries, due)
+            elif deliveries:
+                # One task per target so each channel is sent and retried on
+                # its own
+                with enqueue_seconds.time(), tracer.span("enqueue"):
+                    group(
+                        [send_notification.s(**delivery) for delivery in deliveries]
+                    ).apply_async()
+        except Exception:
+            # Let the retry of a failed request through
+            idempotency_store.release(key)
+            raise
+        body = {"message": "Notifications sent"}
+        if due is not None:
+            body = {"message": "Notifications scheduled", "send_at": due.isoformat()}
+        response = Response(body, status=status.HTTP_200_OK)
+        idempotency_store.complete(key, response)
+        return response
+
+    def _resolve_batch(self, request):
+        try:
+            with tracer.span("validate"):
+                serializer = ChatMessageSerializer(
+                    data=request.data, many=True, max_length=RESOLVE_BATCH_MAX_SIZE
+                )
+                serializer.is_valid(raise_exception=True)
+            items = serializer.validated_data
+            with topic_lookup_seconds.time(), tracer.span("topic_lookup"):
+                routes = routing_table.get_many(item["topic_id"] for item in items)
+
+            results = []
+            deliveries = []
+            for item in items:
+                topic_id = item["topic_id"]
+                route = routes.get(topic_id)
+                if route is None:
+                    error = f"No topic for {topic_id}"
+                    logger.error(error)
+                    results.append(
+                        {
+                            "topic_id": topic_id,
+                            "status": status.HTTP_404_NOT_FOUND,
+                            "message": error,
+                        }
+                    )
+                    continue
+                priority = item["priority"]
+                item_deliveries = self._deliveries(route, item["description"], priority)
+                due = None
+                if item_deliveries:
+                    due = deliver_at(route, item.get("send_at"), priority)
+                if due is not None:
+                    scheduler.schedule(item_deliveries, due)
+                else:
+                    deliveries.extend(item_deliveries)
+                results.append(
+                    {
+                        "topic_id": topic_id,
+                        "status": status.HTTP_200_OK,
+                        "message": "Notifications scheduled"
+                        if due is not None
+                        else "Notifications sent",
+                    }
+                )
+
+            if deliveries:
+                with enqueue_seconds.time(), tracer.span("enqueue"):
+                    self._enqueue(deliveries)
+            return Response({"results": results}, status=status.HTTP_200_OK)
+        except serializers.ValidationError as e:
+            return Response({"message": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Dispatcher batch error: {e}")
+            return Response(
+                {"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _deliveries(self, route, message, priority=PRIORITY_NORMAL):
+        plans = [plan.to_dict() for plan in DeliveryPlan.for_route(route)]
+        if not plans:
+            logger.info(f"Topic {route.name} has not any notification method")
+        elif route.digest_window and priority != PRIORITY_HIGH:
+            # Digest topics are buffered and delivered later as a single
+            # message, except urgent ones
+            countdown = digest_buffer.add(route, message)
+            if countdown is not None:
+                flush_digest.apply_async(
+                    kwargs={"pk": route.pk, "plans": plans, "name": route.name},
+                    countdown=countdown,
+                )
+            return []
+        return [
+            {"pk": route.pk, "message": message, "plan": plan, "priority": priority}
+            for plan in plans
+        ]
+
+    def _enqueue(self, deliveries):
+        if ASYNC_DELIVERY_ENABLED:
+            # Hand chunks of deliveries to the async engine instead of one task
+            # each. A chunk only holds deliveries of one queue and priority lane.
+            lanes = defaultdict(list)
+            for delivery in deliveries:
+                lanes[delivery["plan"]["method"], delivery["priority"]].append(delivery)
+            signatures = [
+                send_notification_batch.s(
+                    deliveries=lane[i : i + ASYNC_DELIVERY_BATCH_SIZE]
+                )
+                for lane in lanes.values()
+                for i in range(0, len(lane), ASYNC_DELIVERY_BATCH_SIZE)
+            ]
+        else:
+            signatures = [send_notification.s(**delivery) for delivery in deliveries]
+        group(signatures).apply_async()
+
+
+async def resolve(request):
+    """
+    Async variant of Dispatcher.post, for ASGI servers.
+
+    The request holds no thread while it is read, validated and routed. Only
+    the broker publish, which Celery does not offer async, runs in a thread of
+    its own so concurrent publishes do not wait for each other.
+    """
+    if request.method != "POST":
+        return _method_not_allowed(request)
+    with tracer.trace("resolve", request.headers.get("traceparent")) as span:
+        response = await _resolve(request)
+        if span is not None:
+            span.attributes["status"] = response.status_code
+    resolve_requests.labels(endpoint="resolve_async", status=response.status_code).inc()
+    return _json_response(response)
+
+
+# Requests come from chatbots, not from browsers
+resolve.csrf_exempt = True
+
+
+async def _resolve(request):
+    try:
+        with tracer.span("validate"):
+            serializer = ChatMessageSerializer(data=json.loads(request.body))
+            serializer.is_valid(raise_exception=True)
+        message: str = serializer.validated_data["description"]
+        topic_id: str = serializer.validated_data["topic_id"]
+        priority: str = serializer.validated_data["priority"]
+        send_at = serializer.validated_data.get("send_at")
+
+        key = idempotency_store.key(
+            request.headers.get("Idempotency-Key"), topic_id, message
+        )
+        with topic_lookup_seconds.time(), tracer.span("topic_lookup"):
+            route = await routing_table.aget(topic_id)
+        dispatch = sync_to_async(Dispatcher()._dispatch, thread_sensitive=False)
+        return await dispatch(key, route, message, priority, send_at)
+    except json.JSONDecodeError as e:
+        return Response(
+            {"message": f"Invalid JSON: {e}"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    except serializers.ValidationError as e:
+        return Response({"message": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+    except Topic.DoesNotExist:
+        error = f"No topic for {topic_id}"
+        logger.error(error)
+        return Response({"message": error}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Dispatcher error: {e}")
+        return Response(
+            {"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@csrf_exempt
+def ingest(request):
+    """
+    Lean variant of Dispatcher.post, with the same validation and responses
+    but without DRF request parsing, serializer fields and renderers.
+    """
+    if request.method != "POST":
+        return _method_not_allowed(request)
+    with tracer.trace("resolve", request.headers.get("traceparent")) as span:
+        response = _ingest(request)
+        if span is not None:
+            span.attributes["status"] = response.status_code
+    resolve_requests.labels(endpoint="ingest", status=response.status_code).inc()
+    return _json_response(response)
+
+
+def _ingest(request):
+    try:
+        with tracer.span("validate"):
+            topic_id, message, priority, send_at = parse_chat_message(
+                orjson.loads(request.body)
+            )
+
+        key = idempotency_store.key(
+            request.headers.get("Idempotency-Key"), topic_id, message
+        )
+        with topic_lookup_seconds.time(), tracer.span("topic_lookup"):
+            route = routing_table.get(topic_id)
+        return Dispatcher()._dispatch(key, route, message, priority, send_at)
+    except orjson.JSONDecodeError as e:
+        return Response(
+            {"message": f"Invalid JSON: {e}"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    except IngestError as e:
+        return Response({"message": e.errors}, status=status.HTTP_400_BAD_REQUEST)
+    except Topic.DoesNotExist:
+        error = f"No topic for {topic_id}"
+        logger.error(error)
+        return Response({"message": error}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Dispatcher error: {e}")
+        return Response(
+            {"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _json_response(response):
+    # The unrendered DRF response of a view, encoded without a renderer
+    json_response = HttpResponse(
+        orjson.dumps(response.data, default=str),
+        status=response.status_code,
+        content_type="application/json",
+    )
+    if response.has_header("Idempotent-Replayed"):
+        json_response["Idempotent-Replayed"] = response["Idempotent-Replayed"]
+    return json_response
+
+
+def _method_not_allowed(request):
+    return _json_response(
+        Response(
+            {"message": f"Method {request.method} not allowed"},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED,
+        )
+    )
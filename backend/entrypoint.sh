@@ -1,5 +1,13 @@
 #!/bin/bash
 echo "Apply database migrations"
 python manage.py migrate
-echo "Running in local environment"
-python manage.py runserver 0.0.0.0:$BACKEND_API_PORT
\ No newline at end of file
+if [ "${SERVER_PROFILE:-dev}" = "dev" ]; then
+    echo "Running in local environment"
+    python manage.py runserver 0.0.0.0:$BACKEND_API_PORT
+else
+    echo "Running the $SERVER_PROFILE server profile"
+    # The Gunicorn workers share their metrics through files in this directory
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    exec gunicorn -c gunicorn.conf.py
+fi
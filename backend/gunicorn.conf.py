@@ -0,0 +1,43 @@
+"""
+Gunicorn settings of the production server profile.
+
+SERVER_PROFILE=asgi, the default, serves backend.asgi on Uvicorn workers: one
+process per core, each holding thousands of concurrent connections on a single
+event loop. SERVER_PROFILE=wsgi serves backend.wsgi on threaded sync workers.
+"""
+
+import multiprocessing
+import os
+
+profile = os.getenv("SERVER_PROFILE", "asgi")
+cores = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('BACKEND_API_PORT', 8000)}"
+if profile == "wsgi":
+    wsgi_app = "backend.wsgi:application"
+    worker_class = "gthread"
+    workers = int(os.getenv("WEB_CONCURRENCY", cores * 2 + 1))
+    threads = int(os.getenv("WEB_THREADS", 8))
+else:
+    wsgi_app = "backend.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    workers = int(os.getenv("WEB_CONCURRENCY", cores))
+
+# Queue connection bursts in the kernel instead of refusing them
+backlog = 2048
+# Longer than the idle timeout of the load balancer in front
+keepalive = 75
+timeout = 30
+graceful_timeout = 30
+# Recycle workers now and then to bound memory growth, not all at once
+max_requests = 10000
+max_requests_jitter = 1000
+errorlog = "-"
+
+
+def child_exit(server, worker):
+    # Workers share their metrics through files in PROMETHEUS_MULTIPROC_DIR
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,13 @@
+import axiosInstance from './axiosInstance';
+
+// Follows the cursor links of a paginated list and returns all of its results
+export const fetchAll = async (url) => {
+  const results = [];
+  let next = url;
+  while (next) {
+    const response = await axiosInstance.get(next);
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return results;
+};
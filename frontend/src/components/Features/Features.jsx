@@ -3,6 +3,7 @@ import { Row, Col, Card, Typography, Spin, message, Input } from 'antd';
 import { MailOutlined, SlackSquareOutlined, SendOutlined, WechatOutlined } from '@ant-design/icons';
 import './Features.css';
 import axiosInstance from 'api/axiosInstance';
+import { fetchAll } from 'api/pagination';
 
 const { Title } = Typography;
 
@@ -23,8 +24,7 @@ const Features = () => {
   useEffect(() => {
     const fetchFeatures = async () => {
       try {
-        const response = await axiosInstance.get('/dispatcher/topics');
-        setFeatures(response.data);
+        setFeatures(await fetchAll('/dispatcher/topics/'));
       } catch (err) {
         setError('Failed to fetch features. Please try again later.');
         console.error(err);
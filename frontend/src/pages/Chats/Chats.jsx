@@ -7,6 +7,7 @@ import {
   PlayCircleOutlined,
 } from '@ant-design/icons';
 import axiosInstance from 'api/axiosInstance';
+import { fetchAll } from 'api/pagination';
 import ChatBot from '@components/ChatBot/ChatBot';
 import './Chats.css';
 
@@ -27,8 +28,7 @@ const ChatView = () => {
   useEffect(() => {
     const fetchTopics = async () => {
       try {
-        const response = await axiosInstance.get('/dispatcher/topics');
-        setTopics(response.data);
+        setTopics(await fetchAll('/dispatcher/topics/'));
       } catch (err) {
         setError('Failed to fetch topics. Please try again later.');
         console.error(err);